@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""音声のみモードと通常モードの CPU・GPU プロセス・メモリ使用量を比べる
+
+- qt: PlayerController（QtWebEngine）で動画を再生し、set_audio_only の有無で比べる
+- chrome: pomodoro.tube.py と同じ Selenium の Chrome を、通常の起動オプションと
+  音声のみ用（ヘッドレス・GPU 無効・画像なし）の起動オプションで比べる
+
+再生開始から --warmup 秒待ったあと --seconds 秒間、プロセスツリー全体の CPU 時間と
+常駐メモリを計測し、Chromium の --type=（renderer / gpu-process / utility など）ごとに集計する。
+ネットワークが必要。qt は QtWebEngine（QT_QPA_PLATFORM=offscreen で動く）、
+chrome は Selenium と Chrome が必要。
+
+    python benchmarks/bench_audio_only.py --video dQw4w9WgXcQ --seconds 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PLAYER_SCRIPT = """
+import sys
+sys.path.insert(0, %(root)r)
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from youtube_player import PlayerController
+
+app = QtWidgets.QApplication(sys.argv)
+view = QWebEngineView()
+view.resize(640, 360)
+player = PlayerController(view)
+player.set_audio_only(%(audio_only)r)
+if %(audio_only)r:
+    view.hide()
+else:
+    view.show()
+player.load(%(video)r)
+QtCore.QTimer.singleShot(%(timeout_ms)d, app.quit)
+app.exec_()
+"""
+
+
+# --- プロセスツリーの計測 ---
+
+def _children_map():
+    """/proc から ppid -> [pid] を作る"""
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def process_tree(pid):
+    """pid とその子孫の pid"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            return [pid] + [child.pid for child in parent.children(recursive=True)]
+        except psutil.Error:
+            return []
+    children = _children_map()
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, ()))
+    return pids
+
+
+def process_kind(pid):
+    """Chromium の --type= の値（指定がなければ "browser"）"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = f.read().decode(errors="replace").split("\0")
+    except OSError:
+        try:
+            import psutil
+            args = psutil.Process(pid).cmdline()
+        except Exception:
+            return "browser"
+    for arg in args:
+        if arg.startswith("--type="):
+            return arg[len("--type="):]
+    return "browser"
+
+
+def process_usage(pid):
+    """(常駐メモリ MB, 累積 CPU 時間 秒)。取得できなければ None"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            times = process.cpu_times()
+            return process.memory_info().rss / (1024 * 1024), times.user + times.system
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), cpu_seconds
+
+
+def sample_tree(root_pid, seconds, interval=1.0):
+    """seconds 秒間の種類ごとの CPU 使用率（%）と常駐メモリ（MB の平均・最大）"""
+    first = {}
+    last = {}
+    rss = {}
+    samples = 0
+    started = time.monotonic()
+    while True:
+        totals = {}
+        for pid in process_tree(root_pid):
+            usage = process_usage(pid)
+            if usage is None:
+                continue
+            kind = process_kind(pid)
+            first.setdefault(pid, (kind, usage[1]))
+            last[pid] = (kind, usage[1])
+            totals[kind] = totals.get(kind, 0.0) + usage[0]
+        for kind, mb in totals.items():
+            entry = rss.setdefault(kind, [0.0, 0.0])
+            entry[0] += mb
+            entry[1] = max(entry[1], mb)
+        samples += 1
+        elapsed = time.monotonic() - started
+        if elapsed >= seconds:
+            break
+        time.sleep(min(interval, seconds - elapsed))
+
+    result = {}
+    for pid, (kind, cpu) in last.items():
+        entry = result.setdefault(kind, {"processes": 0, "cpu_percent": 0.0, "rss_mb_avg": 0.0, "rss_mb_max": 0.0})
+        entry["processes"] += 1
+        entry["cpu_percent"] += (cpu - first[pid][1]) / elapsed * 100
+    for kind, (mb_total, mb_max) in rss.items():
+        entry = result.setdefault(kind, {"processes": 0, "cpu_percent": 0.0, "rss_mb_avg": 0.0, "rss_mb_max": 0.0})
+        entry["rss_mb_avg"] = mb_total / samples
+        entry["rss_mb_max"] = mb_max
+    result["total"] = {
+        "processes": sum(entry["processes"] for entry in result.values()),
+        "cpu_percent": sum(entry["cpu_percent"] for entry in result.values()),
+        "rss_mb_avg": sum(entry["rss_mb_avg"] for entry in result.values()),
+        "rss_mb_max": sum(entry["rss_mb_max"] for entry in result.values()),
+    }
+    return result
+
+
+# --- シナリオ ---
+
+def measure_qt(video, audio_only, warmup, seconds):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    timeout = warmup + seconds + 10
+    code = PLAYER_SCRIPT % {"root": ROOT, "video": video, "audio_only": audio_only,
+                            "timeout_ms": int(timeout * 1000)}
+    process = subprocess.Popen([sys.executable, "-c", code], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        time.sleep(warmup)
+        if process.poll() is not None:
+            lines = process.stderr.read().decode(errors="replace").strip().splitlines()
+            return {"error": lines[-1] if lines else "failed"}
+        return sample_tree(process.pid, seconds)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stderr.close()
+
+
+def measure_chrome(video, audio_only, warmup, seconds):
+    try:
+        from driver_pool import (AUDIO_ONLY_SCRIPT, audio_only_driver_factory,
+                                 default_driver_factory, wait_for_first_frame)
+        driver = (audio_only_driver_factory if audio_only else default_driver_factory)()
+    except Exception as e:
+        return {"error": str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}
+    try:
+        driver.get(f"https://www.youtube.com/watch?v={video}")
+        wait_for_first_frame(driver)
+        if audio_only:
+            driver.execute_script(AUDIO_ONLY_SCRIPT)
+        time.sleep(warmup)
+        # chromedriver の子孫に Chrome の全プロセスがいる
+        return sample_tree(driver.service.process.pid, seconds)
+    except Exception as e:
+        return {"error": str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}
+    finally:
+        driver.quit()
+
+
+SCENARIOS = {"qt": measure_qt, "chrome": measure_chrome}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default="dQw4w9WgXcQ")
+    parser.add_argument("--seconds", type=float, default=20.0, help="計測する時間")
+    parser.add_argument("--warmup", type=float, default=10.0, help="再生開始から計測までの待ち時間")
+    parser.add_argument("--only", choices=sorted(SCENARIOS), action="append", help="指定したシナリオだけ測る")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or sorted(SCENARIOS):
+        results[name] = {
+            mode: SCENARIOS[name](args.video, mode == "audio_only", args.warmup, args.seconds)
+            for mode in ("normal", "audio_only")
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for name, modes in results.items():
+            print(f"[{name}]")
+            for mode, result in modes.items():
+                if "error" in result:
+                    print(f"  {mode:10s}: 計測できません ({result['error']})")
+                    continue
+                for kind, entry in sorted(result.items()):
+                    print(f"  {mode:10s} {kind:14s}: CPU {entry['cpu_percent']:6.1f} %"
+                          f"  RSS 平均 {entry['rss_mb_avg']:7.1f} MB  最大 {entry['rss_mb_max']:7.1f} MB"
+                          f"  ({entry['processes']} プロセス)")
+            normal, audio = modes["normal"].get("total"), modes["audio_only"].get("total")
+            if normal and audio:
+                print(f"  音声のみ / 通常: CPU {audio['cpu_percent'] / max(normal['cpu_percent'], 1e-9):.0%}"
+                      f"  RSS {audio['rss_mb_avg'] / max(normal['rss_mb_avg'], 1e-9):.0%}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
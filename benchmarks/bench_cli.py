@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""ヘッドレス版（pomodoro_cli.py）の起動時間とメモリ使用量を測る
+
+serve を起動してから制御ソケットが応答するまでの時間（インタプリタの起動を含む）と、
+タスクを登録して数サイクル回したあとの常駐メモリを計測し、目標値と比べる。
+比較用に、何も import しないインタプリタの起動時間も測る。
+
+    python benchmarks/bench_cli.py --repeat 5 --cycles 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pomodoro_cli  # noqa: E402
+
+CLI = os.path.join(ROOT, "pomodoro_cli.py")
+TARGET_STARTUP_MS = 100
+TARGET_RSS_MB = 30
+# 1フェーズ 0.3 秒でサイクルを回す
+PHASE_MINUTES = 0.005
+
+
+def current_rss_mb(pid):
+    """/proc から現在の常駐メモリを読む（Linux 以外では None）"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def bare_interpreter_ms():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_once(cycles, tasks):
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "pomodoro.sock")
+        command = [sys.executable, CLI, "--socket", socket_path, "serve", "--quiet",
+                   "--data-dir", os.path.join(directory, "data")]
+        for option in ("--work", "--short-break", "--long-break"):
+            command += [option, str(PHASE_MINUTES)]
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=directory, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        try:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(process.stderr.read().decode(errors="replace").strip() or "起動に失敗しました")
+                if os.path.exists(socket_path) and pomodoro_cli.is_running(socket_path):
+                    break
+                time.sleep(0.001)
+            startup_ms = (time.perf_counter() - started) * 1000
+
+            for i in range(tasks):
+                pomodoro_cli.send(socket_path, "add", [f"タスク {i}"])
+            pomodoro_cli.send(socket_path, "select", ["1"])
+            pomodoro_cli.send(socket_path, "start")
+            # 作業と休憩で1サイクル
+            time.sleep(cycles * 2 * PHASE_MINUTES * 60 + 0.2)
+            info = pomodoro_cli.send(socket_path, "info")
+            status = pomodoro_cli.send(socket_path, "status")
+            rss_mb = current_rss_mb(info["pid"])
+            pomodoro_cli.send(socket_path, "shutdown")
+            process.wait(timeout=10)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+    return {
+        "startup_ms": startup_ms,
+        "rss_mb": rss_mb if rss_mb is not None else info["max_rss_mb"],
+        "max_rss_mb": info["max_rss_mb"],
+        "pomodoros": status["pomodoro_count"],
+        "transitions": info["transitions"],
+        "heavy_modules": info["heavy_modules"],
+    }
+
+
+def measure(repeat=5, cycles=3, tasks=100):
+    runs = [run_once(cycles, tasks) for _ in range(repeat)]
+    startup = [run["startup_ms"] for run in runs]
+    return {
+        "interpreter_ms": statistics.median(bare_interpreter_ms() for _ in range(repeat)),
+        "startup_ms": statistics.median(startup),
+        "startup_max_ms": max(startup),
+        "rss_mb": max(run["rss_mb"] for run in runs),
+        "max_rss_mb": max(run["max_rss_mb"] or 0 for run in runs),
+        "transitions": runs[-1]["transitions"],
+        "heavy_modules": runs[-1]["heavy_modules"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cycles", type=int, default=3, help="計測前に回すサイクル数")
+    parser.add_argument("--tasks", type=int, default=100, help="登録するタスク数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat, args.cycles, args.tasks)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        def verdict(value, target):
+            return "OK" if value <= target else "目標超過"
+        print(f"インタプリタのみ: {results['interpreter_ms']:7.1f} ms")
+        print(f"起動（中央値）  : {results['startup_ms']:7.1f} ms  最大 {results['startup_max_ms']:.1f} ms"
+              f"  [{verdict(results['startup_ms'], TARGET_STARTUP_MS)} < {TARGET_STARTUP_MS} ms]")
+        print(f"常駐メモリ      : {results['rss_mb']:7.1f} MB  最大 {results['max_rss_mb']:.1f} MB"
+              f"  [{verdict(results['max_rss_mb'], TARGET_RSS_MB)} < {TARGET_RSS_MB} MB]")
+        print(f"フェーズ遷移    : {results['transitions']} 回  重いモジュール: {results['heavy_modules'] or 'なし'}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
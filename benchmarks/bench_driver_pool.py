@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""WebDriverPool のコールドスタート／ウォームスタート比較
+
+ローカルの代替ページを http.server で配信し、動画ごとにブラウザを
+起動・終了する従来の方式と、プールで使い回す方式とで最初のフレームまでの
+時間を比較する。既定では起動コストを模した FakeDriver を使い、
+--real を付けると実際の Chrome（selenium が必要）で計測する。
+
+    python benchmarks/bench_driver_pool.py --videos 10
+    python benchmarks/bench_driver_pool.py --videos 10 --real
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from driver_pool import FIRST_FRAME_SCRIPT, WebDriverPool, wait_for_first_frame  # noqa: E402
+
+
+class FakeDriver:
+    """Chrome の起動・ページ遷移コストを模した WebDriver の代役"""
+
+    def __init__(self, startup_delay=1.5, navigate_delay=0.15, first_frame_delay=0.2):
+        time.sleep(startup_delay)
+        self.navigate_delay = navigate_delay
+        self.first_frame_delay = first_frame_delay
+        self.loaded_at = None
+        self.page = None
+        self.closed = False
+
+    def get(self, url):
+        if self.closed:
+            raise RuntimeError("driver is closed")
+        with urllib.request.urlopen(url) as response:
+            self.page = response.read()
+        time.sleep(self.navigate_delay)
+        self.loaded_at = time.perf_counter()
+
+    def execute_script(self, script):
+        if self.closed:
+            raise RuntimeError("driver is closed")
+        if script == FIRST_FRAME_SCRIPT:
+            return (self.loaded_at is not None
+                    and time.perf_counter() - self.loaded_at >= self.first_frame_delay)
+        if script.strip() == "return 1;":
+            return 1
+        return 0
+
+    def quit(self):
+        self.closed = True
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_pages():
+    handler = functools.partial(QuietHandler, directory=os.path.join(HERE, "pages"))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/standin_player.html"
+
+
+def real_driver_factory():
+    from selenium import webdriver
+    from driver_pool import default_chrome_options
+    options = default_chrome_options()
+    options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+def play(driver, url):
+    started = time.perf_counter()
+    driver.get(url)
+    return wait_for_first_frame(driver, timeout=20, poll=0.01, since=started)
+
+
+def run_cold(factory, url, videos):
+    """従来方式: 動画ごとにブラウザを起動して終了する"""
+    timings = []
+    for _ in range(videos):
+        started = time.perf_counter()
+        driver = factory()
+        try:
+            driver.get(url)
+            wait_for_first_frame(driver, timeout=20, poll=0.01)
+            timings.append(time.perf_counter() - started)
+        finally:
+            driver.quit()
+    return timings
+
+
+def run_pooled(factory, url, videos):
+    pool = WebDriverPool(factory=factory, size=1)
+    timings = []
+    try:
+        for _ in range(videos):
+            started = time.perf_counter()
+            with pool.session() as pooled:
+                play(pooled.driver, url)
+            timings.append(time.perf_counter() - started)
+    finally:
+        pool.close()
+    return timings, pool.stats
+
+
+def summarize(timings):
+    return {
+        "first_ms": timings[0] * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "median_after_first_ms": statistics.median(timings[1:]) * 1000 if len(timings) > 1 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=10)
+    parser.add_argument("--real", action="store_true", help="実際の Chrome を使う")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    server, url = serve_pages()
+    factory = real_driver_factory if args.real else FakeDriver
+    try:
+        cold = run_cold(factory, url, args.videos)
+        pooled, pool_stats = run_pooled(factory, url, args.videos)
+    finally:
+        server.shutdown()
+
+    results = {"cold": summarize(cold), "pooled": summarize(pooled), "pool_stats": pool_stats}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ("cold", "pooled"):
+            r = results[name]
+            print(f"{name:>7}: 1本目 {r['first_ms']:8.1f} ms / 中央値 {r['median_ms']:8.1f} ms")
+        print(f"pool: {pool_stats}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""HistoryStore の書き込み・検索・エクスポートのベンチマーク
+
+1年分相当の記録（既定 40,000 件）を一時ファイルに書き込み、
+日付・タスクでの検索とストリーミングエクスポートにかかる時間を測る。
+
+    python benchmarks/bench_history.py --rows 40000
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore  # noqa: E402
+
+TASKS = [f"task-{i}" for i in range(50)]
+
+
+def timed(func, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=40000)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    start = time.time() - 365 * 24 * 3600
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"))
+        started = time.perf_counter()
+        record_calls = 0.0
+        for i in range(args.rows):
+            begin = start + i * (365 * 24 * 3600 / args.rows)
+            phase = "work" if i % 2 == 0 else "short_break"
+            t0 = time.perf_counter()
+            store.record(phase, begin, begin + (1500 if phase == "work" else 300),
+                         task=rng.choice(TASKS), video_id="dQw4w9WgXcQ")
+            record_calls += time.perf_counter() - t0
+        store.flush()
+        write_s = time.perf_counter() - started
+
+        day = datetime.date.fromtimestamp(start + 180 * 24 * 3600)
+        results = {
+            "rows": args.rows,
+            "record_call_us": record_calls / args.rows * 1e6,
+            "write_total_s": write_s,
+        }
+        results["query_day_ms"], rows = timed(lambda: store.query_day(day))
+        results["query_day_rows"] = len(rows)
+        results["query_task_ms"], rows = timed(lambda: store.query_task("task-7"))
+        results["query_task_rows"] = len(rows)
+        results["query_task_month_ms"], _ = timed(
+            lambda: store.query_task("task-7", day, day + datetime.timedelta(days=30)))
+        results["daily_totals_year_ms"], _ = timed(
+            lambda: store.daily_totals(day - datetime.timedelta(days=180), day + datetime.timedelta(days=185)))
+        t0 = time.perf_counter()
+        exported = store.export_jsonl(io.StringIO())
+        results["export_jsonl_ms"] = (time.perf_counter() - t0) * 1000
+        results["exported_rows"] = exported
+        store.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>22}: {value:,.3f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
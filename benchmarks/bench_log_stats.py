@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""統計画面を開くコスト（log_stats.py）がログの大きさに依存しないことを確かめる
+
+約 1 KB のログと、--size-mb とその2倍の大きさのログを作り、それぞれ
+
+- catch_up: 要約がない状態からログ全体を読む時間（初回だけ）
+- open: 要約がある状態で、数十行の追記分を読んで直近の集計を取り出す時間
+
+を測る。open のコストは要約の大きさ（記録のある日数）で決まり、保持日数
+（400日）分の記録がたまった後はログがいくら大きくなっても変わらない。
+--size-mb の既定値（20 MB）で約2年分になる。
+
+    python benchmarks/bench_log_stats.py --size-mb 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_stats import LogStats  # noqa: E402
+
+# 1ポモドーロ分のログ（実際のアプリが出す行と、集計に関係のない行）
+CYCLE = (
+    (0, "タイマーが開始されました"),
+    (30, "動画が再生されました: https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    (60, "画面更新: 起床 1回/分, 再描画 60回/分"),
+    (600, "タイマーが一時停止されました"),
+    (660, "タイマーが再開されました"),
+    (1560, "タイマードリフト: 平均 0.4ms"),
+    (1560, "フェーズが終了しました: work"),
+    (1561, "タイマーが開始されました"),
+    (1861, "フェーズが終了しました: short_break"),
+)
+CYCLE_SECONDS = 1862
+
+
+def log_lines(started: float, cycles: int):
+    for i in range(cycles):
+        base = started + i * CYCLE_SECONDS
+        for offset, message in CYCLE:
+            stamp = base + offset
+            asctime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stamp)) + f",{int(stamp * 1000) % 1000:03d}"
+            yield f"{asctime} - INFO - {message}\n"
+
+
+def write_log(path: str, size: int) -> int:
+    """size バイト程度のログを、現在から遡った時刻で書く"""
+    line_size = sum(len(line.encode("utf-8")) for line in log_lines(0, 1))
+    cycles = max(1, size // line_size)
+    with open(path, "w", encoding="utf-8") as f:
+        for line in log_lines(time.time() - cycles * CYCLE_SECONDS - 3600, cycles):
+            f.write(line)
+    return os.path.getsize(path)
+
+
+def measure(size: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "pomodoro.log")
+        summary_path = os.path.join(directory, "log_stats.json")
+        log_bytes = write_log(log_path, size)
+
+        started = time.perf_counter()
+        LogStats(log_path, summary_path).update()
+        catch_up_ms = (time.perf_counter() - started) * 1000
+
+        open_ms = []
+        for _ in range(repeat):
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.writelines(log_lines(time.time() - CYCLE_SECONDS, 2))
+            started = time.perf_counter()
+            stats = LogStats(log_path, summary_path)
+            stats.update()
+            stats.recent_days(7)
+            stats.recent_weeks(4)
+            open_ms.append((time.perf_counter() - started) * 1000)
+        return {
+            "log_bytes": log_bytes,
+            "summary_bytes": os.path.getsize(summary_path),
+            "catch_up_ms": catch_up_ms,
+            "open_ms": statistics.median(open_ms),
+            "open_max_ms": max(open_ms),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0, help="大きいログの大きさ")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {
+        "small": measure(1024, args.repeat),
+        "large": measure(int(args.size_mb * 1024 * 1024), args.repeat),
+        "large_x2": measure(int(args.size_mb * 2 * 1024 * 1024), args.repeat),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print(f"{name:8s}: ログ {result['log_bytes'] / 1e6:9.3f} MB  要約 {result['summary_bytes'] / 1e3:6.1f} KB"
+                  f"  初回 {result['catch_up_ms']:9.1f} ms  画面を開く {result['open_ms']:6.2f} ms"
+                  f"（最大 {result['open_max_ms']:.2f} ms）")
+        ratio = results["large_x2"]["open_ms"] / max(results["large"]["open_ms"], 1e-9)
+        print(f"ログが2倍になったときの画面を開くコストの比: {ratio:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
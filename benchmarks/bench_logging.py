@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""GUI スレッドでの logging 呼び出しにかかる時間を、同期書き込みとキュー経由で比べる
+
+- sync_file: これまでの logging.basicConfig(filename=...)（呼び出し元でファイルに書く）
+- queue_text / queue_json: log_pipeline.setup_logging（キューに積むだけ。書き出しは別スレッド）
+- rate_limited: 件数制限の対象のロガーに大量に書いたとき（ほとんどが捨てられる経路）
+
+1回ずつ呼び出し時間を測って中央値・99パーセンタイル・最大を出し、最後に
+書き出しを待ってから、ファイルに残った行数が呼び出した回数と合うかを確かめる。
+
+    python benchmarks/bench_logging.py --number 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET_P50_US = 5.0
+
+SCRIPT = """
+import json, logging, os, sys, time
+sys.path.insert(0, %(root)r)
+path = %(path)r
+scenario = %(scenario)r
+number = %(number)d
+logger = logging.getLogger("chatty" if scenario == "rate_limited" else "")
+if scenario == "sync_file":
+    logging.basicConfig(filename=path, level=logging.INFO,
+                        format='%%(asctime)s - %%(levelname)s - %%(message)s')
+    pipeline = None
+else:
+    from log_pipeline import setup_logging
+    pipeline = setup_logging(filename=path, log_format="json" if scenario == "queue_json" else "text",
+                             max_bytes=1 << 40, rate_limits={"chatty": (100.0, 100)}, trim_records=True)
+
+timings = []
+counter = time.perf_counter_ns
+started = time.perf_counter()
+for i in range(number):
+    before = counter()
+    logger.info(f"動画の状態: {i} 再生中")
+    timings.append(counter() - before)
+elapsed = time.perf_counter() - started
+drain_started = time.perf_counter()
+if pipeline is not None:
+    pipeline.stop()
+else:
+    logging.shutdown()
+drain = time.perf_counter() - drain_started
+with open(path, "rb") as f:
+    lines = sum(1 for _ in f)
+timings.sort()
+print(json.dumps({
+    "p50_us": timings[len(timings) // 2] / 1000,
+    "p99_us": timings[int(len(timings) * 0.99)] / 1000,
+    "max_us": timings[-1] / 1000,
+    "calls_per_sec": number / elapsed,
+    "drain_ms": drain * 1000,
+    "lines": lines,
+    "dropped": pipeline.rate_filter.dropped if pipeline is not None and pipeline.rate_filter else 0,
+}))
+"""
+
+SCENARIOS = ("sync_file", "queue_text", "queue_json", "rate_limited")
+
+
+def run(scenario, number):
+    with tempfile.TemporaryDirectory() as directory:
+        code = SCRIPT % {"root": ROOT, "path": os.path.join(directory, "pomodoro.log"),
+                         "scenario": scenario, "number": number}
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {scenario: run(scenario, args.number) for scenario in SCENARIOS}
+    failed = False
+    for scenario, result in results.items():
+        expected = args.number - result["dropped"]
+        # 件数制限では、省略した件数は次に通した行にまとめて書かれる
+        result["complete"] = result["lines"] == expected
+        failed |= not result["complete"]
+        if scenario != "sync_file":
+            failed |= result["p50_us"] > TARGET_P50_US
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for scenario, result in results.items():
+            print(f"{scenario:12s}: 中央値 {result['p50_us']:6.2f} µs  p99 {result['p99_us']:7.2f} µs"
+                  f"  最大 {result['max_us']:9.1f} µs  書き出し待ち {result['drain_ms']:7.1f} ms"
+                  f"  行数 {result['lines']}{'' if result['complete'] else '（欠落あり）'}"
+                  + (f"  省略 {result['dropped']}" if result["dropped"] else ""))
+        print("OK" if not failed else f"NG: 中央値が {TARGET_P50_US} µs を超えたか、行が欠落しました")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Notion 同期のアウトボックス消化ベンチマーク
+
+ローカルのスタブサーバー（notion_stub_server.py）に向けて、溜まった
+アウトボックスを送り切るまでの時間と 429 の発生回数を計測する。
+notion_client が必要。
+
+    python benchmarks/bench_notion_sync.py --items 500 --rate 20 --server-rate 25
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from notion_stub_server import start_stub  # noqa: E402
+from notion_sync import NotionSync  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=20.0, help="クライアント側の送信レート（件/秒）")
+    parser.add_argument("--server-rate", type=float, default=25.0, help="スタブが 429 を返し始めるレート")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    server, state, base_url = start_stub(rate=args.server_rate, latency=args.latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        sync = NotionSync("secret_dummy", "database", path=os.path.join(tmp, "outbox.db"),
+                          base_url=base_url, rate=args.rate)
+        now = time.time()
+        t0 = time.perf_counter()
+        sync.enqueue_many([("phase", {"phase": "work", "started_at": now - 1500, "ended_at": now,
+                                      "task": f"task {i}", "video_id": ""}) for i in range(args.items)])
+        enqueue_ms = (time.perf_counter() - t0) * 1000
+        started = time.perf_counter()
+        drained = sync.drain(timeout=args.items / args.rate * 3 + 30)
+        elapsed = time.perf_counter() - started
+        counts = sync.counts()
+        sync.close()
+    server.shutdown()
+
+    results = {
+        "items": args.items,
+        "drained": drained,
+        "enqueue_ms": enqueue_ms,
+        "drain_s": elapsed,
+        "pages_per_sec": state.created / elapsed if elapsed else 0.0,
+        "server_created": state.created,
+        "server_rate_limited": state.rate_limited,
+        "client_stats": sync.stats,
+        "outbox": counts,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>20}: {value}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""SessionScheduler の負荷ベンチマーク
+
+短いフェーズ長のセッションを大量に走らせ、締め切りから
+フェーズ遷移処理までの遅延のパーセンタイルを表示する。
+
+    python benchmarks/bench_scheduler.py --sessions 1000 10000 50000 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler_service import SessionScheduler  # noqa: E402
+
+
+async def run_load(count: int, duration: float, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    scheduler = SessionScheduler(asyncio.get_running_loop())
+    started = time.perf_counter()
+    for i in range(count):
+        # 締め切りが一斉に重ならないよう、フェーズ長をばらつかせる
+        session = scheduler.create(
+            session_id=str(i),
+            work=rng.uniform(0.2, 1.0),
+            short_break=rng.uniform(0.1, 0.5),
+            long_break=rng.uniform(0.3, 0.8),
+        )
+        scheduler.start(session.id)
+    setup_time = time.perf_counter() - started
+    await asyncio.sleep(duration)
+    stats = scheduler.stats()
+    stats["setup_ms"] = setup_time * 1000
+    stats["transitions_per_sec"] = stats["transitions"] / duration
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for count in args.sessions:
+        results[count] = asyncio.run(run_load(count, args.duration))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+    print(f"{'sessions':>9} {'transitions/s':>14} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+    for count, stats in results.items():
+        lat = stats["latency_ms"]
+        print(f"{count:>9} {stats['transitions_per_sec']:>14.0f} {lat['p50']:>8.2f} {lat['p90']:>8.2f} "
+              f"{lat['p99']:>8.2f} {lat['p99.9']:>9.2f} {lat['max']:>8.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""起動時間のベンチマーク（CI での推移確認用）
+
+新しいインタプリタを毎回起動して、次の時間を計測する。
+
+- import: pomodoro_tube / pomodoro.tube.py の import にかかる時間
+- first_window: QApplication 作成から最初のウィンドウ表示まで（offscreen）
+
+あわせて、起動直後に読み込まれてしまった重いモジュールを報告する。
+
+    python benchmarks/bench_startup.py --repeat 5 --json --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["fastapi", "uvicorn", "notion_client", "requests", "pytz", "aiofiles", "selenium"]
+
+QT_IMPORT = """
+import json, sys, time
+started = time.perf_counter()
+import pomodoro_tube
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %(heavy)r if m in sys.modules]}))
+"""
+
+TK_IMPORT = """
+import importlib.util, json, sys, time
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("pomodoro_tk", "pomodoro.tube.py")
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %(heavy)r if m in sys.modules]}))
+"""
+
+QT_FIRST_WINDOW = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5 import QtWidgets
+import pomodoro_tube
+qt_app = QtWidgets.QApplication(sys.argv)
+window = pomodoro_tube.PomodoroTimer()
+window.show()
+qt_app.processEvents()
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %(heavy)r if m in sys.modules]}))
+window.close()
+"""
+
+SCENARIOS = {
+    "qt_import": QT_IMPORT,
+    "tk_import": TK_IMPORT,
+    "qt_first_window": QT_FIRST_WINDOW,
+}
+
+
+def run_once(code, cwd):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run([sys.executable, "-c", code % {"heavy": HEAVY_MODULES}],
+                            cwd=cwd, env=env, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(name, repeat, cwd):
+    try:
+        runs = [run_once(SCENARIOS[name], cwd) for _ in range(repeat)]
+    except Exception as e:
+        return {"error": str(e)}
+    times = [run["seconds"] * 1000 for run in runs]
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "heavy_modules_loaded": runs[-1]["loaded"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル")
+    args = parser.parse_args(argv)
+
+    results = {name: measure(name, args.repeat, ROOT) for name in args.scenario}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, r in results.items():
+            if "error" in r:
+                print(f"{name:>16}: 計測できません ({r['error']})")
+            else:
+                print(f"{name:>16}: 中央値 {r['median_ms']:8.1f} ms  重いモジュール: {r['heavy_modules_loaded'] or 'なし'}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
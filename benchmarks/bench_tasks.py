@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""TaskStore の一括追加・検索・読み込みのベンチマーク
+
+既定では 50,000 件のタスクを一時ファイルに取り込み、1文字ずつ入力したときの
+検索時間（前回結果の絞り込み）と、再起動時の読み込み時間を測る。
+
+    python benchmarks/bench_tasks.py --tasks 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import TaskStore  # noqa: E402
+
+WORDS = ["資料", "作成", "レビュー", "メール", "返信", "設計", "実装", "テスト", "会議", "準備",
+         "report", "review", "deploy", "refactor", "invoice", "draft", "release", "notes"]
+
+
+def make_titles(count, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) + f" #{i}"
+            for i in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--query", default="refactor", help="1文字ずつ入力する検索語")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    titles = make_titles(args.tasks)
+    results = {"tasks": args.tasks}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tasks.db")
+        store = TaskStore(path)
+
+        t0 = time.perf_counter()
+        store.add_many((title, f"notion-{i}") for i, title in enumerate(titles))
+        results["add_many_ms"] = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        store.flush()
+        results["persist_ms"] = (time.perf_counter() - t0) * 1000
+
+        keystrokes = []
+        for length in range(1, len(args.query) + 1):
+            t0 = time.perf_counter()
+            matched = store.search(args.query[:length])
+            keystrokes.append({"query": args.query[:length], "ms": (time.perf_counter() - t0) * 1000,
+                               "matches": len(matched)})
+        results["incremental_search"] = keystrokes
+        results["incremental_search_max_ms"] = max(k["ms"] for k in keystrokes)
+
+        store.search("")
+        t0 = time.perf_counter()
+        matched = store.search("ビュー")
+        results["substring_search_ms"] = (time.perf_counter() - t0) * 1000
+        results["substring_matches"] = len(matched)
+
+        t0 = time.perf_counter()
+        store.add("追加したタスク")
+        results["single_add_ms"] = (time.perf_counter() - t0) * 1000
+        store.close()
+
+        t0 = time.perf_counter()
+        reopened = TaskStore(path)
+        results["reopen_ms"] = (time.perf_counter() - t0) * 1000
+        results["reopened_tasks"] = len(reopened)
+        duplicates = reopened.add_many((title, f"notion-{i}") for i, title in enumerate(titles[:1000]))
+        results["reimport_duplicates_added"] = len(duplicates)
+        reopened.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for key, value in results.items():
+            if key == "incremental_search":
+                for k in value:
+                    print(f"{'search ' + repr(k['query']):>28}: {k['ms']:8.2f} ms ({k['matches']} 件)")
+            elif isinstance(value, float):
+                print(f"{key:>28}: {value:8.2f} ms")
+            else:
+                print(f"{key:>28}: {value}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""永続プロファイルのディスクキャッシュによる「再生開始まで」の短縮を測る
+
+同じ保存先を使ってプレイヤーを別プロセスで2回起動し（1回目はキャッシュなし）、
+読み込み要求から再生開始（PLAYING）までの時間とキャッシュの統計を比べる。
+--off-the-record を付けると、比較用に既定のオフ・ザ・レコードプロファイルでも測る。
+ネットワークと QtWebEngine が必要（QT_QPA_PLATFORM=offscreen で動く）。
+
+    python benchmarks/bench_webprofile.py --video dQw4w9WgXcQ --launches 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAUNCH_SCRIPT = """
+import json, sys
+sys.path.insert(0, %(root)r)
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from youtube_player import PlayerController
+from web_profile import WebProfile
+
+app = QtWidgets.QApplication(sys.argv)
+view = QWebEngineView()
+profile = None
+if %(storage)r:
+    profile = WebProfile(storage_path=%(storage)r)
+player = PlayerController(view, profile=profile.profile if profile else None)
+result = {}
+
+def on_latency(mode, latency_ms):
+    result["load_to_play_ms"] = latency_ms
+    if profile is None:
+        app.quit()
+        return
+    def on_stats(stats):
+        result["cache"] = stats
+        app.quit()
+    profile.collect(player.page, on_stats)
+
+player.loadLatencyMeasured.connect(on_latency)
+view.show()
+player.load(%(video)r)
+QtCore.QTimer.singleShot(%(timeout_ms)d, app.quit)
+app.exec_()
+print(json.dumps(result))
+"""
+
+
+def launch(video, storage, timeout):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    code = LAUNCH_SCRIPT % {"root": ROOT, "video": video, "storage": storage,
+                            "timeout_ms": int(timeout * 1000)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                            text=True, timeout=timeout + 30)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1] or "{}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default="dQw4w9WgXcQ")
+    parser.add_argument("--launches", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--off-the-record", action="store_true", help="既定プロファイルでも測る")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {"persistent": []}
+    with tempfile.TemporaryDirectory() as storage:
+        for _ in range(args.launches):
+            results["persistent"].append(launch(args.video, storage, args.timeout))
+    if args.off_the_record:
+        results["off_the_record"] = [launch(args.video, "", args.timeout) for _ in range(args.launches)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, runs in results.items():
+            for i, run in enumerate(runs, 1):
+                if "error" in run:
+                    print(f"{name} #{i}: 計測できません ({run['error']})")
+                    continue
+                cache = run.get("cache", {})
+                hit_rate = cache.get("hit_rate")
+                print(f"{name} #{i}: 再生開始まで {run.get('load_to_play_ms', float('nan')):8.0f} ms"
+                      + (f"  キャッシュ {cache['cache_bytes'] / 1e6:6.1f} MB"
+                         f"  ヒット率 {'-' if hit_rate is None else f'{hit_rate:.0%}'}" if cache else ""))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""YouTube 動画ID抽出の正しさ確認とマイクロベンチマーク
+
+youtube_id_corpus.json の全ケースを youtube_id.extract_video_id で検証し、
+置き換え前の2つの実装（Qt版の4パターン逐次検索、Tk版の都度組み立て正規表現）と
+スループットを比較する。
+
+    python benchmarks/bench_youtube_id.py --repeat 200
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import youtube_id  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "youtube_id_corpus.json")
+
+
+def legacy_qt_extract(url):
+    """置き換え前の YouTubeLoader.extract_video_id"""
+    patterns = [
+        r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
+        r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
+        r'(?:embed\/)([0-9A-Za-z_-]{11})',
+        r'^([0-9A-Za-z_-]{11})$'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def legacy_tk_extract(url):
+    """置き換え前の PomodoroApp.extract_video_id"""
+    youtube_regex = (
+        r'(https?://)?(www\.)?'
+        r'(youtube|youtu|youtube-nocookie)\.(com|be)/'
+        r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})'
+    )
+    match = re.match(youtube_regex, url)
+    return match.group(6) if match else None
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [(url, expected) for url, expected in json.load(f)]
+
+
+def check(corpus, extract):
+    return [(url, expected, extract(url.strip()))
+            for url, expected in corpus if extract(url.strip()) != expected]
+
+
+def throughput(extract, urls, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            extract(url)
+    elapsed = time.perf_counter() - started
+    return len(urls) * repeat / elapsed
+
+
+def unified_cold(url):
+    youtube_id.extract_video_id.cache_clear()
+    return youtube_id.extract_video_id(url)
+
+
+def bulk_throughput(urls, repeat):
+    youtube_id.extract_video_id.cache_clear()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _ in youtube_id.extract_many(urls):
+            pass
+    return len(urls) * repeat / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus()
+    failures = check(corpus, youtube_id.extract_video_id)
+    urls = [url.strip() for url, _ in corpus]
+
+    results = {
+        "corpus_size": len(corpus),
+        "unified_failures": len(failures),
+        "legacy_qt_disagreements": len(check(corpus, legacy_qt_extract)),
+        "legacy_tk_disagreements": len(check(corpus, legacy_tk_extract)),
+        "urls_per_sec": {
+            "legacy_qt": throughput(legacy_qt_extract, urls, args.repeat),
+            "legacy_tk": throughput(legacy_tk_extract, urls, args.repeat),
+            "unified_uncached": throughput(unified_cold, urls, args.repeat),
+            "unified_cached": throughput(youtube_id.extract_video_id, urls, args.repeat),
+            "extract_many": bulk_throughput(urls, args.repeat),
+        },
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for url, expected, actual in failures:
+            print(f"NG: {url!r}: expected {expected!r}, got {actual!r}")
+        print(f"コーパス {results['corpus_size']} 件 / 失敗 {results['unified_failures']} 件 "
+              f"(旧Qt版の不一致 {results['legacy_qt_disagreements']} 件, "
+              f"旧Tk版の不一致 {results['legacy_tk_disagreements']} 件)")
+        for name, rate in results["urls_per_sec"].items():
+            print(f"{name:>18}: {rate:>12,.0f} URL/s")
+    if failures:
+        sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""タイマー状態ファイル（state_snapshot.py）の書き込み途中でプロセスを落とす故障注入
+
+- random: 子プロセスが状態を書き続けている途中の任意の時点で kill する
+- torn: 書き込みの途中（seq を奇数にした後・CRC を書く前など）で子プロセスを終了させる
+
+どちらも、再度開いたときに壊れたレコードを読まず、最後に書き終えたレコード
+（torn では直前に書き終えたレコードそのもの）が読めることを確かめる。
+あわせて1回の書き込み・読み込みにかかる時間も測る。
+
+    python benchmarks/fault_inject_snapshot.py --rounds 200
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import state_snapshot  # noqa: E402
+from state_snapshot import StateSnapshot, TimerSnapshot  # noqa: E402
+
+# i 番目のレコードの各フィールドは i から決まる（破損していれば一致しない）
+WRITER = """
+import os, sys
+sys.path.insert(0, %(root)r)
+from state_snapshot import StateSnapshot, TimerSnapshot
+
+def record(i):
+    return TimerSnapshot(phase="work", is_active=True, pomodoro_count=i, duration=i * 1.5,
+                         deadline=i * 2.0, frozen_remaining=i * 3.0, phase_started_at=i * 4.0,
+                         written_at=i * 5.0, video_id=str(i))
+
+snapshot = StateSnapshot(%(path)r)
+start = (snapshot.read() or record(0)).pomodoro_count + 1
+print("ready", flush=True)
+i = start
+while True:
+    snapshot.write(record(i))
+    i += 1
+"""
+
+TORN_WRITER = """
+import os, struct, sys, zlib
+sys.path.insert(0, %(root)r)
+import state_snapshot as ss
+from state_snapshot import StateSnapshot, TimerSnapshot
+
+def record(i):
+    return TimerSnapshot(phase="work", is_active=True, pomodoro_count=i, duration=i * 1.5,
+                         deadline=i * 2.0, frozen_remaining=i * 3.0, phase_started_at=i * 4.0,
+                         written_at=i * 5.0, video_id=str(i))
+
+snapshot = StateSnapshot(%(path)r)
+for i in range(1, %(good)d + 1):
+    snapshot.write(record(i))
+# 次の書き込みを途中まで行ってから落ちる
+seq = snapshot._seq + 2
+offset = ss._HEADER.size + (seq // 2 %% 2) * ss._SLOT_SIZE
+mm = snapshot._mm
+garbage = os.urandom(ss._PAYLOAD.size)
+stage = %(stage)r
+if stage != "no_marker":
+    ss._SEQ.pack_into(mm, offset, seq - 1)
+cut = %(cut)d
+mm[offset + ss._SEQ.size:offset + ss._SEQ.size + cut] = garbage[:cut]
+if stage == "before_commit":
+    ss._CRC.pack_into(mm, offset + ss._SEQ.size + ss._PAYLOAD.size, zlib.crc32(garbage))
+os._exit(1)
+"""
+
+STAGES = ("seq_odd", "before_commit", "no_marker")
+
+
+def consistent(record: TimerSnapshot) -> bool:
+    i = record.pomodoro_count
+    return (record.duration == i * 1.5 and record.deadline == i * 2.0
+            and record.frozen_remaining == i * 3.0 and record.phase_started_at == i * 4.0
+            and record.written_at == i * 5.0 and record.video_id == str(i))
+
+
+def random_kill(rounds, max_delay_ms):
+    results = {"rounds": rounds, "recovered": 0, "empty": 0, "corrupt": 0, "last_count": 0}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "timer_state.bin")
+        for _ in range(rounds):
+            process = subprocess.Popen([sys.executable, "-c", WRITER % {"root": ROOT, "path": path}],
+                                       stdout=subprocess.PIPE)
+            process.stdout.readline()
+            time.sleep(random.uniform(0, max_delay_ms) / 1000)
+            process.kill()
+            process.wait()
+            process.stdout.close()
+            snapshot = StateSnapshot(path)
+            record = snapshot.read()
+            snapshot.close()
+            if record is None:
+                results["empty"] += 1
+            elif consistent(record):
+                results["recovered"] += 1
+                results["last_count"] = record.pomodoro_count
+            else:
+                results["corrupt"] += 1
+    return results
+
+
+def torn_writes(rounds):
+    results = {"rounds": 0, "recovered": 0, "wrong_record": 0, "corrupt": 0}
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(rounds):
+            stage = STAGES[n % len(STAGES)]
+            good = random.randint(1, 5)
+            cut = random.randint(1, state_snapshot._PAYLOAD.size)
+            path = os.path.join(directory, f"timer_state_{n}.bin")
+            code = TORN_WRITER % {"root": ROOT, "path": path, "good": good, "stage": stage, "cut": cut}
+            subprocess.run([sys.executable, "-c", code])
+            snapshot = StateSnapshot(path)
+            record = snapshot.read()
+            snapshot.close()
+            results["rounds"] += 1
+            if record is None or not consistent(record):
+                results["corrupt"] += 1
+            elif record.pomodoro_count != good:
+                results["wrong_record"] += 1
+            else:
+                results["recovered"] += 1
+    return results
+
+
+def write_cost(number):
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = StateSnapshot(os.path.join(directory, "timer_state.bin"))
+        record = TimerSnapshot(is_active=True, pomodoro_count=1, deadline=time.time() + 1500)
+        started = time.perf_counter()
+        for _ in range(number):
+            snapshot.write(record)
+        write_ns = (time.perf_counter() - started) / number * 1e9
+        started = time.perf_counter()
+        for _ in range(number):
+            snapshot.read()
+        read_ns = (time.perf_counter() - started) / number * 1e9
+        snapshot.close()
+    return {"write_ns": write_ns, "read_ns": read_ns}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100, help="各モードの試行回数")
+    parser.add_argument("--max-delay-ms", type=float, default=30.0, help="random で kill するまでの最大待ち時間")
+    parser.add_argument("--number", type=int, default=100000, help="書き込み時間の計測回数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    results = {
+        "random": random_kill(args.rounds, args.max_delay_ms),
+        "torn": torn_writes(args.rounds),
+        "cost": write_cost(args.number),
+    }
+    failed = results["random"]["corrupt"] + results["torn"]["corrupt"] + results["torn"]["wrong_record"]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        r, t, c = results["random"], results["torn"], results["cost"]
+        print(f"random: {r['recovered']}/{r['rounds']} 回復  破損 {r['corrupt']}  空 {r['empty']}"
+              f"  （最後に読めた記録 #{r['last_count']}）")
+        print(f"torn  : {t['recovered']}/{t['rounds']} 回復  破損 {t['corrupt']}  別の記録 {t['wrong_record']}")
+        print(f"書き込み {c['write_ns']:.0f} ns/回  読み込み {c['read_ns']:.0f} ns/回")
+        print("OK" if not failed else "NG: 壊れたレコードを読みました")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Notion API の代わりに使うローカル HTTP サーバー
+
+POST /v1/pages だけを受け付け、受け取ったページ数を数える。
+--rate を超える頻度で呼ばれると Notion と同じく 429 と Retry-After を返す。
+
+    python benchmarks/notion_stub_server.py --port 8765 --rate 3
+"""
+import argparse
+import http.server
+import json
+import threading
+import time
+import uuid
+
+
+class StubState:
+    def __init__(self, rate: float, latency: float = 0.0):
+        self.rate = rate
+        self.latency = latency
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.created = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.created += 1
+                return True
+            self.rate_limited += 1
+            return False
+
+
+def make_handler(state: StubState):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            if self.path.rstrip("/") != "/v1/pages":
+                self._reply(404, {"object": "error", "status": 404, "code": "object_not_found",
+                                  "message": "not found"})
+                return
+            if state.latency:
+                time.sleep(state.latency)
+            if not state.allow():
+                self._reply(429, {"object": "error", "status": 429, "code": "rate_limited",
+                                  "message": "rate limited"}, {"Retry-After": "1"})
+                return
+            self._reply(200, {"object": "page", "id": str(uuid.uuid4())})
+
+    return Handler
+
+
+def start_stub(port: int = 0, rate: float = 3.0, latency: float = 0.0):
+    """サーバーを別スレッドで起動し、(server, state, base_url) を返す"""
+    state = StubState(rate, latency)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="1リクエストあたりの応答遅延（秒）")
+    args = parser.parse_args(argv)
+    server, state, base_url = start_stub(args.port, args.rate, args.latency)
+    print(f"Notion スタブサーバー: {base_url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"created={state.created} rate_limited={state.rate_limited}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
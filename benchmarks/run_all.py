@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""ディスプレイのない Linux でも動く総合ベンチマーク（結果はコミットごとに JSON で保存）
+
+次の項目をまとめて計測する。
+
+- timer: Timer.get_time_remaining / DeadlineTimer.display_seconds / PhaseCycle.advance /
+  仮想時間で1000ポモドーロを早送りする時間（simulation.py）
+- youtube_id: 両アプリの extract_video_id（置き換え前の実装との比較つき）
+- settings: SettingsStore の読み込み・参照・保存
+- qt: format_time と switch_mode の状態遷移（QT_QPA_PLATFORM=offscreen）
+- tk: Timer.get_time_remaining と表示文字列の生成（Xvfb 上の仮想ディスプレイ）
+- startup: bench_startup.py と同じ起動時間の計測
+- cli: bench_cli.py と同じヘッドレス版の起動時間と常駐メモリ
+
+winsound は benchmarks/shims の代用モジュールで置き換える。結果は
+benchmarks/results/<コミット>.json に保存され、--compare で比較できる。
+
+    python benchmarks/run_all.py
+    python benchmarks/run_all.py --compare HEAD~1
+    python benchmarks/run_all.py --compare-files old.json new.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SHIMS_DIR = os.path.join(BENCH_DIR, "shims")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import bench_cli  # noqa: E402
+import bench_startup  # noqa: E402
+import bench_youtube_id  # noqa: E402
+
+# 値が大きいほど良い指標の接尾辞（それ以外は小さいほど良い）
+HIGHER_IS_BETTER = ("_per_sec",)
+
+GROUPS = ("timer", "youtube_id", "settings", "qt", "tk", "startup", "cli")
+
+
+def per_call_ns(func, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number * 1e9
+
+
+def headless_env():
+    """サブプロセス用の環境変数（offscreen の Qt と winsound の代用）"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    paths = [ROOT]
+    if sys.platform != "win32":
+        paths.append(SHIMS_DIR)
+    env["PYTHONPATH"] = os.pathsep.join(paths + [env.get("PYTHONPATH", "")])
+    return env
+
+
+@contextlib.contextmanager
+def virtual_display(env):
+    """DISPLAY がなければ Xvfb を起動する。使えなければ None を返す"""
+    if env.get("DISPLAY") or sys.platform == "win32":
+        yield env
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield None
+        return
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen([xvfb, display, "-screen", "0", "1024x768x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(0.5)
+        yield dict(env, DISPLAY=display)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_script(code, env, number):
+    with tempfile.TemporaryDirectory() as cwd:
+        # 設定・履歴ファイルは一時ディレクトリに作らせる
+        result = subprocess.run([sys.executable, "-c", code % {"root": ROOT, "number": number}],
+                                cwd=cwd, env=env, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# --- プロセス内で計測する項目 ---
+
+def bench_timer(number):
+    from simulation import Simulation
+    from timer_core import DeadlineTimer, PhaseCycle
+
+    timer = DeadlineTimer(25 * 60)
+    timer.start()
+    cycle = PhaseCycle()
+    started = time.perf_counter()
+    Simulation().run_cycles(1000)
+    simulate_ms = (time.perf_counter() - started) * 1000
+    return {
+        "remaining_ns": per_call_ns(timer.remaining, number),
+        "display_seconds_ns": per_call_ns(timer.display_seconds, number),
+        "phase_cycle_advance_ns": per_call_ns(cycle.advance, number),
+        "simulate_1000_cycles_ms": simulate_ms,
+    }
+
+
+def bench_video_ids(number):
+    import youtube_id
+
+    urls = [url.strip() for url, _ in bench_youtube_id.load_corpus()]
+    repeat = max(1, number // len(urls))
+    results = {
+        "corpus_failures": len(bench_youtube_id.check(bench_youtube_id.load_corpus(),
+                                                      youtube_id.extract_video_id)),
+    }
+    for name, extract in (("legacy_qt", bench_youtube_id.legacy_qt_extract),
+                          ("legacy_tk", bench_youtube_id.legacy_tk_extract),
+                          ("unified_uncached", bench_youtube_id.unified_cold),
+                          ("unified_cached", youtube_id.extract_video_id)):
+        results[f"{name}_per_sec"] = bench_youtube_id.throughput(extract, urls, repeat)
+    return results
+
+
+def bench_settings(number):
+    from settings_store import SettingsStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "settings.json")
+        SettingsStore(path).close()
+        started = time.perf_counter()
+        store = SettingsStore(path)
+        load_ms = (time.perf_counter() - started) * 1000
+        get_ns = per_call_ns(lambda: store.get("notion_token"), number)
+        rounds = 50
+        started = time.perf_counter()
+        for i in range(rounds):
+            store.set("completed_pomodoros", i + 1)
+            store.flush()
+        save_ms = (time.perf_counter() - started) / rounds * 1000
+        store.close()
+    return {"load_ms": load_ms, "get_ns": get_ns, "save_ms": save_ms}
+
+
+# --- サブプロセスで計測する項目 ---
+
+QT_SCRIPT = """
+import json, os, sys, time
+sys.path.insert(0, %(root)r)
+from PyQt5 import QtWidgets
+import pomodoro_tube
+app = QtWidgets.QApplication(sys.argv)
+window = pomodoro_tube.PomodoroTimer()
+number = %(number)d
+started = time.perf_counter()
+for i in range(number):
+    window.format_time(i %% 3600)
+format_ns = (time.perf_counter() - started) / number * 1e9
+transitions = max(1, number // 100)
+started = time.perf_counter()
+for _ in range(transitions):
+    window.switch_mode()
+    window.stop_timer()
+switch_us = (time.perf_counter() - started) / transitions * 1e6
+window.close()
+app.processEvents()
+print(json.dumps({"format_time_ns": format_ns, "switch_mode_us": switch_us}))
+"""
+
+TK_SCRIPT = """
+import importlib.util, json, os, sys, time
+sys.path.insert(0, %(root)r)
+import tkinter as tk
+spec = importlib.util.spec_from_file_location("pomodoro_tk", os.path.join(%(root)r, "pomodoro.tube.py"))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+root = tk.Tk()
+root.withdraw()
+app = module.PomodoroApp(root)
+app.timer.start()
+number = %(number)d
+def per_call_ns(func):
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number * 1e9
+url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+results = {
+    "get_time_remaining_ns": per_call_ns(app.timer.get_time_remaining),
+    "render_timer_text_ns": per_call_ns(lambda: app.render_timer_text(0.0)),
+    "extract_video_id_ns": per_call_ns(lambda: app.extract_video_id(url)),
+}
+app.timer.stop()
+app.on_closing()
+root.destroy()
+print(json.dumps(results))
+"""
+
+
+def bench_qt(number):
+    return run_script(QT_SCRIPT, headless_env(), number)
+
+
+def bench_tk(number):
+    with virtual_display(headless_env()) as env:
+        if env is None:
+            raise RuntimeError("ディスプレイがありません（Xvfb をインストールしてください）")
+        return run_script(TK_SCRIPT, env, number)
+
+
+def bench_startup_group(repeat):
+    os.environ["PYTHONPATH"] = headless_env()["PYTHONPATH"]
+    results = {}
+    for name in bench_startup.SCENARIOS:
+        measured = bench_startup.measure(name, repeat, ROOT)
+        if "error" in measured:
+            # 計測できなかったシナリオは文字列で残す（比較の対象外になる）
+            results[f"{name}_error"] = measured["error"]
+        else:
+            results[f"{name}_ms"] = measured["median_ms"]
+    return results
+
+
+# --- 保存と比較 ---
+
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def current_commit():
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--untracked-files=no"):
+        commit += "-dirty"
+    return commit
+
+
+def results_path(ref):
+    if os.path.exists(ref):
+        return ref
+    commit = git("rev-parse", "--short", ref) or ref
+    return os.path.join(RESULTS_DIR, f"{commit}.json")
+
+
+def flatten(results):
+    return {f"{group}.{name}": value
+            for group, values in results["groups"].items()
+            for name, value in values.items()
+            if isinstance(value, (int, float))}
+
+
+def compare(base, current, threshold):
+    """変化率の一覧と、しきい値を超えて悪化した指標を返す"""
+    base_values, current_values = flatten(base), flatten(current)
+    rows, regressions = [], []
+    for name in sorted(set(base_values) & set(current_values)):
+        old, new = base_values[name], current_values[name]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        rows.append((name, old, new, change))
+        if worse > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_comparison(base, current, threshold):
+    rows, regressions = compare(base, current, threshold)
+    print(f"比較: {base['commit']} → {current['commit']}（しきい値 {threshold:.0%}）")
+    for name, old, new, change in rows:
+        mark = "  ▲悪化" if name in regressions else ""
+        print(f"{name:>40}: {old:>14.3f} → {new:>14.3f}  ({change:+7.1%}){mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--group", choices=GROUPS, nargs="+", default=list(GROUPS))
+    parser.add_argument("--number", type=int, default=100000, help="マイクロベンチマークの呼び出し回数")
+    parser.add_argument("--repeat", type=int, default=3, help="起動時間の計測回数")
+    parser.add_argument("--output", help="結果の保存先（既定: benchmarks/results/<コミット>.json）")
+    parser.add_argument("--compare", metavar="REF", help="比較するコミットまたは結果ファイル")
+    parser.add_argument("--compare-files", nargs=2, metavar=("BASE", "NEW"), help="保存済みの結果同士を比較する")
+    parser.add_argument("--threshold", type=float, default=0.10, help="悪化とみなす変化率")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    if args.compare_files:
+        loaded = []
+        for path in args.compare_files:
+            with open(path, encoding="utf-8") as f:
+                loaded.append(json.load(f))
+        sys.exit(1 if print_comparison(*loaded, args.threshold) else 0)
+
+    runners = {
+        "timer": lambda: bench_timer(args.number),
+        "youtube_id": lambda: bench_video_ids(args.number),
+        "settings": lambda: bench_settings(args.number),
+        "qt": lambda: bench_qt(args.number),
+        "tk": lambda: bench_tk(args.number),
+        "startup": lambda: bench_startup_group(args.repeat),
+        "cli": lambda: bench_cli.measure(args.repeat),
+    }
+    results = {
+        "commit": current_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "groups": {},
+        "errors": {},
+    }
+    for group in args.group:
+        try:
+            results["groups"][group] = runners[group]()
+        except Exception as e:
+            results["errors"][group] = str(e)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for group, values in results["groups"].items():
+            for name, value in values.items():
+                if isinstance(value, (int, float)):
+                    print(f"{group + '.' + name:>40}: {value:>14.3f}")
+                else:
+                    print(f"{group + '.' + name:>40}: {value}")
+        for group, error in results["errors"].items():
+            print(f"{group:>40}: 計測できません ({error})")
+        print(f"結果を保存しました: {output}")
+
+    if args.compare:
+        path = results_path(args.compare)
+        if not os.path.exists(path):
+            print(f"比較対象の結果がありません: {path}")
+            sys.exit(2)
+        with open(path, encoding="utf-8") as f:
+            base = json.load(f)
+        if print_comparison(base, results, args.threshold):
+            sys.exit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Windows 以外でベンチマークを動かすための winsound の代用（音は鳴らさない）"""
+SND_ALIAS = 0x10000
+SND_FILENAME = 0x20000
+SND_ASYNC = 0x0001
+SND_NODEFAULT = 0x0002
+SND_PURGE = 0x0040
+
+calls = []
+
+
+def PlaySound(sound, flags):
+    calls.append((sound, flags))
+
+
+def Beep(frequency, duration):
+    calls.append((frequency, duration))
+
+
+def MessageBeep(type=0):
+    calls.append((type,))
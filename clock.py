@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""タイマーとフェーズ遷移が使う時計
+
+DeadlineTimer・PomodoroWorker・Tk 版の after の連鎖は、時刻の取得と
+「delay 秒後に呼ぶ」をこの時計を通して行う。
+
+- SystemClock: 実時間（コールバックは threading.Timer のスレッドから呼ばれる）
+- TkClock / QtClock: 実時間で、コールバックは GUI のイベントループから呼ばれる
+- SimulatedClock: 仮想時間。advance() / run() で予約したコールバックを時刻順に
+  すぐ実行するので、何千サイクル分のフェーズ遷移でも数ミリ秒で進む
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+
+class SystemClock:
+    """実時間の時計"""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        handle = threading.Timer(max(delay, 0.0), callback, args)
+        handle.daemon = True
+        handle.start()
+        return handle
+
+    def cancel(self, handle):
+        handle.cancel()
+
+
+class TkClock(SystemClock):
+    """Tk のイベントループ（after）でコールバックを呼ぶ時計"""
+
+    def __init__(self, widget):
+        self.widget = widget
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        return self.widget.after(max(1, math.ceil(delay * 1000)), callback, *args)
+
+    def cancel(self, handle):
+        self.widget.after_cancel(handle)
+
+
+class QtClock(SystemClock):
+    """Qt のイベントループ（単発の QTimer）でコールバックを呼ぶ時計"""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        from PyQt5 import QtCore
+        timer = QtCore.QTimer(self.parent)
+        timer.setSingleShot(True)
+        timer.setTimerType(QtCore.Qt.PreciseTimer)
+        timer.timeout.connect(lambda: callback(*args))
+        timer.timeout.connect(timer.deleteLater)
+        timer.start(max(0, math.ceil(delay * 1000)))
+        return timer
+
+    def cancel(self, handle):
+        handle.stop()
+        handle.deleteLater()
+
+
+class SimulatedClock:
+    """仮想時間の時計（時刻は advance / run を呼んだときだけ進む）"""
+
+    def __init__(self, start: float = 0.0, wall_start: Optional[float] = None):
+        self._now = start
+        # 壁時計は開始時点の実時刻から仮想時間と同じだけ進める
+        self._wall_offset = (time.time() if wall_start is None else wall_start) - start
+        self._heap = []
+        self._ids = itertools.count()
+        self._cancelled = set()
+        self._live = set()
+        self.events_run = 0
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self._wall_offset + self._now
+
+    def call_later(self, delay: float, callback: Callable, *args) -> int:
+        handle = next(self._ids)
+        self._live.add(handle)
+        heapq.heappush(self._heap, (self._now + max(delay, 0.0), handle, callback, args))
+        return handle
+
+    def cancel(self, handle: int):
+        # 実行済み・取り消し済みのものは無視する
+        if handle in self._live:
+            self._live.discard(handle)
+            self._cancelled.add(handle)
+
+    @property
+    def pending(self) -> int:
+        """予約されていて、まだ取り消されていないコールバックの数"""
+        return len(self._live)
+
+    def next_time(self) -> Optional[float]:
+        """次に予約されているコールバックの時刻"""
+        self._drop_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled(self):
+        heap = self._heap
+        while heap and heap[0][1] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(heap)[1])
+
+    def _run_next(self):
+        when, handle, callback, args = heapq.heappop(self._heap)
+        self._live.discard(handle)
+        self._now = max(self._now, when)
+        self.events_run += 1
+        callback(*args)
+
+    def advance(self, seconds: float) -> int:
+        """時刻を seconds 進め、その間に予約されていたコールバックを順に呼ぶ"""
+        target = self._now + seconds
+        count = 0
+        while True:
+            self._drop_cancelled()
+            if not self._heap or self._heap[0][0] > target:
+                break
+            self._run_next()
+            count += 1
+        self._now = max(self._now, target)
+        return count
+
+    def run(self, until: Optional[float] = None, max_events: Optional[int] = None,
+            stop: Optional[Callable[[], bool]] = None) -> int:
+        """予約がなくなるか、until（仮想時刻）・max_events・stop() のいずれかに達するまで進める"""
+        count = 0
+        while max_events is None or count < max_events:
+            if stop is not None and stop():
+                return count
+            self._drop_cancelled()
+            if not self._heap or (until is not None and self._heap[0][0] > until):
+                if until is not None:
+                    self._now = max(self._now, until)
+                return count
+            self._run_next()
+            count += 1
+        return count
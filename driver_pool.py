@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""Selenium の WebDriver セッションを温めたまま使い回すプール
+
+動画ごとに Chrome を起動・終了すると毎回数秒のコールドスタートになるため、
+起動済みのセッションを保持して新しい動画はページ遷移だけで再生する。
+使用回数やメモリ使用量が上限を超えたセッションは作り直す。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+FIRST_FRAME_SCRIPT = """
+var video = document.querySelector('video');
+return !!(video && video.readyState >= 2 && video.currentTime > 0);
+"""
+
+# 音声のみモード：プレイヤーに最低画質を要求し、映像の要素を描画させない
+AUDIO_ONLY_SCRIPT = """
+var player = document.getElementById('movie_player');
+if (player && player.setPlaybackQualityRange) { player.setPlaybackQualityRange('tiny', 'tiny'); }
+var video = document.querySelector('video');
+if (video) { video.style.visibility = 'hidden'; }
+return !!player;
+"""
+
+# 再生を止めて、止めた位置（秒）を返す
+STOP_SCRIPT = """
+var video = document.querySelector('video');
+if (!video) { return 0; }
+video.pause();
+return video.currentTime;
+"""
+
+MEMORY_SCRIPT = """
+return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0;
+"""
+
+
+class DriverPoolError(Exception):
+    """ドライバープール関連のエラー"""
+    pass
+
+
+def default_chrome_options():
+    from selenium.webdriver.chrome.options import Options
+    chrome_options = Options()
+    chrome_options.add_argument("--autoplay-policy=no-user-gesture-required")
+    return chrome_options
+
+
+def audio_only_chrome_options():
+    """音だけを流すためのヘッドレス Chrome（GPU・画像・拡張機能を使わず、表示サイズも最小）"""
+    chrome_options = default_chrome_options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    # YouTube は表示サイズに合わせて画質を選ぶので、最小の画面にする
+    chrome_options.add_argument("--window-size=256,144")
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+
+def default_driver_factory():
+    from selenium import webdriver
+    return webdriver.Chrome(options=default_chrome_options())
+
+
+def audio_only_driver_factory():
+    from selenium import webdriver
+    return webdriver.Chrome(options=audio_only_chrome_options())
+
+
+class PooledDriver:
+    """プールが管理する1つのブラウザセッション"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses: int = 0
+        self.created_at: float = time.monotonic()
+
+    @property
+    def is_cold(self) -> bool:
+        return self.uses == 0
+
+
+class WebDriverPool:
+    def __init__(self, factory: Callable[[], object] = default_driver_factory,
+                 size: int = 1, max_uses: int = 50, max_memory_mb: float = 1024):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self._idle = deque()
+        self._created: int = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"created": 0, "recycled": 0, "cold_acquires": 0, "warm_acquires": 0}
+
+    def warm(self, count: Optional[int] = None):
+        """ブラウザを事前に起動しておく（バックグラウンドスレッドから呼ぶ想定）"""
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._cond:
+                if self._closed or self._created >= count:
+                    return
+                self._created += 1
+            pooled = self._create()
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    @property
+    def idle_count(self) -> int:
+        """起動済みで貸し出していないセッションの数"""
+        with self._cond:
+            return len(self._idle)
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise DriverPoolError("ドライバープールは終了しています")
+                if self._idle:
+                    pooled = self._idle.popleft()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    pooled = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DriverPoolError("利用可能なブラウザセッションがありません")
+                self._cond.wait(remaining)
+        if pooled is None:
+            pooled = self._create()
+        elif not self._usable(pooled):
+            self._discard(pooled, reason="ヘルスチェック失敗または上限超過")
+            with self._cond:
+                self._created += 1
+            pooled = self._create()
+        self.stats["cold_acquires" if pooled.is_cold else "warm_acquires"] += 1
+        return pooled
+
+    def release(self, pooled: PooledDriver, healthy: bool = True):
+        pooled.uses += 1
+        if not healthy or self._closed:
+            self._discard(pooled, reason="エラー後の破棄" if not healthy else "プール終了")
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """with 文でセッションを借りる。例外が起きたセッションは破棄する"""
+        pooled = self.acquire(timeout)
+        healthy = False
+        try:
+            yield pooled
+            healthy = True
+        finally:
+            self.release(pooled, healthy)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled, reason="プール終了")
+
+    def is_healthy(self, driver) -> bool:
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def memory_mb(self, driver) -> float:
+        try:
+            return (driver.execute_script(MEMORY_SCRIPT) or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _usable(self, pooled: PooledDriver) -> bool:
+        if pooled.uses >= self.max_uses:
+            return False
+        if not self.is_healthy(pooled.driver):
+            return False
+        return self.memory_mb(pooled.driver) <= self.max_memory_mb
+
+    def _create(self) -> PooledDriver:
+        started = time.perf_counter()
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        self.stats["created"] += 1
+        logging.info(f"ブラウザセッションを起動しました ({time.perf_counter() - started:.2f}s)")
+        return PooledDriver(driver)
+
+    def _discard(self, pooled: PooledDriver, reason: str):
+        self.stats["recycled"] += 1
+        logging.info(f"ブラウザセッションを破棄します: {reason} (使用回数 {pooled.uses})")
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logging.warning(f"ブラウザ終了時にエラー: {e}")
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+
+def wait_for_first_frame(driver, timeout: float = 20, poll: float = 0.05,
+                         since: Optional[float] = None) -> Optional[float]:
+    """動画の最初のフレームが描画されるまで待ち、since（perf_counter）からの経過秒数を返す
+
+    タイムアウトした場合は None を返す。
+    """
+    started = time.perf_counter() if since is None else since
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if driver.execute_script(FIRST_FRAME_SCRIPT):
+                return time.perf_counter() - started
+        except Exception:
+            pass
+        time.sleep(poll)
+    return None
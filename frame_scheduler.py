@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""画面上の時計表示をまとめて更新するフレームスケジューラ
+
+表示の更新は壁時計の秒境界に揃えた1本のタイマーから行い、
+描画内容が変わったウィジェットだけを更新する。ウィンドウが非表示・
+最小化されている間は更新を止める。GUI ツールキットには依存せず、
+schedule(delay_ms) / cancel(token) を渡して Qt・Tk のどちらでも使う。
+"""
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+_UNSET = object()
+
+# 秒境界の直前に起きてしまわないよう、少しだけ遅らせて起床する
+BOUNDARY_SLACK_MS = 2
+
+
+class _Binding:
+    __slots__ = ("render", "apply", "last")
+
+    def __init__(self, render, apply):
+        self.render = render
+        self.apply = apply
+        self.last = _UNSET
+
+
+class FrameScheduler:
+    def __init__(self, schedule: Callable[[int], Any], cancel: Callable[[Any], None],
+                 clock: Callable[[], float] = time.time,
+                 hidden_interval: Optional[float] = None):
+        """schedule(delay_ms) は delay_ms 後に run_frame() を呼ぶよう予約し、取り消し用の値を返す
+
+        予約中のフレームを取り消すときは、schedule の戻り値が None でも cancel(戻り値) を呼ぶ
+        （Qt の QTimer.start のように戻り値のない予約でも取り消せるように）。
+
+        hidden_interval を指定すると、非表示中もその間隔（秒）で更新する。
+        None なら非表示中は更新しない。
+        """
+        self._schedule = schedule
+        self._cancel = cancel
+        self.clock = clock
+        self.hidden_interval = hidden_interval
+        self.visible = True
+        self._bindings: Dict[int, _Binding] = {}
+        self._next_handle = 0
+        self._token = None
+        self._pending = False
+        self._running = False
+        self.wakeups = 0
+        self.repaints = 0
+        self._history = deque()
+
+    # --- 登録 ---
+
+    def add(self, render: Callable[[float], Any], apply: Callable[[Any], None]) -> int:
+        """render(now) の結果が前回と変わったときだけ apply(value) を呼ぶ"""
+        handle = self._next_handle
+        self._next_handle += 1
+        self._bindings[handle] = _Binding(render, apply)
+        return handle
+
+    def remove(self, handle: int):
+        self._bindings.pop(handle, None)
+
+    # --- 制御 ---
+
+    def start(self):
+        self._running = True
+        self._run_now()
+
+    def stop(self):
+        self._running = False
+        self._cancel_pending()
+
+    def refresh(self):
+        """状態が変わったときに呼ぶ。次の秒境界を待たずに描画し直す"""
+        for binding in self._bindings.values():
+            binding.last = _UNSET
+        if self._running:
+            self._run_now()
+
+    def set_visible(self, visible: bool):
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if not self._running:
+            return
+        if visible:
+            self._run_now()
+        else:
+            self._cancel_pending()
+            self._schedule_next(self.clock())
+
+    # --- フレーム処理 ---
+
+    def _run_now(self):
+        # 予約済みのフレームを取り消してから描画する（Tk の after では予約が二重に残るため）
+        self._cancel_pending()
+        self.run_frame()
+
+    def run_frame(self):
+        self._token = None
+        self._pending = False
+        if not self._running:
+            return
+        now = self.clock()
+        self.wakeups += 1
+        painted = 0
+        for binding in list(self._bindings.values()):
+            value = binding.render(now)
+            if value != binding.last:
+                binding.last = value
+                binding.apply(value)
+                painted += 1
+        self.repaints += painted
+        self._history.append((time.monotonic(), painted))
+        self._trim_history()
+        self._schedule_next(now)
+
+    def _schedule_next(self, now: float):
+        self._cancel_pending()
+        if not self.visible:
+            if self.hidden_interval is None:
+                return
+            delay = self.hidden_interval - (now % 1.0)
+        else:
+            delay = math.floor(now) + 1 - now
+        self._token = self._schedule(max(1, int(delay * 1000) + BOUNDARY_SLACK_MS))
+        self._pending = True
+
+    def _cancel_pending(self):
+        if self._pending:
+            self._cancel(self._token)
+            self._token = None
+            self._pending = False
+
+    # --- 統計 ---
+
+    def _trim_history(self):
+        cutoff = time.monotonic() - 60
+        while self._history and self._history[0][0] < cutoff:
+            self._history.popleft()
+
+    def stats(self) -> Dict[str, float]:
+        """直近1分間の起床回数と描画回数"""
+        self._trim_history()
+        return {
+            "wakeups_per_minute": len(self._history),
+            "repaints_per_minute": sum(painted for _, painted in self._history),
+            "wakeups_total": self.wakeups,
+            "repaints_total": self.repaints,
+            "visible": self.visible,
+        }
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""完了したフェーズ（作業・休憩）の履歴ストア
+
+SQLite を WAL モードで使い、書き込みはバックグラウンドのスレッドが
+まとめて行う。GUI スレッドからの record() はキューに積むだけで戻る。
+日付・タスクで索引を張っているため、1年分（数万行）でも数ミリ秒で引ける。
+"""
+import csv
+import datetime
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join("pomodoro_data", "history.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS phases (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    phase TEXT NOT NULL,
+    task TEXT NOT NULL DEFAULT '',
+    video_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_phases_day ON phases(day, phase, started_at, ended_at);
+CREATE INDEX IF NOT EXISTS idx_phases_task_day ON phases(task, day);
+"""
+
+_COLUMNS = ("started_at", "ended_at", "phase", "task", "video_id")
+
+_STOP = object()
+
+
+class PhaseRecord(NamedTuple):
+    started_at: float
+    ended_at: float
+    phase: str
+    task: str = ""
+    video_id: str = ""
+
+    @property
+    def duration(self) -> float:
+        return self.ended_at - self.started_at
+
+
+def day_of(timestamp: float) -> str:
+    """ローカル時刻での日付（YYYY-MM-DD）"""
+    return datetime.datetime.fromtimestamp(timestamp).date().isoformat()
+
+
+class HistoryStore:
+    def __init__(self, path: str = DEFAULT_PATH, batch_size: int = 256,
+                 flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._queue: "queue.Queue" = queue.Queue()
+        # スキーマ作成と WAL 切り替えは開始前に同期的に済ませる
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.close()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect(check_same_thread=False)
+        self._writer = threading.Thread(target=self._write_loop, name="HistoryWriter", daemon=True)
+        self._writer.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- 書き込み ---
+
+    def record(self, phase: str, started_at: float, ended_at: float,
+               task: str = "", video_id: str = ""):
+        """フェーズを1件記録する。ブロックしない"""
+        self._queue.put(PhaseRecord(started_at, ended_at, phase, task or "", video_id or ""))
+
+    def flush(self):
+        """キューに積まれた記録が書き込まれるまで待つ"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+    def _write_loop(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            # 続けて届いている記録はまとめて1トランザクションで書く
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval if batch else None)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO phases (day, started_at, ended_at, phase, task, video_id) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            [(day_of(r.started_at),) + tuple(r) for r in batch])
+            except sqlite3.Error as e:
+                logging.error(f"履歴の保存に失敗しました: {e}")
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+        conn.close()
+
+    # --- 読み出し ---
+
+    def _select(self, where: str, params: tuple) -> List[PhaseRecord]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM phases WHERE {where} ORDER BY started_at",
+                params).fetchall()
+        return [PhaseRecord(*row) for row in rows]
+
+    def query_day(self, day) -> List[PhaseRecord]:
+        """指定日（date または 'YYYY-MM-DD'）のフェーズ"""
+        return self._select("day = ?", (str(day),))
+
+    def query_range(self, first_day, last_day) -> List[PhaseRecord]:
+        return self._select("day BETWEEN ? AND ?", (str(first_day), str(last_day)))
+
+    def query_task(self, task: str, first_day=None, last_day=None) -> List[PhaseRecord]:
+        if first_day is None:
+            return self._select("task = ?", (task,))
+        return self._select("task = ? AND day BETWEEN ? AND ?",
+                            (task, str(first_day), str(last_day or first_day)))
+
+    def daily_totals(self, first_day, last_day, phase: str = "work") -> Dict[str, float]:
+        """日ごとの合計時間（秒）"""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT day, SUM(ended_at - started_at) FROM phases "
+                "WHERE day BETWEEN ? AND ? AND phase = ? GROUP BY day",
+                (str(first_day), str(last_day), phase)).fetchall()
+        return dict(rows)
+
+    def export(self, since: Optional[float] = None, chunk_size: int = 1000) -> Iterator[dict]:
+        """全履歴を古い順に1件ずつ返すジェネレータ（専用の接続で少しずつ読む）"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT day, {', '.join(_COLUMNS)} FROM phases WHERE started_at >= ? ORDER BY started_at",
+                (since or 0,))
+            names = ("day",) + _COLUMNS
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
+        finally:
+            conn.close()
+
+    def export_jsonl(self, fp, since: Optional[float] = None) -> int:
+        count = 0
+        for row in self.export(since):
+            fp.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def export_csv(self, fp, since: Optional[float] = None) -> int:
+        writer = csv.DictWriter(fp, fieldnames=("day",) + _COLUMNS)
+        writer.writeheader()
+        count = 0
+        for row in self.export(since):
+            writer.writerow(row)
+            count += 1
+        return count
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""ログをキューに積み、バックグラウンドのスレッドで書き出すロギングの設定
+
+GUI スレッドでの logging.info() は LogRecord を作ってキューに積むだけにし、
+整形・ファイルへの書き込み・ローテートは書き出しスレッド（QueueListener）で行う。
+trim_records=True のときは、フォーマットが使わない呼び出し元の行番号やプロセス名の取得も省く
+（logging モジュール全体の設定を書き換えるので、アプリの __main__ からだけ指定する）。
+
+- ローテート: サイズ（既定 5 MB × 5世代）か、POMODORO_LOG_ROTATE=midnight などの時刻
+- 形式: 既定はこれまでと同じテキスト。POMODORO_LOG_FORMAT=json で1行1件の JSON
+  （壁時計の ts と、単調増加する mono を持つ）
+- 件数制限: ロガー名ごとのトークンバケット。多すぎる分は捨て、次に通した記録に
+  省略した件数を付ける（ERROR 以上は制限しない）
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+# ロガー名 -> (1秒あたりの件数, 連続して出せる件数)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    "youtube_player": (1.0, 10),
+    "video_prefetch": (1.0, 10),
+}
+
+# フォーマットがこれらを使わなければ、GUI スレッドでの取得を省く
+_CALLER_FIELDS = ("pathname", "filename", "module", "lineno", "funcName")
+_PROCESS_FIELDS = ("process", "processName")
+_THREAD_FIELDS = ("thread", "threadName")
+
+_NO_LIMIT = object()
+_START_TIME = getattr(logging, "_startTime", time.time())
+
+
+class LightLogRecord(logging.LogRecord):
+    """呼び出し元・スレッド・プロセスの情報を持たない LogRecord（フォーマットで使わないとき用）
+
+    標準の LogRecord はファイル名の分解やスレッド名の取得を毎回行うので、それを省く。
+    """
+
+    def __init__(self, name, level, pathname, lineno, msg, args, exc_info, func=None, sinfo=None, **kwargs):
+        self.name = name
+        self.msg = msg
+        # logging.info("%(key)s", {...}) の形は標準と同じく辞書をそのまま使う
+        if args and len(args) == 1 and isinstance(args[0], dict) and args[0]:
+            args = args[0]
+        self.args = args
+        self.levelname = logging.getLevelName(level)
+        self.levelno = level
+        self.pathname = pathname
+        self.filename = pathname
+        self.module = "unknown"
+        self.exc_info = exc_info
+        self.exc_text = None
+        self.stack_info = sinfo
+        self.lineno = lineno
+        self.funcName = func
+        self.created = created = time.time()
+        self.msecs = (created - int(created)) * 1000
+        self.relativeCreated = (created - _START_TIME) * 1000
+        self.thread = None
+        self.threadName = None
+        self.processName = None
+        self.process = None
+        self.taskName = None
+
+
+class RateLimitFilter(logging.Filter):
+    """ロガー名（とその子）ごとに件数を制限する
+
+    複数のスレッドから呼ばれてもロックは取らない（件数が多少ずれるだけ）。
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]]):
+        super().__init__()
+        self.limits = dict(limits)
+        self.dropped = 0
+        # ロガー名 -> [トークン, 最後に補充した時刻, 省略した件数, 件数/秒, 上限]
+        self._buckets: Dict[str, object] = {}
+
+    def _bucket_for(self, name: str):
+        match = None
+        for prefix in self.limits:
+            if (name == prefix or name.startswith(prefix + ".")) and (match is None or len(prefix) > len(match)):
+                match = prefix
+        if match is None:
+            bucket = _NO_LIMIT
+        else:
+            rate, burst = self.limits[match]
+            bucket = [float(burst), time.monotonic(), 0, rate, burst]
+        self._buckets[name] = bucket
+        return bucket
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            bucket = self._bucket_for(record.name)
+        if bucket is _NO_LIMIT or record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        tokens = min(bucket[4], bucket[0] + (now - bucket[1]) * bucket[3])
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            self.dropped += 1
+            return False
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class QueueOnlyHandler(logging.handlers.QueueHandler):
+    """記録をそのままキューに積む（整形は書き出しスレッドで行う）"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.monotonic = time.monotonic()
+        if record.args:
+            # 引数が後から書き換えられても、呼び出した時点の内容で残す
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def handle(self, record: logging.LogRecord):
+        # キュー自体がスレッドセーフなので、ハンドラーのロックは取らない
+        if self.filters:
+            rv = self.filter(record)
+            if not rv:
+                return rv
+            if isinstance(rv, logging.LogRecord):
+                record = rv
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f"（直前に同じ種類のログを {suppressed} 件省略）"
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """1行1件の JSON。ts は壁時計、mono は time.monotonic()（並べ替え・間隔の計算用）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "mono": round(getattr(record, "monotonic", 0.0), 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogPipeline:
+    def __init__(self, handlers, level: int = logging.INFO,
+                 rate_limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.level = level
+        self.handler = QueueOnlyHandler(self.queue)
+        self.rate_filter = RateLimitFilter(rate_limits) if rate_limits else None
+        if self.rate_filter is not None:
+            self.handler.addFilter(self.rate_filter)
+        self.handlers = list(handlers)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self._started = False
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """キューに残っている記録を書き出してから止める"""
+        if not self._started:
+            return
+        self._started = False
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+        atexit.unregister(self.stop)
+
+
+def _uses(fmt: str, fields) -> bool:
+    return any(f"%({name})" in fmt or "{" + name in fmt for name in fields)
+
+
+def _trim_record_fields(fmt: str):
+    """フォーマットで使わない LogRecord の属性の取得を省く（logging の最適化の手順どおり）"""
+    trimmed = 0
+    if not _uses(fmt, _CALLER_FIELDS):
+        logging._srcfile = None
+        trimmed += 1
+    if not _uses(fmt, _PROCESS_FIELDS):
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        trimmed += 1
+    if not _uses(fmt, _THREAD_FIELDS):
+        logging.logThreads = False
+        trimmed += 1
+    if hasattr(logging, "logAsyncioTasks"):
+        logging.logAsyncioTasks = False
+    if trimmed == 3 and logging.getLogRecordFactory() is logging.LogRecord:
+        logging.setLogRecordFactory(LightLogRecord)
+
+
+def setup_logging(filename: Optional[str] = None, level: int = logging.INFO,
+                  fmt: str = DEFAULT_FORMAT, log_format: Optional[str] = None,
+                  max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                  rotate_when: Optional[str] = None,
+                  rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                  trim_records: bool = False) -> LogPipeline:
+    """ルートロガーをキュー経由にする（filename がなければ標準エラー出力に書く）
+
+    log_format と rotate_when を省略すると、環境変数 POMODORO_LOG_FORMAT（text / json）と
+    POMODORO_LOG_ROTATE（midnight、H など。なければサイズでローテート）を使う。
+    trim_records=True にすると、フォーマットで使わない LogRecord の属性の取得を省く。
+    プロセス内のすべてのロガーに効くため、モジュールの import 時には指定しない。
+    """
+    log_format = log_format or os.environ.get("POMODORO_LOG_FORMAT", "text")
+    rotate_when = rotate_when or os.environ.get("POMODORO_LOG_ROTATE") or None
+    if filename is None:
+        handler = logging.StreamHandler(sys.stderr)
+    elif rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(filename, when=rotate_when, backupCount=backup_count,
+                                                            encoding="utf-8", delay=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding="utf-8", delay=True)
+    if log_format == "json":
+        handler.setFormatter(JsonLinesFormatter())
+        used_fmt = ""
+    else:
+        handler.setFormatter(TextFormatter(fmt))
+        used_fmt = fmt
+    if trim_records:
+        _trim_record_fields(used_fmt)
+    pipeline = LogPipeline([handler], level,
+                           DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+    pipeline.start()
+    return pipeline
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""pomodoro.log を差分だけ読み、日・週ごとの集計を保存する統計エンジン
+
+前回どこまで読んだか（バイト位置・ファイルの識別情報）と、集計途中の状態を
+要約ファイル（pomodoro_data/log_stats.json）に保存し、次回はその続きから読む。
+ログがローテートされていたら、古いファイル（pomodoro.log.1 など）の残りを
+読んでから新しいファイルを先頭から読む。
+
+統計画面を開くときは要約ファイルを読み込み、前回からの追記分だけを読むので、
+ログの大きさ（1 KB でも 1 GB でも）には依存しない。要約は保持日数分の
+日・週ごとの集計だけを持つ。
+"""
+import datetime
+import glob
+import json
+import locale
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LOG = "pomodoro.log"
+DEFAULT_PATH = os.path.join("pomodoro_data", "log_stats.json")
+VERSION = 1
+# 要約に残す日数（週はこの日数を週数に直した分）
+RETENTION_DAYS = 400
+# ファイルの同一性の確認に使う先頭部分の長さ
+HEAD_BYTES = 256
+READ_CHUNK = 1024 * 1024
+
+# 集計する項目
+FIELDS = ("focus_seconds", "pomodoros", "interruptions", "videos")
+
+# ログの本文 -> イベント
+_EVENTS = (
+    ("タイマーが開始されました", "start"),
+    ("タイマーが再開されました", "resume"),
+    ("タイマーが一時停止されました", "pause"),
+    ("タイマーがリセットされました", "reset"),
+    ("フェーズが終了しました: ", "phase_end"),
+    ("動画が再生されました: ", "video"),
+    ("前回のタイマー状態を復元しました: ", "restore"),
+)
+_SEPARATOR = " - "
+
+
+def _decode(line: bytes) -> str:
+    # basicConfig で書いたログは環境の既定の文字コード（Windows では cp932）のことがある
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        return line.decode(locale.getpreferredencoding(False), "replace")
+
+
+def _empty() -> Dict[str, float]:
+    return dict.fromkeys(FIELDS, 0)
+
+
+class LogStats:
+    def __init__(self, log_path: str = DEFAULT_LOG, path: str = DEFAULT_PATH,
+                 retention_days: int = RETENTION_DAYS):
+        self.log_path = log_path
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._minute_cache: Dict[str, float] = {}
+        self.days: Dict[str, Dict[str, float]] = {}
+        self.weeks: Dict[str, Dict[str, float]] = {}
+        # 読み終えた位置と、そのファイルを見分けるための情報
+        self.checkpoint = {"inode": 0, "offset": 0, "head": ""}
+        # 行をまたいで引き継ぐ状態（作業中か、いつから計測中か）
+        self.state = {"phase": "work", "running_since": None, "active": False}
+        self.bytes_read = 0
+        self._load()
+
+    # --- 要約ファイル ---
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"統計の要約を読み込めません（ログを最初から読み直します）: {e}")
+            return
+        if data.get("version") != VERSION:
+            return
+        self.checkpoint.update(data.get("checkpoint", {}))
+        self.state.update(data.get("state", {}))
+        self.days = data.get("days", {})
+        self.weeks = data.get("weeks", {})
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        data = {"version": VERSION, "checkpoint": self.checkpoint, "state": self.state,
+                "days": self.days, "weeks": self.weeks}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".log_stats-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    # json.dump は純 Python のエンコーダーになるので、dumps でまとめて書く
+                    f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError as e:
+            logging.error(f"統計の要約を保存できません: {e}")
+
+    # --- ログの追従 ---
+
+    def update(self, max_bytes: Optional[int] = None, blocking: bool = True) -> Optional[int]:
+        """前回の続きから最大 max_bytes 読んで集計し、読んだバイト数を返す
+
+        blocking=False で別のスレッドが読んでいる最中なら、何もせず None を返す。
+        """
+        if not self._lock.acquire(blocking):
+            return None
+        try:
+            consumed = self._update(max_bytes)
+            if consumed:
+                self._prune()
+                self._save()
+            return consumed
+        finally:
+            self._lock.release()
+
+    def _update(self, max_bytes: Optional[int]) -> int:
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return 0
+        consumed = 0
+        if self.checkpoint["offset"] and not self._is_same_file(self.log_path, st):
+            # ローテートされた。古いファイルの残りを読んでから新しいファイルに移る
+            rotated = self._find_rotated()
+            if rotated is not None:
+                consumed += self._read(rotated, max_bytes)
+                if max_bytes is not None and consumed >= max_bytes:
+                    return consumed
+            else:
+                logging.info("ログがローテートまたは切り詰められたため、先頭から読み直します")
+            self.checkpoint = {"inode": 0, "offset": 0, "head": ""}
+        remaining = None if max_bytes is None else max_bytes - consumed
+        consumed += self._read(self.log_path, remaining)
+        return consumed
+
+    def _is_same_file(self, path: str, st: os.stat_result) -> bool:
+        if self.checkpoint["inode"] and st.st_ino and st.st_ino != self.checkpoint["inode"]:
+            return False
+        if st.st_size < self.checkpoint["offset"]:
+            return False
+        return self._head(path, len(bytes.fromhex(self.checkpoint["head"]))) == self.checkpoint["head"]
+
+    @staticmethod
+    def _head(path: str, length: int) -> str:
+        with open(path, "rb") as f:
+            return f.read(length).hex()
+
+    def _find_rotated(self) -> Optional[str]:
+        """読みかけだったファイル（pomodoro.log.1, pomodoro.log.2024-01-01 など）を探す"""
+        candidates = sorted(glob.glob(glob.escape(self.log_path) + ".*"),
+                            key=lambda p: os.path.getmtime(p), reverse=True)
+        for candidate in candidates:
+            try:
+                if self._is_same_file(candidate, os.stat(candidate)):
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def _read(self, path: str, max_bytes: Optional[int]) -> int:
+        """path を checkpoint の位置から読み、行ごとに集計する（最後の不完全な行は次回に回す）"""
+        consumed = 0
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if not self.checkpoint["head"] or len(self.checkpoint["head"]) < HEAD_BYTES * 2:
+                self.checkpoint["head"] = f.read(HEAD_BYTES).hex()
+            self.checkpoint["inode"] = st.st_ino
+            f.seek(self.checkpoint["offset"])
+            pending = b""
+            while max_bytes is None or consumed < max_bytes:
+                size = READ_CHUNK if max_bytes is None else min(READ_CHUNK, max_bytes - consumed)
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b"\n")
+                if end < 0:
+                    pending = data
+                    continue
+                for line in data[:end].split(b"\n"):
+                    self._feed(line)
+                pending = data[end + 1:]
+                consumed += end + 1
+                self.checkpoint["offset"] += end + 1
+        self.bytes_read += consumed
+        return consumed
+
+    # --- 集計 ---
+
+    def _feed(self, line: bytes):
+        text = _decode(line).rstrip("\r")
+        if text.startswith("{"):
+            # POMODORO_LOG_FORMAT=json の行（log_pipeline.JsonLinesFormatter）
+            try:
+                entry = json.loads(text)
+                stamp, message = float(entry["ts"]), entry["msg"]
+            except (ValueError, KeyError, TypeError):
+                return
+        else:
+            parts = text.split(_SEPARATOR, 2)
+            if len(parts) != 3:
+                return
+            asctime, _, message = parts
+            stamp = None
+        for prefix, event in _EVENTS:
+            if message.startswith(prefix):
+                break
+        else:
+            return
+        if stamp is None:
+            stamp = self._timestamp(asctime)
+            if stamp is None:
+                return
+        self._apply(event, stamp, message[len(prefix):])
+
+    def _timestamp(self, asctime: str) -> Optional[float]:
+        """'2024-01-01 12:34:56,789' -> UNIX 時刻（分単位でキャッシュする）"""
+        minute = asctime[:16]
+        base = self._minute_cache.get(minute)
+        if base is None:
+            try:
+                base = time.mktime(time.strptime(minute, "%Y-%m-%d %H:%M"))
+            except ValueError:
+                return None
+            if len(self._minute_cache) > 4096:
+                self._minute_cache.clear()
+            self._minute_cache[minute] = base
+        try:
+            return base + float(asctime[17:].replace(",", "."))
+        except ValueError:
+            return None
+
+    def _apply(self, event: str, stamp: float, detail: str):
+        state = self.state
+        if event == "video":
+            self._add(stamp, "videos", 1)
+            return
+        if event == "restore":
+            state["phase"] = "work" if detail.startswith("work") else "break"
+            state["running_since"] = None
+            return
+        # 計測中の区間を閉じる
+        if state["running_since"] is not None and state["phase"] == "work":
+            self._add_focus(state["running_since"], stamp)
+        if event in ("start", "resume"):
+            state["running_since"] = stamp
+            state["active"] = True
+        elif event == "pause":
+            if state["active"] and state["phase"] == "work":
+                self._add(stamp, "interruptions", 1)
+            state["running_since"] = None
+        elif event == "reset":
+            if state["active"] and state["phase"] == "work":
+                self._add(stamp, "interruptions", 1)
+            state.update(phase="work", running_since=None, active=False)
+        elif event == "phase_end":
+            if state["phase"] == "work":
+                self._add(stamp, "pomodoros", 1)
+            state.update(phase="work" if detail.startswith(("short_break", "long_break", "break")) else "break",
+                         running_since=None, active=False)
+
+    def _add_focus(self, started: float, ended: float):
+        """作業時間を日付の境界で分けて加算する"""
+        while started < ended:
+            day = datetime.datetime.fromtimestamp(started).date()
+            midnight = time.mktime((day + datetime.timedelta(days=1)).timetuple())
+            until = min(ended, midnight)
+            self._add(started, "focus_seconds", until - started)
+            started = until
+
+    def _add(self, stamp: float, field: str, value: float):
+        day = datetime.date.fromtimestamp(stamp)
+        self.days.setdefault(day.isoformat(), _empty())[field] += value
+        year, week, _ = day.isocalendar()
+        self.weeks.setdefault(f"{year}-W{week:02d}", _empty())[field] += value
+
+    def _prune(self):
+        oldest = (datetime.date.today() - datetime.timedelta(days=self.retention_days))
+        for day in [day for day in self.days if day < oldest.isoformat()]:
+            del self.days[day]
+        year, week, _ = oldest.isocalendar()
+        for key in [key for key in self.weeks if key < f"{year}-W{week:02d}"]:
+            del self.weeks[key]
+
+    # --- 参照 ---
+
+    def recent_days(self, count: int = 7, today: Optional[datetime.date] = None) -> List[Tuple[str, Dict[str, float]]]:
+        """直近 count 日分の集計（記録のない日も 0 で含む、新しい順）"""
+        today = today or datetime.date.today()
+        with self._lock:
+            return [(day, dict(self.days.get(day, _empty())))
+                    for day in ((today - datetime.timedelta(days=i)).isoformat() for i in range(count))]
+
+    def recent_weeks(self, count: int = 4, today: Optional[datetime.date] = None) -> List[Tuple[str, Dict[str, float]]]:
+        """直近 count 週分の集計（新しい順）"""
+        today = today or datetime.date.today()
+        result = []
+        with self._lock:
+            for i in range(count):
+                year, week, _ = (today - datetime.timedelta(weeks=i)).isocalendar()
+                key = f"{year}-W{week:02d}"
+                result.append((key, dict(self.weeks.get(key, _empty()))))
+        return result
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""軽量な計測レイヤー（カウンター・ヒストグラム・スパン）とサンプリングプロファイラ
+
+計測は既定で無効。無効の間は各メソッドがフラグを1回見て戻るだけなので、
+ホットパスに置いたままでもほぼコストがかからない。
+環境変数 POMODORO_METRICS=1 か enable() で有効にすると、
+render_prometheus() が Prometheus のテキスト形式で値を返す
+（web_app の /metrics から取得できる）。
+"""
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 秒単位の既定バケット（1ms 〜 10s）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _State:
+    enabled = os.environ.get("POMODORO_METRICS", "") not in ("", "0")
+
+
+_state = _State()
+_registry: "collections.OrderedDict[str, _Metric]" = collections.OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def enable():
+    _state.enabled = True
+
+
+def disable():
+    _state.enabled = False
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            if name in _registry:
+                raise ValueError(f"メトリクス {name} は既に登録されています")
+            _registry[name] = self
+
+    def labels(self, *values):
+        """ラベル値ごとの子メトリクスを返す"""
+        if not _state.enabled:
+            return _NULL_METRIC
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, metric in self._samples():
+            lines.extend(metric._render_values(self.name, self.labelnames, values))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), _register: bool = True):
+        if _register:
+            super().__init__(name, help, labelnames)
+        else:
+            self._lock = threading.Lock()
+        self.value = 0.0
+
+    def _new_child(self):
+        return Counter(self.name, self.help, _register=False)
+
+    def inc(self, amount: float = 1.0):
+        if not _state.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def _render_values(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return Gauge(self.name, self.help, _register=False)
+
+    def set(self, value: float):
+        if not _state.enabled:
+            return
+        self.value = value
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _NullMetric:
+    """無効時に labels() が返す、何もしないメトリクス"""
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+    def time(self):
+        return _NULL_SPAN
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class _Span:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, _register: bool = True):
+        if _register:
+            super().__init__(name, help, labelnames)
+        else:
+            self._lock = threading.Lock()
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self):
+        return Histogram(self.name, self.help, buckets=self.buckets, _register=False)
+
+    def observe(self, value: float):
+        if not _state.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """with metric.time(): ... の形で処理時間を記録する"""
+        if not _state.enabled:
+            return _NULL_SPAN
+        return _Span(self)
+
+    def _render_values(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {self.count}")
+        return lines
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _get_or_create(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+
+def _get_or_create(cls, name, help, labelnames, **kwargs):
+    # 同じモジュールが2回読み込まれても（スクリプト実行と import など）登録を共有する
+    with _registry_lock:
+        existing = _registry.get(name)
+    if existing is not None:
+        if not isinstance(existing, cls):
+            raise ValueError(f"メトリクス {name} は別の種類で登録されています")
+        return existing
+    return cls(name, help, labelnames, **kwargs)
+
+
+def span(metric: Histogram):
+    return metric.time()
+
+
+def render_prometheus() -> str:
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """一定間隔で全スレッドのスタックを採取するプロファイラ（有効にしたときだけ動く）
+
+    結果は flamegraph.pl などで読める「折りたたみスタック」形式で返す。
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: "collections.Counter[str]" = collections.Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """葉の関数ごとのサンプル数（多い順）"""
+        leaves: "collections.Counter[str]" = collections.Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def start_profiler(interval: float = 0.005) -> SamplingProfiler:
+    global _profiler
+    if _profiler is None or not _profiler.is_running:
+        _profiler = SamplingProfiler(interval).start()
+    return _profiler
+
+
+def stop_profiler() -> Optional[SamplingProfiler]:
+    if _profiler is not None:
+        _profiler.stop()
+    return _profiler
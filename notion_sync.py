@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+"""Notion データベースへの同期（オフライン対応のアウトボックス方式）
+
+記録したいページはまず SQLite のアウトボックスに積み、専用スレッドの
+イベントループが1つの AsyncClient を使い回してまとめて送信する。
+Notion のレート制限（平均 3 リクエスト/秒）に合わせて送信間隔を調整し、
+429 や一時的なエラーは待ってから再送する。未送信分は再起動後も残る。
+送信のために取り出した行は一定時間貸し出し中（next_attempt_at を先に進める）にするので、
+設定の変更で同期ワーカーを作り直している間に、新旧のワーカーが同じ行を送ることはない。
+
+フェーズの記録とタスクは同じデータベースに置き、Phase プロパティで見分ける。
+フェーズの記録は Phase を持ち、タスクのページは Phase を空のままにする。
+タスクの取り込み（fetch_tasks）は Phase が空のページだけを問い合わせる。
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import metrics
+
+DEFAULT_PATH = os.path.join("pomodoro_data", "notion_outbox.db")
+
+RATE_PER_SECOND = 3.0
+MAX_ATTEMPTS = 8
+CLIENT_RETRY_INTERVAL = 60.0
+# 取り出した行を他のワーカーに渡さない時間（送信中に落ちた行はこの後に再送される）
+LEASE_SECONDS = 120.0
+
+NOTION_REQUESTS = metrics.counter("pomodoro_notion_requests_total", "Notion へのリクエスト数（結果別）",
+                                  ("outcome",))
+NOTION_LATENCY = metrics.histogram("pomodoro_notion_request_seconds", "Notion へのリクエストにかかった時間")
+NOTION_PENDING = metrics.gauge("pomodoro_notion_outbox_pending", "アウトボックスの送信待ち件数")
+
+PHASE_LABELS = {"work": "作業", "short_break": "短休憩", "long_break": "長休憩"}
+
+# 同期先データベースのプロパティ名
+DEFAULT_PROPERTIES = {
+    "title": "Name",
+    "phase": "Phase",
+    "date": "Date",
+    "video": "Video",
+}
+
+
+class NotionOutbox:
+    """未送信のページ作成要求を保持する SQLite テーブル（同期スレッドからのみ使う）"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(failed, next_attempt_at)")
+        self.conn.commit()
+
+    def enqueue_many(self, items: List[tuple]):
+        with self.conn:
+            self.conn.executemany("INSERT INTO outbox (kind, payload) VALUES (?, ?)",
+                                  [(kind, json.dumps(payload, ensure_ascii=False)) for kind, payload in items])
+
+    def due(self, limit: int, now: float, lease: float = LEASE_SECONDS) -> List[tuple]:
+        """送信時刻になった行を取り出し、lease 秒のあいだ貸し出し中にする"""
+        # 同じファイルを開いている別のワーカーと取り合わないよう、書き込みロックを取ってから選ぶ
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox "
+                "WHERE failed = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?", (now, limit)).fetchall()
+            self.conn.executemany("UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                                  [(now + lease, row[0]) for row in rows])
+        return [(row_id, kind, json.loads(payload), attempts) for row_id, kind, payload, attempts in rows]
+
+    def release(self, ids: List[int]):
+        """貸し出し中の行を、すぐに送信できる状態に戻す（まだ送っていない行だけに使う）"""
+        if ids:
+            with self.conn:
+                self.conn.executemany("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", [(i,) for i in ids])
+
+    def next_due_at(self) -> Optional[float]:
+        row = self.conn.execute(
+            "SELECT MIN(next_attempt_at) FROM outbox WHERE failed = 0").fetchone()
+        return row[0]
+
+    def mark_done(self, ids: List[int]):
+        if ids:
+            with self.conn:
+                self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def mark_retry(self, row_id: int, attempts: int, next_attempt_at: float, error: str):
+        failed = 1 if attempts >= MAX_ATTEMPTS else 0
+        with self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, failed = ?, last_error = ? WHERE id = ?",
+                (attempts, next_attempt_at, failed, error, row_id))
+
+    def mark_failed(self, row_id: int, error: str):
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET failed = 1, last_error = ? WHERE id = ?", (error, row_id))
+
+    def counts(self) -> Dict[str, int]:
+        pending, failed = self.conn.execute(
+            "SELECT COALESCE(SUM(failed = 0), 0), COALESCE(SUM(failed = 1), 0) FROM outbox").fetchone()
+        return {"pending": pending, "failed": failed}
+
+    def close(self):
+        self.conn.close()
+
+
+class RateLimiter:
+    """トークンバケット方式のレート制限（イベントループ内で使う）"""
+
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: int = 3):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block_for(self, seconds: float):
+        """429 を受けたときなど、全リクエストを一定時間止める"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def phase_properties(record: dict, names: Dict[str, str] = DEFAULT_PROPERTIES) -> dict:
+    """履歴1件分を Notion のページプロパティに変換する"""
+    def iso(timestamp):
+        return time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(timestamp))
+
+    phase = record.get("phase", "work")
+    title = record.get("task") or PHASE_LABELS.get(phase, phase)
+    properties = {
+        names["title"]: {"title": [{"text": {"content": title}}]},
+        names["phase"]: {"select": {"name": PHASE_LABELS.get(phase, phase)}},
+        names["date"]: {"date": {"start": iso(record["started_at"]), "end": iso(record["ended_at"])}},
+    }
+    if record.get("video_id"):
+        properties[names["video"]] = {"url": f"https://www.youtube.com/watch?v={record['video_id']}"}
+    return properties
+
+
+def page_title(page: dict) -> str:
+    """ページのタイトルプロパティの文字列"""
+    for prop in page.get("properties", {}).values():
+        if prop.get("type") == "title":
+            return "".join(part.get("plain_text", "") for part in prop.get("title", []))
+    return ""
+
+
+def task_properties(record: dict, names: Dict[str, str] = DEFAULT_PROPERTIES) -> dict:
+    # Phase は設定しない（フェーズの記録と見分けるため）
+    return {names["title"]: {"title": [{"text": {"content": record["title"]}}]}}
+
+
+def task_filter(names: Dict[str, str] = DEFAULT_PROPERTIES) -> dict:
+    """データベースの問い合わせでタスクのページ（Phase が空）だけを選ぶ条件"""
+    return {"property": names["phase"], "select": {"is_empty": True}}
+
+
+class NotionSync:
+    """アウトボックスの内容を Notion に送る同期ワーカー"""
+
+    def __init__(self, token: str, database_id: str, path: str = DEFAULT_PATH,
+                 base_url: Optional[str] = None, rate: float = RATE_PER_SECOND,
+                 concurrency: int = 3, batch_size: int = 50,
+                 client_factory: Optional[Callable[[], object]] = None,
+                 on_task_created: Optional[Callable[[int, str], None]] = None):
+        self.token = token
+        self.database_id = database_id
+        self.path = path
+        self.base_url = base_url
+        self.rate = rate
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.client_factory = client_factory or self._default_client
+        # タスクのページを作ったら (ローカルのタスクID, ページID) で呼ぶ（同期スレッドから呼ばれる）
+        self.on_task_created = on_task_created
+        self.stats = {"sent": 0, "retried": 0, "rate_limited": 0, "failed": 0}
+        self.loop = asyncio.new_event_loop()
+        self._client = None
+        self._limiter: Optional[RateLimiter] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._main_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="NotionSync", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    # --- 公開API（どのスレッドから呼んでもよい。ネットワークを待たない） ---
+
+    def enqueue_phase(self, phase: str, started_at: float, ended_at: float,
+                      task: str = "", video_id: str = ""):
+        self.enqueue("phase", {"phase": phase, "started_at": started_at, "ended_at": ended_at,
+                               "task": task, "video_id": video_id})
+
+    def enqueue_task(self, title: str, task_id: Optional[int] = None):
+        """タスクのページを作る。task_id を渡すと、作ったページIDを on_task_created で知らせる"""
+        self.enqueue("task", {"title": title, "task_id": task_id})
+
+    def fetch_tasks(self, page_size: int = 100):
+        """データベースのタスクのページを (タイトル, ページID) の一覧で取得する（フェーズの記録は除く）
+
+        concurrent.futures.Future を返す。送信と同じレート制限の下でページをめくる。
+        """
+        return asyncio.run_coroutine_threadsafe(self._fetch_tasks(page_size), self.loop)
+
+    def enqueue(self, kind: str, payload: dict):
+        self.enqueue_many([(kind, payload)])
+
+    def enqueue_many(self, items: List[tuple]):
+        if not self.is_running:
+            logging.error("Notion同期が停止しているため、送信要求を保存できません")
+            return
+        self.loop.call_soon_threadsafe(self._enqueue_in_loop, list(items))
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def counts(self, timeout: float = 5.0) -> Dict[str, int]:
+        return asyncio.run_coroutine_threadsafe(self._counts(), self.loop).result(timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """送信待ちがなくなるまで待つ（ベンチマーク・終了処理用）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            if not self.is_running:
+                return False
+            counts = self.counts()
+            if counts["pending"] == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """送信中のバッチを取り消して止める。timeout=0 なら止まるのを待たない
+
+        送信前だった行はすぐに、送信中だった行は貸し出しの期限後に、次のワーカーが送る。
+        """
+        self._stopping = True
+        if self.is_running:
+            try:
+                self.loop.call_soon_threadsafe(self._main_task.cancel)
+            except RuntimeError:
+                # ちょうどイベントループが閉じたところ
+                pass
+        if timeout != 0:
+            self._thread.join(timeout)
+
+    # --- 同期スレッド内の処理 ---
+
+    def _default_client(self):
+        from notion_client import AsyncClient
+        options = {"auth": self.token}
+        if self.base_url:
+            options["base_url"] = self.base_url
+        return AsyncClient(**options)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.outbox = NotionOutbox(self.path)
+        self._wakeup = asyncio.Event()
+        self._main_task = self.loop.create_task(self._main())
+        self._ready.set()
+        try:
+            self.loop.run_until_complete(self._main_task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.error(f"Notion同期が停止しました: {e}")
+        finally:
+            self.outbox.close()
+            self.loop.close()
+
+    def _enqueue_in_loop(self, items: List[tuple]):
+        self.outbox.enqueue_many(items)
+        self._wakeup.set()
+
+    async def _counts(self):
+        return self.outbox.counts()
+
+    async def _fetch_tasks(self, page_size: int) -> List[tuple]:
+        if self._client is None:
+            raise RuntimeError("Notionクライアントが準備できていません")
+        tasks = []
+        cursor = None
+        while True:
+            await self._limiter.acquire()
+            options = {"database_id": self.database_id, "page_size": page_size, "filter": task_filter()}
+            if cursor:
+                options["start_cursor"] = cursor
+            started = time.perf_counter()
+            try:
+                response = await self._client.databases.query(**options)
+            finally:
+                NOTION_LATENCY.observe(time.perf_counter() - started)
+            for page in response.get("results", []):
+                title = page_title(page)
+                if title:
+                    tasks.append((title, page["id"]))
+            if not response.get("has_more"):
+                return tasks
+            cursor = response.get("next_cursor")
+
+    async def _wait(self, timeout: Optional[float]):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _main(self):
+        client = None
+        limiter = self._limiter = RateLimiter(self.rate, burst=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            while not self._stopping:
+                if client is None:
+                    try:
+                        client = self._client = self.client_factory()
+                    except Exception as e:
+                        # クライアントが作れなくてもアウトボックスへの保存は続ける
+                        logging.error(f"Notionクライアントを作成できません: {e}")
+                        await self._wait(CLIENT_RETRY_INTERVAL)
+                        continue
+                now = time.time()
+                batch = self.outbox.due(self.batch_size, now)
+                if not batch:
+                    next_due = self.outbox.next_due_at()
+                    await self._wait(None if next_due is None else max(0.0, next_due - now))
+                    continue
+                results = await asyncio.gather(
+                    *(self._send(client, limiter, semaphore, item) for item in batch))
+                self.outbox.mark_done([row_id for row_id, ok in results if ok])
+                if metrics.is_enabled():
+                    NOTION_PENDING.set(self.outbox.counts()["pending"])
+        finally:
+            close = getattr(client, "aclose", None)
+            if close is not None:
+                await close()
+
+    async def _send(self, client, limiter: RateLimiter, semaphore: asyncio.Semaphore, item):
+        row_id, kind, payload, attempts = item
+        properties = phase_properties(payload) if kind == "phase" else task_properties(payload)
+        sending = False
+        try:
+            async with semaphore:
+                await limiter.acquire()
+                sending = True
+                started = time.perf_counter()
+                try:
+                    page = await client.pages.create(parent={"database_id": self.database_id},
+                                                     properties=properties)
+                    self.stats["sent"] += 1
+                    NOTION_REQUESTS.labels("sent").inc()
+                    if kind == "task":
+                        self._task_created(payload, page)
+                    return row_id, True
+                except Exception as e:
+                    self._handle_error(e, row_id, attempts, limiter)
+                    return row_id, False
+                finally:
+                    NOTION_LATENCY.observe(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            if not sending:
+                # まだ送っていないので、次のワーカーがすぐに送れるよう戻す
+                self.outbox.release([row_id])
+            raise
+
+    def _task_created(self, payload: dict, page):
+        page_id = page.get("id") if isinstance(page, dict) else None
+        if page_id and payload.get("task_id") is not None and self.on_task_created is not None:
+            try:
+                self.on_task_created(payload["task_id"], page_id)
+            except Exception as e:
+                logging.error(f"NotionのページIDをタスクに保存できません: {e}")
+
+    def _handle_error(self, error: Exception, row_id: int, attempts: int, limiter: RateLimiter):
+        status = getattr(error, "status", None)
+        if status == 429:
+            headers = getattr(error, "headers", None) or {}
+            retry_after = float(headers.get("retry-after", 1.0))
+            limiter.block_for(retry_after)
+            self.stats["rate_limited"] += 1
+            NOTION_REQUESTS.labels("rate_limited").inc()
+            # レート制限は失敗回数に数えない
+            self.outbox.mark_retry(row_id, attempts, time.time() + retry_after, "rate_limited")
+            return
+        if status is not None and 400 <= status < 500 and status != 409:
+            # 要求内容の誤りは再送しても成功しない
+            self.stats["failed"] += 1
+            NOTION_REQUESTS.labels("failed").inc()
+            self.outbox.mark_failed(row_id, str(error))
+            logging.error(f"Notionへの送信に失敗しました（再送しません）: {error}")
+            return
+        attempts += 1
+        delay = min(300.0, 2 ** attempts) * random.uniform(0.5, 1.0)
+        self.stats["retried"] += 1
+        NOTION_REQUESTS.labels("retried").inc()
+        self.outbox.mark_retry(row_id, attempts, time.time() + delay, str(error))
+        logging.warning(f"Notionへの送信に失敗しました。{delay:.1f}秒後に再送します: {error}")
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""フェーズに応じたプレイヤーページのライフサイクル管理
+
+作業中・停止中に動画が止まったまま一定時間たったら、表示中のプレイヤーを
+プレースホルダーに差し替えてページを凍結（Frozen）し、さらに長く使われなければ
+破棄（Discarded）してレンダラーのメモリを手放す。裏にある先読み・予備の
+プレイヤーも同じように凍結・破棄する（先読み中のものは破棄しない）。
+音声が流れているページは表示の有無にかかわらず Active のままにする。
+
+作業中はレンダラープロセスの優先度を下げ、休憩に入ったら戻す。下げた優先度を
+戻す権限がない環境（一般ユーザーの Linux など）では、休憩中に動画がもたつかないよう下げない。
+レンダラーの RSS と CPU 使用率はフェーズごとに集計する。
+"""
+import logging
+import os
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from PyQt5 import QtCore, QtWidgets
+
+import metrics
+from process_stats import process_usage
+from youtube_player import LifecycleState, PLAYING
+
+DEFAULT_FREEZE_AFTER = 60
+DEFAULT_DISCARD_AFTER = 15 * 60
+CHECK_INTERVAL_MS = 5000
+LOW_PRIORITY_NICE = 10
+_CAP_SYS_NICE = 23
+# プレイヤーを隠してよいフェーズ（休憩中は画面を見ているかもしれないので隠さない）
+BACKGROUND_PHASES = ("work", "idle")
+
+RENDERER_RSS = metrics.gauge("pomodoro_renderer_rss_bytes", "プレイヤーのレンダラープロセスの常駐メモリ", ("phase",))
+RENDERER_CPU = metrics.gauge("pomodoro_renderer_cpu_ratio", "プレイヤーのレンダラープロセスの CPU 使用率", ("phase",))
+PAGE_TRANSITIONS = metrics.counter("pomodoro_page_lifecycle_transitions_total",
+                                   "プレイヤーページの凍結・破棄・再開の回数", ("state",))
+
+
+def priority_restorable() -> bool:
+    """下げた優先度を通常（nice 0）に戻せるか
+
+    Windows は優先度クラスを自由に戻せる。Unix では root か CAP_SYS_NICE があるか、
+    RLIMIT_NICE で nice 0 まで戻すことが許されている場合だけ戻せる。
+    """
+    if sys.platform == "win32":
+        return True
+    if not hasattr(os, "setpriority"):
+        return False
+    if os.geteuid() == 0:
+        return True
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("CapEff:"):
+                    if int(line.split()[1], 16) & (1 << _CAP_SYS_NICE):
+                        return True
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    except (ImportError, AttributeError, OSError, ValueError):
+        return False
+    # 一般ユーザーが設定できる nice の下限は 20 - RLIMIT_NICE
+    return soft == resource.RLIM_INFINITY or 20 - soft <= 0
+
+
+def set_process_priority(pid: int, low: bool) -> bool:
+    """プロセスの優先度を下げる（low=False で通常に戻す）
+
+    Linux では一般ユーザーが下げた優先度を元に戻せない。権限がなくて変更できないときは
+    PermissionError を送出し、それ以外の理由で変更できなければ False を返す。
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            if sys.platform == "win32":
+                process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if low else psutil.NORMAL_PRIORITY_CLASS)
+            else:
+                process.nice(LOW_PRIORITY_NICE if low else 0)
+            return True
+        if hasattr(os, "setpriority"):
+            os.setpriority(os.PRIO_PROCESS, pid, LOW_PRIORITY_NICE if low else 0)
+            return True
+    except PermissionError:
+        raise
+    except Exception as e:
+        if psutil is not None and isinstance(e, psutil.AccessDenied):
+            raise PermissionError(str(e)) from e
+        logging.info(f"レンダラー（pid {pid}）の優先度を変更できません: {e}")
+    return False
+
+
+class _PhaseUsage:
+    __slots__ = ("samples", "rss_total", "rss_max", "cpu_seconds", "wall_seconds")
+
+    def __init__(self):
+        self.samples = 0
+        self.rss_total = 0.0
+        self.rss_max = 0.0
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "rss_mb_avg": self.rss_total / self.samples if self.samples else 0.0,
+            "rss_mb_max": self.rss_max,
+            "cpu_percent": self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0,
+            "seconds": self.wall_seconds,
+        }
+
+
+class PageLifecycleManager(QtCore.QObject):
+    def __init__(self, stack: QtWidgets.QStackedWidget, prefetcher,
+                 freeze_after: float = DEFAULT_FREEZE_AFTER,
+                 discard_after: float = DEFAULT_DISCARD_AFTER,
+                 check_interval_ms: int = CHECK_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.stack = stack
+        self.prefetcher = prefetcher
+        self.freeze_after = freeze_after
+        self.discard_after = discard_after
+        self.phase = "idle"
+        self.enabled = LifecycleState is not None
+        if not self.enabled:
+            logging.info("QtWebEngine が古いため、プレイヤーページの凍結・破棄は行いません")
+        self.placeholder = QtWidgets.QPushButton("プレイヤーは休止中です（クリックで再開）")
+        self.placeholder.clicked.connect(self.expand)
+        stack.addWidget(self.placeholder)
+        # id(player) -> 動画が止まった時刻（再生中は None）
+        self._idle_since: Dict[int, Optional[float]] = {}
+        self._watched = set()
+        self._low_priority: Dict[int, bool] = {}
+        # 権限がなくて優先度を変更できなかったレンダラー（以後は変更を試みない）
+        self._priority_denied = set()
+        self.priority_enabled = priority_restorable()
+        if not self.priority_enabled:
+            logging.info("下げた優先度を戻す権限がないため、作業中もレンダラーの優先度は下げません")
+        self._last_cpu: Dict[int, Tuple[float, float]] = {}
+        self.usage: Dict[str, _PhaseUsage] = {}
+        self._check_timer = QtCore.QTimer(self)
+        self._check_timer.timeout.connect(self.check)
+        self._check_timer.start(check_interval_ms)
+
+    # --- フェーズ ---
+
+    def set_phase(self, phase: str):
+        """"work" / "short_break" / "long_break" / "idle"（タイマー停止中）"""
+        if phase == self.phase:
+            return
+        self.sample()
+        if self.phase in self.usage:
+            logging.info(f"レンダラー使用量（{self.phase}）: {self.usage[self.phase].as_dict()}")
+        self.phase = phase
+        self.apply_priority()
+        if phase not in BACKGROUND_PHASES:
+            self.expand()
+
+    def apply_priority(self):
+        if not self.priority_enabled:
+            return
+        low = self.phase in BACKGROUND_PHASES
+        for pid in self.renderer_pids():
+            if pid in self._priority_denied or self._low_priority.get(pid) == low:
+                continue
+            try:
+                if set_process_priority(pid, low):
+                    self._low_priority[pid] = low
+            except PermissionError as e:
+                self._priority_denied.add(pid)
+                logging.info(f"レンダラー（pid {pid}）の優先度を変更する権限がないため、以後は変更しません: {e}")
+
+    # --- 凍結・破棄 ---
+
+    @property
+    def collapsed(self) -> bool:
+        return self.stack.currentWidget() is self.placeholder
+
+    def collapse(self):
+        """表示中のプレイヤーをプレースホルダーに差し替える（ページを凍結できるようにする）"""
+        if not self.collapsed:
+            self.stack.setCurrentWidget(self.placeholder)
+
+    def expand(self):
+        """表示中のプレイヤーを戻して再開する"""
+        active = self.prefetcher.active
+        active.wake()
+        if self.collapsed:
+            self.stack.setCurrentWidget(active.web_view)
+            PAGE_TRANSITIONS.labels("expand").inc()
+
+    def check(self):
+        """定期的に呼ばれ、止まったままのページを凍結・破棄する"""
+        self.sample()
+        # 後から起動したレンダラーにも優先度を反映する
+        self.apply_priority()
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        active = self.prefetcher.active
+        for player in self.prefetcher.players():
+            self._watch(player)
+            key = id(player)
+            if player.is_playing:
+                self._idle_since[key] = None
+                continue
+            if self._idle_since.get(key) is None:
+                self._idle_since[key] = now
+            idle = now - self._idle_since[key]
+            if idle < self.freeze_after:
+                continue
+            if player is active:
+                if self.phase not in BACKGROUND_PHASES:
+                    continue
+                self.collapse()
+            if idle >= self.discard_after and not self.prefetcher.is_warming(player):
+                self._transition(player, LifecycleState.Discarded, "discarded")
+            else:
+                self._transition(player, LifecycleState.Frozen, "frozen")
+
+    def _transition(self, player, state, label: str):
+        if player.lifecycle_state == state:
+            return
+        if player.set_lifecycle_state(state):
+            PAGE_TRANSITIONS.labels(label).inc()
+            logging.info(f"プレイヤーページを{'破棄' if label == 'discarded' else '凍結'}しました: "
+                         f"{player.current_video_id or '-'}")
+
+    def _watch(self, player):
+        if id(player) in self._watched:
+            return
+        self._watched.add(id(player))
+        player.stateChanged.connect(lambda state, video_id, p=player: self._on_state(p, state))
+
+    def _on_state(self, player, state: int):
+        if state == PLAYING:
+            self._idle_since[id(player)] = None
+            # 表示中のプレイヤーが再生を始めたら（動画の読み込みなど）隠したままにしない
+            if player is self.prefetcher.active and self.collapsed:
+                self.expand()
+            self.apply_priority()
+        elif self._idle_since.get(id(player)) is None:
+            self._idle_since[id(player)] = time.monotonic()
+
+    # --- 計測 ---
+
+    def renderer_pids(self):
+        pids = set()
+        for player in self.prefetcher.players():
+            pid = player.page.renderProcessPid() if hasattr(player.page, "renderProcessPid") else 0
+            if pid > 0:
+                pids.add(pid)
+        return pids
+
+    def sample(self):
+        """レンダラーの RSS と前回からの CPU 時間を現在のフェーズに加算する"""
+        now = time.monotonic()
+        usage = self.usage.setdefault(self.phase, _PhaseUsage())
+        rss_total = 0.0
+        cpu_delta = 0.0
+        wall_delta = 0.0
+        measured = False
+        for pid in self.renderer_pids():
+            result = process_usage(pid)
+            if result is None:
+                continue
+            rss, cpu = result
+            measured = True
+            rss_total += rss
+            last = self._last_cpu.get(pid)
+            if last is not None:
+                cpu_delta += cpu - last[1]
+                wall_delta = max(wall_delta, now - last[0])
+            self._last_cpu[pid] = (now, cpu)
+        if not measured:
+            return
+        usage.samples += 1
+        usage.rss_total += rss_total
+        usage.rss_max = max(usage.rss_max, rss_total)
+        usage.cpu_seconds += cpu_delta
+        usage.wall_seconds += wall_delta
+        RENDERER_RSS.labels(self.phase).set(rss_total * 1024 * 1024)
+        if wall_delta:
+            RENDERER_CPU.labels(self.phase).set(cpu_delta / wall_delta)
+
+    def report(self) -> Dict[str, dict]:
+        """フェーズごとのレンダラーの RSS（MB）と CPU 使用率（%）"""
+        return {phase: usage.as_dict() for phase, usage in self.usage.items()}
+
+    def stop(self):
+        self._check_timer.stop()
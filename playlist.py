@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""フェーズごとの再生リスト（作業用・休憩用）
+
+短休憩と長休憩は同じ「break」のリストを使う。リストの最後まで進んだら先頭に戻る。
+"""
+from typing import Dict, Iterable, List, Optional
+
+WORK = "work"
+BREAK = "break"
+KINDS = (WORK, BREAK)
+
+
+def kind_of(phase: str) -> str:
+    """"work" / "short_break" / "long_break" を再生リストの種類に変換する"""
+    return WORK if phase == WORK else BREAK
+
+
+class PhasePlaylist:
+    def __init__(self, queues: Optional[Dict[str, Iterable[str]]] = None):
+        self.queues: Dict[str, List[str]] = {kind: [] for kind in KINDS}
+        self.positions: Dict[str, int] = {kind: 0 for kind in KINDS}
+        for kind, video_ids in (queues or {}).items():
+            if kind in self.queues:
+                self.queues[kind] = list(video_ids)
+
+    def add(self, kind: str, video_id: str):
+        self.queues[kind].append(video_id)
+
+    def remove(self, kind: str, video_id: str):
+        queue = self.queues[kind]
+        if video_id in queue:
+            index = queue.index(video_id)
+            queue.pop(index)
+            if index < self.positions[kind]:
+                self.positions[kind] -= 1
+
+    def clear(self, kind: str):
+        self.queues[kind].clear()
+        self.positions[kind] = 0
+
+    def peek(self, kind: str) -> Optional[str]:
+        """次に再生する動画（進めない）"""
+        queue = self.queues[kind]
+        if not queue:
+            return None
+        return queue[self.positions[kind] % len(queue)]
+
+    def advance(self, kind: str) -> Optional[str]:
+        """次に再生する動画を返し、位置を1つ進める"""
+        video_id = self.peek(kind)
+        if video_id is not None:
+            self.positions[kind] = (self.positions[kind] + 1) % len(self.queues[kind])
+        return video_id
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {kind: list(queue) for kind, queue in self.queues.items()}
+
@@ -1,80 +1,60 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-import re
 import time
 import threading
 from typing import Optional
 from pytube import YouTube
 from datetime import datetime, timedelta, timezone
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import pyperclip
-import winsound
-
-# ロギングの設定
-logging.basicConfig(
-    filename='pomodoro.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-class TimerError(Exception):
-    """タイマー関連のカスタムエラー"""
-    pass
-
-class Timer:
-    def __init__(self, duration: int = 25 * 60):
-        self.duration = duration
-        self.start_time: Optional[float] = None
-        self.is_active: bool = False
-        self.pause_time: Optional[float] = None
-        self.total_pause_time: float = 0
+from timer_core import DeadlineTimer, PhaseCycle, TimerError
+from clock import TkClock
+from youtube_id import extract_video_id
+from driver_pool import (WebDriverPool, wait_for_first_frame, audio_only_driver_factory,
+                         AUDIO_ONLY_SCRIPT, STOP_SCRIPT)
+from video_metadata import VideoMetadataStore
+from history_store import HistoryStore
+from log_stats import LogStats
+from log_pipeline import setup_logging
+from frame_scheduler import FrameScheduler
+from sound import SoundPlayer
+from state_snapshot import StateSnapshot, capture
+import metrics
+
+PLAY_VIDEO = metrics.histogram("pomodoro_play_video_seconds", "動画の再生開始までにかかった時間", ("start",))
+FIRST_FRAME = metrics.histogram("pomodoro_first_frame_seconds", "最初のフレームが描画されるまでの時間", ("start",))
+
+class Timer(DeadlineTimer):
+    """ポモドーロの状態を持つタイマー（残り時間は締め切りから計算する）"""
+
+    def __init__(self, duration: int = 25 * 60, clock=time.monotonic):
+        super().__init__(duration, clock)
         self.sync_with_video: bool = False
-        self.pomodoro_count: int = 0
-        self.is_break: bool = False
-
-    def start(self):
-        if self.is_active:
-            raise TimerError("タイマーは既に動作中です")
-        self.start_time = time.time()
-        self.is_active = True
-        self.total_pause_time = 0
-
-    def stop(self):
-        if not self.is_active:
-            raise TimerError("タイマーは動作していません")
-        self.is_active = False
-        self.start_time = None
-        self.pause_time = None
-
-    def pause(self):
-        if not self.is_active:
-            raise TimerError("タイマーは動作していません")
-        if self.pause_time:
-            raise TimerError("タイマーは既に一時停止中です")
-        self.pause_time = time.time()
-
-    def resume(self):
-        if not self.is_active:
-            raise TimerError("タイマーは動作していません")
-        if not self.pause_time:
-            raise TimerError("タイマーは一時停止されていません")
-        pause_duration = time.time() - self.pause_time
-        self.total_pause_time += pause_duration
-        self.pause_time = None
+        # 作業 → 短休憩 →（4回ごとに長休憩）のフェーズ遷移
+        self.cycle = PhaseCycle()
+
+    @property
+    def pomodoro_count(self) -> int:
+        return self.cycle.pomodoro_count
+
+    @pomodoro_count.setter
+    def pomodoro_count(self, value: int):
+        self.cycle.pomodoro_count = value
+
+    @property
+    def is_break(self) -> bool:
+        return self.cycle.is_break
+
+    @is_break.setter
+    def is_break(self, value: bool):
+        self.cycle.is_break = value
 
     def get_time_remaining(self) -> float:
-        if not self.is_active:
-            return self.duration
-        elapsed_time = time.time() - self.start_time - self.total_pause_time
-        if self.pause_time:
-            elapsed_time -= time.time() - self.pause_time
-        return max(self.duration - elapsed_time, 0)
+        return self.remaining()
 
 class PomodoroApp:
     def __init__(self, master):
@@ -82,11 +62,54 @@ class PomodoroApp:
         self.master.title("ポモドーロタイマー")
         self.master.geometry("500x400")
 
-        self.timer = Timer()
+        # タイマーと after の連鎖が使う時計（テストでは SimulatedClock に差し替える）
+        self.clock = TkClock(master)
+        self.timer = Timer(clock=self.clock.monotonic)
         self.video_thread = None
         self.driver = None
+        self.driver_pool = WebDriverPool(size=1)
+        # 音声のみモード用のヘッドレス Chrome（使うときに起動する）
+        self.audio_driver_pool = WebDriverPool(factory=audio_only_driver_factory, size=1)
+        # 再生中の動画が音声のみモードか（再生していなければ None）
+        self.playing_audio_only: Optional[bool] = None
+        self.metadata_store = VideoMetadataStore()
+        self.history = HistoryStore()
+        self.log_stats = LogStats()
+        self.sound = SoundPlayer()
+        # 状態遷移のたびに書き、異常終了後の起動時に復元する
+        self.state_snapshot = StateSnapshot()
+        self.phase_started_at: Optional[float] = None
+        self.current_video_id: Optional[str] = None
+        self._after_id = None
+        self._scheduled_wakeup: Optional[float] = None
 
         self.create_widgets()
+        self.setup_frame_scheduler()
+        self.restore_state()
+
+    def setup_frame_scheduler(self):
+        """表示の更新は秒境界に揃えたフレームでまとめて行う（タイマー終了の判定とは別）"""
+        self.frames = FrameScheduler(lambda delay_ms: self.master.after(delay_ms, self.frames.run_frame),
+                                     self.master.after_cancel)
+        self.frames.add(self.render_timer_text, lambda text: self.timer_label.config(text=text))
+        self.master.bind("<Unmap>", self.on_visibility_changed)
+        self.master.bind("<Map>", self.on_visibility_changed)
+        self.master.after(60 * 1000, self.report_frame_stats)
+        self.frames.start()
+
+    def render_timer_text(self, now: float) -> str:
+        minutes, seconds = divmod(self.timer.display_seconds(), 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+    def on_visibility_changed(self, event):
+        if event.widget is self.master:
+            self.frames.set_visible(self.master.state() not in ("iconic", "withdrawn"))
+
+    def report_frame_stats(self):
+        stats = self.frames.stats()
+        logging.info(f"画面更新: 起床 {stats['wakeups_per_minute']}回/分, "
+                     f"再描画 {stats['repaints_per_minute']}回/分")
+        self.master.after(60 * 1000, self.report_frame_stats)
 
     def create_widgets(self):
         style = ttk.Style()
@@ -107,6 +130,9 @@ class PomodoroApp:
         self.reset_button = ttk.Button(self.button_frame, text="リセット", command=self.reset_timer)
         self.reset_button.grid(row=0, column=2, padx=5)
 
+        self.stats_button = ttk.Button(self.button_frame, text="統計", command=self.show_stats)
+        self.stats_button.grid(row=0, column=3, padx=5)
+
         self.url_frame = ttk.Frame(self.master)
         self.url_frame.pack(pady=10)
 
@@ -123,10 +149,24 @@ class PomodoroApp:
         self.sync_checkbox = ttk.Checkbutton(self.master, text="動画と同期", variable=self.sync_var, command=self.toggle_sync_with_video)
         self.sync_checkbox.pack(pady=5)
 
+        self.audio_frame = ttk.Frame(self.master)
+        self.audio_frame.pack(pady=5)
+        self.audio_only_vars = {"work": tk.BooleanVar(), "break": tk.BooleanVar()}
+        ttk.Checkbutton(self.audio_frame, text="作業中は音声のみ", variable=self.audio_only_vars["work"],
+                        command=self.apply_audio_mode).grid(row=0, column=0, padx=5)
+        ttk.Checkbutton(self.audio_frame, text="休憩中は音声のみ", variable=self.audio_only_vars["break"],
+                        command=self.apply_audio_mode).grid(row=0, column=1, padx=5)
+
     def start_timer(self):
         try:
-            self.timer.start()
-            logging.info("タイマーが開始されました")
+            if self.timer.is_paused:
+                self.timer.resume()
+                logging.info("タイマーが再開されました")
+            else:
+                self.timer.start()
+                self.phase_started_at = self.clock.time()
+                logging.info("タイマーが開始されました")
+            self.save_state()
             self.update_timer()
             self.start_button.config(state="disabled")
             self.pause_button.config(state="normal")
@@ -138,6 +178,8 @@ class PomodoroApp:
         try:
             self.timer.pause()
             logging.info("タイマーが一時停止されました")
+            self.save_state()
+            self.update_timer()
             self.start_button.config(state="normal")
             self.pause_button.config(state="disabled")
         except TimerError as e:
@@ -147,8 +189,11 @@ class PomodoroApp:
     def reset_timer(self):
         try:
             self.timer.stop()
-            self.timer = Timer()
+            self.timer = Timer(clock=self.clock.monotonic)
+            self._scheduled_wakeup = None
+            self.phase_started_at = None
             logging.info("タイマーがリセットされました")
+            self.save_state()
             self.update_timer()
             self.start_button.config(state="normal")
             self.pause_button.config(state="disabled")
@@ -157,27 +202,114 @@ class PomodoroApp:
             messagebox.showerror("エラー", str(e))
 
     def update_timer(self):
-        remaining_time = self.timer.get_time_remaining()
-        minutes, seconds = divmod(int(remaining_time), 60)
-        self.timer_label.config(text=f"{minutes:02d}:{seconds:02d}")
+        if self._after_id is not None:
+            self.clock.cancel(self._after_id)
+            self._after_id = None
+        now = self.timer.clock()
+        if self._scheduled_wakeup is not None:
+            self.timer.drift.record(self._scheduled_wakeup, now)
+            self._scheduled_wakeup = None
+        remaining_time = self.timer.remaining(now)
+        self.frames.refresh()
         if self.timer.is_active and remaining_time > 0:
-            self.master.after(1000, self.update_timer)
+            # 表示は FrameScheduler が更新するので、ここでは締め切りにだけ起床する
+            # （一時停止中は起床しない）
+            wakeup = self.timer.deadline
+            if wakeup is not None:
+                self._scheduled_wakeup = wakeup
+                self._after_id = self.clock.call_later(wakeup - now, self.update_timer)
         elif self.timer.is_active and remaining_time == 0:
-            self.timer.is_active = False
-            self.timer.pomodoro_count += 1
+            finished = self.timer.cycle.phase
+            logging.info(f"タイマードリフト: {self.timer.drift}")
+            logging.info(f"フェーズが終了しました: {finished}")
+            self.timer.stop()
+            if self.phase_started_at is not None:
+                self.history.record(finished, self.phase_started_at, self.clock.time(),
+                                    video_id=self.current_video_id or "")
             self.play_sound()
-            if not self.timer.is_break:
-                messagebox.showinfo("ポモドーロ", "作業時間が終了しました。休憩しましょう！")
-                self.timer.duration = 5 * 60  # 5分休憩
-                self.timer.is_break = True
+            self.timer.cycle.advance()
+            self.timer.duration = self.timer.cycle.duration
+            if finished == PhaseCycle.WORK:
+                message = ("作業時間が終了しました。長めの休憩を取りましょう！" if self.timer.cycle.is_long_break
+                           else "作業時間が終了しました。休憩しましょう！")
             else:
-                messagebox.showinfo("ポモドーロ", "休憩時間が終了しました。作業を再開しましょう！")
-                self.timer.duration = 25 * 60  # 25分作業
-                self.timer.is_break = False
+                message = "休憩時間が終了しました。作業を再開しましょう！"
+            # ダイアログを閉じる前に落ちても、次のフェーズの手前から再開できるようにする
+            self.phase_started_at = None
+            self.save_state()
+            self.apply_audio_mode()
+            # 統計画面を開いたときに読む量を減らすため、フェーズごとにログを読み進めておく
+            threading.Thread(target=self.log_stats.update, daemon=True).start()
+            messagebox.showinfo("ポモドーロ", message)
             self.start_timer()
 
+    def save_state(self):
+        """現在のタイマー状態をスナップショットに書く（状態遷移のときだけ呼ぶ）"""
+        self.state_snapshot.write(capture(self.timer, self.timer.cycle.phase,
+                                          self.timer.pomodoro_count, self.timer.is_break,
+                                          phase_started_at=self.phase_started_at,
+                                          video_id=self.current_video_id or ""))
+
+    def restore_state(self):
+        """前回終了時（または異常終了の直前）のタイマー状態に戻す"""
+        snapshot = self.state_snapshot.read()
+        if snapshot is None:
+            return
+        self.timer.duration = snapshot.duration
+        self.timer.pomodoro_count = snapshot.pomodoro_count
+        self.timer.is_break = snapshot.is_break
+        self.timer.cycle.is_long_break = snapshot.phase == PhaseCycle.LONG_BREAK
+        self.phase_started_at = snapshot.phase_started_at or None
+        self.current_video_id = snapshot.video_id or None
+        if snapshot.is_active:
+            self.timer.restore(snapshot.remaining(), paused=snapshot.is_paused)
+            self.start_button.config(state="normal" if snapshot.is_paused else "disabled")
+            self.pause_button.config(state="disabled" if snapshot.is_paused else "normal")
+        logging.info(f"前回のタイマー状態を復元しました: {snapshot.phase} 残り {snapshot.remaining():.1f}秒")
+        # 締め切りを過ぎていれば、ウィンドウが表示されてからフェーズが切り替わる
+        self.master.after_idle(self.update_timer)
+
     def play_sound(self):
-        winsound.PlaySound("SystemHand", winsound.SND_ALIAS)
+        self.sound.play("work")
+
+    def show_stats(self):
+        """日別・週別の集計を表示する（保存済みの要約を表示し、追記分を少しずつ読む）"""
+        window = tk.Toplevel(self.master)
+        window.title("統計")
+        columns = ("focus", "pomodoros", "interruptions", "videos")
+        headings = ("集中（分）", "ポモドーロ", "中断", "動画")
+        tables = {}
+        for kind, title in (("days", "日別（直近7日）"), ("weeks", "週別（直近4週）")):
+            ttk.Label(window, text=title).pack(anchor="w", padx=10, pady=(10, 0))
+            table = ttk.Treeview(window, columns=columns, height=7 if kind == "days" else 4)
+            table.heading("#0", text="日付" if kind == "days" else "週")
+            table.column("#0", width=100)
+            for column, heading in zip(columns, headings):
+                table.heading(column, text=heading)
+                table.column(column, width=80, anchor="e")
+            table.pack(padx=10, pady=5)
+            tables[kind] = table
+
+        def render():
+            for kind, rows in (("days", self.log_stats.recent_days(7)), ("weeks", self.log_stats.recent_weeks(4))):
+                table = tables[kind]
+                table.delete(*table.get_children())
+                for key, values in rows:
+                    table.insert("", "end", text=key, values=(round(values["focus_seconds"] / 60),
+                                                              values["pomodoros"], values["interruptions"],
+                                                              values["videos"]))
+
+        def catch_up():
+            if not window.winfo_exists():
+                return
+            consumed = self.log_stats.update(max_bytes=1024 * 1024, blocking=False)
+            if consumed:
+                render()
+            if consumed is None or consumed:
+                window.after(10, catch_up)
+
+        render()
+        window.after(10, catch_up)
 
     def paste_url(self):
         self.url_entry.delete(0, tk.END)
@@ -194,7 +326,17 @@ class PomodoroApp:
             if not video_id:
                 raise ValueError("無効なYouTube URLです")
             video_url = f"https://www.youtube.com/watch?v={video_id}"
-            self.video_thread = threading.Thread(target=self.play_youtube_video, args=(video_url,))
+            self.current_video_id = video_id
+            synced = False
+            if self.timer.sync_with_video:
+                # 一度見た動画はキャッシュした長さで、ブラウザを待たずにタイマーを開始する
+                cached_duration = self.metadata_store.get_duration(video_id)
+                if cached_duration:
+                    self.timer.duration = cached_duration
+                    self.start_timer()
+                    synced = True
+            self.video_thread = threading.Thread(target=self.play_youtube_video,
+                                                 args=(video_url, video_id, synced, self.audio_only_for_phase()))
             self.video_thread.start()
         except ValueError as ve:
             logging.error(f"動画再生エラー: {str(ve)}")
@@ -204,19 +346,52 @@ class PomodoroApp:
             messagebox.showerror("エラー", "動画の再生中にエラーが発生しました")
 
     def extract_video_id(self, url: str) -> Optional[str]:
-        youtube_regex = (
-            r'(https?://)?(www\.)?'
-            '(youtube|youtu|youtube-nocookie)\.(com|be)/'
-            '(watch\?v=|embed/|v/|.+\?v=)?([^&=%\?]{11})'
-        )
-        match = re.match(youtube_regex, url)
-        return match.group(6) if match else None
-
-    def play_youtube_video(self, url):
+        return extract_video_id(url.strip())
+
+    def audio_only_for_phase(self) -> bool:
+        return self.audio_only_vars["break" if self.timer.is_break else "work"].get()
+
+    def apply_audio_mode(self):
+        """現在のフェーズの設定と再生中のモードが違えば、同じ位置から別のブラウザで再生し直す"""
+        audio_only = self.audio_only_for_phase()
+        if self.current_video_id is None or self.playing_audio_only in (None, audio_only):
+            return
+        self.video_thread = threading.Thread(target=self.switch_audio_mode, args=(audio_only,))
+        self.video_thread.start()
+
+    def switch_audio_mode(self, audio_only: bool):
+        previous_pool = self.driver_pool if audio_only else self.audio_driver_pool
+        position = self.stop_playback(previous_pool)
+        logging.info(f"{'音声のみ' if audio_only else '通常'}モードに切り替えます（{position:.0f}秒から）")
+        self.play_youtube_video(f"https://www.youtube.com/watch?v={self.current_video_id}",
+                                self.current_video_id, synced=True, audio_only=audio_only,
+                                start_at=position)
+
+    def stop_playback(self, pool) -> float:
+        """pool のブラウザで再生中の動画を止め、止めた位置を返す"""
+        if pool.idle_count == 0:
+            return 0.0
+        try:
+            with pool.session(timeout=5) as pooled:
+                position = pooled.driver.execute_script(STOP_SCRIPT) or 0.0
+                pooled.driver.get("about:blank")
+                return float(position)
+        except Exception as e:
+            logging.warning(f"再生中の動画を止められません: {e}")
+            return 0.0
+
+    def play_youtube_video(self, url, video_id=None, synced=False, audio_only=False, start_at=0.0):
+        healthy = True
+        pooled = None
+        pool = self.audio_driver_pool if audio_only else self.driver_pool
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--autoplay-policy=no-user-gesture-required")
-            self.driver = webdriver.Chrome(options=chrome_options)
+            pooled = pool.acquire()
+            self.driver = pooled.driver
+            cold = pooled.is_cold
+            started = time.perf_counter()
+            if start_at >= 1:
+                url = f"{url}&t={int(start_at)}s"
+            # 起動済みのセッションでは新しい動画へページ遷移するだけ
             self.driver.get(url)
 
             WebDriverWait(self.driver, 20).until(
@@ -230,25 +405,44 @@ class PomodoroApp:
                 play_button.click()
             except (TimeoutException, NoSuchElementException):
                 logging.warning("再生ボタンが見つからないか、クリックできません")
+            if audio_only:
+                self.driver.execute_script(AUDIO_ONLY_SCRIPT)
+
+            first_frame = wait_for_first_frame(self.driver, timeout=10, since=started)
+            start_kind = "cold" if cold else "warm"
+            if first_frame is not None:
+                FIRST_FRAME.labels(start_kind).observe(first_frame)
+                logging.info(f"最初のフレームまで {first_frame:.2f}s ({start_kind})")
+            else:
+                logging.warning("最初のフレームの描画を確認できませんでした")
 
-            if self.timer.sync_with_video:
+            video_duration = self.metadata_store.get_duration(video_id) if video_id else None
+            if video_duration is None:
                 video_duration = self.get_video_duration()
-                if video_duration:
-                    self.timer.duration = video_duration
-                    self.start_timer()
+            if video_id:
+                # 長さとタイトルを保存し、次回以降はブラウザを待たずに同期できるようにする
+                self.metadata_store.put(video_id, duration=video_duration, title=self.driver.title or None)
+
+            if self.timer.sync_with_video and not synced and video_duration:
+                self.timer.duration = video_duration
+                self.start_timer()
 
-            logging.info(f"動画が再生されました: {url}")
+            PLAY_VIDEO.labels(start_kind).observe(time.perf_counter() - started)
+            self.playing_audio_only = audio_only
+            logging.info(f"動画が再生されました: {url}{'（音声のみ）' if audio_only else ''}")
 
         except WebDriverException as e:
+            healthy = False
             logging.error(f"WebDriverエラー: {str(e)}")
             messagebox.showerror("エラー", f"ブラウザの操作中にエラーが発生しました: {str(e)}")
         except Exception as e:
             logging.error(f"動画再生エラー: {str(e)}")
             messagebox.showerror("エラー", f"動画の再生中にエラーが発生しました: {str(e)}")
         finally:
-            if self.driver:
-                self.driver.quit()
-                self.driver = None
+            # セッションは終了せずプールに戻し、次の動画で再利用する
+            if pooled is not None:
+                pool.release(pooled, healthy)
+            self.driver = None
 
     def get_video_duration(self):
         try:
@@ -268,11 +462,17 @@ class PomodoroApp:
         return None
 
     def on_closing(self):
-        if self.driver:
-            self.driver.quit()
+        self.sound.close()
+        self.driver_pool.close()
+        self.audio_driver_pool.close()
+        self.metadata_store.close()
+        self.history.close()
+        self.state_snapshot.close()
         self.master.quit()
 
 if __name__ == "__main__":
+    # ロギングの設定（書き込みとローテートはバックグラウンドのスレッドで行う）
+    setup_logging(filename='pomodoro.log', trim_records=True)
     root = tk.Tk()
     app = PomodoroApp(root)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+"""GUI なしで動くポモドーロ（端末・デーモン用）
+
+Qt / Tk / WebEngine は import せず、timer_core の PhaseCycle と DeadlineTimer で
+「作業 → 休憩（4回ごとに長休憩）」のサイクルを回す。asyncio も使わず、
+制御ソケットの待ち受けと次の締め切りまでの待機を1つの select で行うため、
+タイマーが止まっている間は一度も起床しない。
+操作はローカルの Unix ソケットに1行1件の JSON を送って行う。
+
+    python pomodoro_cli.py serve             # フォアグラウンドで起動（フェーズ遷移を表示）
+    python pomodoro_cli.py serve --detach    # バックグラウンドで起動
+    python pomodoro_cli.py start
+    python pomodoro_cli.py status
+    python pomodoro_cli.py add "資料を読む"
+    python pomodoro_cli.py select 3
+    python pomodoro_cli.py shutdown
+    python pomodoro_cli.py simulate --cycles 1000   # 仮想時間で早送り（デーモン不要）
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from history_store import HistoryStore
+from task_store import TaskStore
+from timer_core import DeadlineTimer, PhaseCycle, TimerError, Transition
+
+DEFAULT_SOCKET = os.environ.get("POMODORO_SOCKET", os.path.join("pomodoro_data", "pomodoro.sock"))
+# ヘッドレス版では読み込まれないはずのモジュール
+HEAVY_MODULES = ("PyQt5", "tkinter", "selenium", "asyncio")
+
+PHASE_LABELS = {
+    PhaseCycle.WORK: "作業",
+    PhaseCycle.SHORT_BREAK: "短休憩",
+    PhaseCycle.LONG_BREAK: "長休憩",
+}
+
+
+class CommandError(Exception):
+    """ソケット経由のコマンドが不正"""
+    pass
+
+
+def format_time(seconds: float) -> str:
+    minutes, seconds = divmod(math.ceil(seconds - 1e-6), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def max_rss_mb() -> Optional[float]:
+    """このプロセスの最大常駐メモリ（MB）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト単位
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class PomodoroDaemon:
+    def __init__(self, durations: Dict[str, float], tasks: TaskStore, history: HistoryStore,
+                 notify: Optional[Callable[[str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time,
+                 on_transition: Optional[Callable[[Transition], None]] = None):
+        self.tasks = tasks
+        self.history = history
+        self.notify = notify
+        self.on_transition = on_transition
+        self.cycle = PhaseCycle(**durations)
+        self.timer = DeadlineTimer(self.cycle.duration, clock)
+        self.wall_clock = wall_clock
+        self.transitions = 0
+        self.current_task_id: Optional[int] = None
+        self.task_title = ""
+        self.phase_started_at: Optional[float] = None
+        self.started_at = wall_clock()
+        self.shutdown_requested = False
+        self.commands: Dict[str, Callable] = {
+            "status": self.status,
+            "start": self.start,
+            "pause": self.pause,
+            "resume": self.resume,
+            "stop": self.stop,
+            "skip": self.skip,
+            "tasks": self.list_tasks,
+            "add": self.add_task,
+            "done": self.done_task,
+            "select": self.select_task,
+            "info": self.info,
+            "shutdown": self.shutdown,
+        }
+
+    # --- コマンド ---
+
+    def dispatch(self, cmd: str, args: List[str]):
+        command = self.commands.get(cmd)
+        if command is None:
+            raise CommandError(f"不明なコマンドです: {cmd}")
+        return command(*args)
+
+    def status(self) -> dict:
+        return {
+            "phase": self.cycle.phase,
+            "is_break": self.cycle.is_break,
+            "pomodoro_count": self.cycle.pomodoro_count,
+            "is_active": self.timer.is_active,
+            "is_paused": self.timer.is_paused,
+            "remaining": self.timer.remaining(),
+            "task": self.task_title,
+            "task_id": self.current_task_id,
+        }
+
+    def start(self) -> dict:
+        if self.timer.is_paused:
+            return self.resume()
+        self.timer.start()
+        self.phase_started_at = self.wall_clock()
+        return self.status()
+
+    def pause(self) -> dict:
+        self.timer.pause()
+        return self.status()
+
+    def resume(self) -> dict:
+        self.timer.resume()
+        return self.status()
+
+    def stop(self) -> dict:
+        """タイマーを止めて現在のフェーズの最初に戻す（完了数は残す）"""
+        self.timer.stop()
+        self.phase_started_at = None
+        return self.status()
+
+    def skip(self) -> dict:
+        """現在のフェーズを途中で終わらせて次のフェーズに進む"""
+        now = self.timer.clock()
+        self._advance(now, now if self.timer.is_active else None)
+        return self.status()
+
+    def list_tasks(self, query: str = "") -> List[dict]:
+        tasks = (self.tasks.get(task_id) for task_id in self.tasks.search(query))
+        return [{"id": task.id, "title": task.title, "done": task.done,
+                 "current": task.id == self.current_task_id}
+                for task in tasks if task is not None]
+
+    def add_task(self, *words: str) -> dict:
+        task = self.tasks.add(" ".join(words))
+        if task is None:
+            raise CommandError("タスク名が空です")
+        return {"id": task.id, "title": task.title}
+
+    def done_task(self, task_id: str) -> dict:
+        task = self._task(task_id)
+        self.tasks.set_done(task.id)
+        if task.id == self.current_task_id:
+            self.select_task(None)
+        return {"id": task.id, "title": task.title}
+
+    def select_task(self, task_id: Optional[str] = None) -> dict:
+        """以降のフェーズを記録するときのタスクを選ぶ（None で解除）"""
+        task = self._task(task_id) if task_id is not None else None
+        self.current_task_id = task.id if task else None
+        self.task_title = task.title if task else ""
+        return self.status()
+
+    def info(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime": self.wall_clock() - self.started_at,
+            "max_rss_mb": max_rss_mb(),
+            "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+            "transitions": self.transitions,
+            "drift": self.timer.drift.as_dict(),
+        }
+
+    def shutdown(self) -> dict:
+        self.shutdown_requested = True
+        return {"shutdown": True}
+
+    def _task(self, task_id):
+        try:
+            task = self.tasks.get(int(task_id))
+        except (TypeError, ValueError):
+            raise CommandError(f"タスクIDが不正です: {task_id}") from None
+        if task is None:
+            raise CommandError(f"タスクが見つかりません: {task_id}")
+        return task
+
+    # --- フェーズ遷移 ---
+
+    def next_timeout(self) -> Optional[float]:
+        """次の締め切りまでの秒数（待つ必要がなければ None）"""
+        if not self.timer.is_active or self.timer.is_paused:
+            return None
+        return max(self.timer.deadline - self.timer.clock(), 0.0)
+
+    def poll(self):
+        """締め切りを過ぎていれば次のフェーズに進める"""
+        timer = self.timer
+        if not timer.is_active or timer.is_paused:
+            return
+        now = timer.clock()
+        if now < timer.deadline:
+            return
+        deadline = timer.deadline
+        timer.drift.record(deadline, now)
+        # 遅延分を持ち越さないよう、前フェーズの締め切りを起点に次の締め切りを決める
+        self._advance(now, deadline)
+
+    def _advance(self, now: float, next_start: Optional[float]):
+        """フェーズを1つ進める。next_start が None なら次のフェーズは開始しない"""
+        ended_at = self.wall_clock()
+        finished = self.cycle.phase
+        if self.timer.is_active:
+            self.timer.stop()
+            if self.phase_started_at is not None:
+                self.history.record(finished, self.phase_started_at, ended_at, task=self.task_title)
+        self.cycle.advance()
+        self.transitions += 1
+        self.timer.duration = self.cycle.duration
+        self.phase_started_at = None
+        if next_start is not None:
+            self.timer.start()
+            self.timer.deadline = next_start + self.timer.duration
+            self.phase_started_at = ended_at
+        logging.info(f"フェーズ遷移: {finished} → {self.cycle.phase} (完了 {self.cycle.pomodoro_count})")
+        if self.on_transition is not None:
+            self.on_transition(Transition(now, ended_at, finished, self.cycle.phase,
+                                          self.cycle.pomodoro_count, self.timer.duration))
+        if self.notify is not None:
+            self.notify(f"{PHASE_LABELS[finished]}終了 → {PHASE_LABELS[self.cycle.phase]} "
+                        f"{format_time(self.timer.remaining(now))}")
+
+    # --- ソケット ---
+
+    def handle(self, conn: socket.socket, buffer: bytearray) -> bool:
+        """読み込み可能になった接続を処理する。接続が閉じたら False"""
+        try:
+            data = conn.recv(65536)
+        except OSError:
+            return False
+        if not data:
+            return False
+        buffer += data
+        while b"\n" in buffer:
+            index = buffer.index(b"\n")
+            line = bytes(buffer[:index])
+            del buffer[:index + 1]
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": self.dispatch(request["cmd"], request.get("args", []))}
+            except (ValueError, KeyError, TypeError, TimerError, CommandError) as e:
+                response = {"ok": False, "error": str(e)}
+            try:
+                conn.sendall(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            except OSError:
+                return False
+        return True
+
+
+def send(socket_path: str, cmd: str, args=(), timeout: float = 5.0):
+    """デーモンにコマンドを1件送り、結果を返す"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"cmd": cmd, "args": list(args)}).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    if not data:
+        raise CommandError("デーモンから応答がありません")
+    response = json.loads(data)
+    if not response["ok"]:
+        raise CommandError(response["error"])
+    return response["result"]
+
+
+def is_running(socket_path: str) -> bool:
+    try:
+        send(socket_path, "info", timeout=1.0)
+        return True
+    except (OSError, CommandError, ValueError):
+        return False
+
+
+def serve(args) -> int:
+    socket_path = args.socket
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            print(f"既に起動しています: {socket_path}", file=sys.stderr)
+            return 1
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+
+    notify = None
+    if not args.quiet:
+        def notify(message):
+            bell = "\a" if sys.stdout.isatty() else ""
+            print(f"{time.strftime('%H:%M:%S')} {message}{bell}", flush=True)
+
+    tasks = TaskStore(os.path.join(args.data_dir, "tasks.db"))
+    history = HistoryStore(os.path.join(args.data_dir, "history.db"))
+    durations = {
+        "work": args.work * 60,
+        "short_break": args.short_break * 60,
+        "long_break": args.long_break * 60,
+    }
+    daemon = PomodoroDaemon(durations, tasks, history, notify)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen()
+    listener.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    # SIGTERM でも KeyboardInterrupt として後片付けする
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    logging.info(f"ヘッドレス版を起動しました: {socket_path}")
+    try:
+        while not daemon.shutdown_requested:
+            for key, _ in selector.select(daemon.next_timeout()):
+                if key.fileobj is listener:
+                    conn, _ = listener.accept()
+                    conn.settimeout(5.0)
+                    selector.register(conn, selectors.EVENT_READ, bytearray())
+                elif not daemon.handle(key.fileobj, key.data):
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+            daemon.poll()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        tasks.close()
+        history.close()
+        logging.info("ヘッドレス版を終了しました")
+    return 0
+
+
+def detach(args, argv: List[str]) -> int:
+    """自分自身を新しいセッションで起動し、ソケットが応答するまで待つ"""
+    child_argv = [arg for arg in argv if arg != "--detach"]
+    if "--quiet" not in child_argv:
+        child_argv.append("--quiet")
+    subprocess.Popen([sys.executable, os.path.abspath(__file__)] + child_argv,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline:
+        if is_running(args.socket):
+            print(f"バックグラウンドで起動しました: {args.socket}")
+            return 0
+        time.sleep(0.02)
+    print("起動を確認できませんでした（pomodoro.log を確認してください）", file=sys.stderr)
+    return 1
+
+
+def simulate(args) -> int:
+    from simulation import Simulation
+
+    simulation = Simulation({
+        "work": args.work * 60,
+        "short_break": args.short_break * 60,
+        "long_break": args.long_break * 60,
+    })
+    started = time.perf_counter()
+    simulation.run_cycles(args.cycles)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        for transition in simulation.transitions:
+            print(json.dumps(transition._asdict()))
+        return 0
+    summary = simulation.summary()
+    print(f"{summary['pomodoros']} ポモドーロ（遷移 {summary['transitions']} 回、長休憩 {summary['long_breaks']} 回、"
+          f"仮想時間 {summary['virtual_hours']:.1f} 時間）を {elapsed_ms:.1f} ms で実行しました")
+    return 0
+
+
+def print_result(cmd: str, result):
+    if cmd == "tasks":
+        for task in result:
+            mark = "*" if task["current"] else " "
+            print(f"{mark}{task['id']:>5} [{'x' if task['done'] else ' '}] {task['title']}")
+    elif isinstance(result, dict) and "phase" in result:
+        if not result["is_active"]:
+            state = "停止中"
+        elif result["is_paused"]:
+            state = "一時停止中"
+        else:
+            state = "実行中"
+        line = (f"{PHASE_LABELS[result['phase']]} {format_time(result['remaining'])} {state}"
+                f"（完了 {result['pomodoro_count']}）")
+        if result["task"]:
+            line += f" タスク: {result['task']}"
+        print(line)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="制御用の Unix ソケット")
+    subparsers = parser.add_subparsers(dest="cmd", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="タイマーを起動する")
+    serve_parser.add_argument("--work", type=float, default=25, help="作業時間（分）")
+    serve_parser.add_argument("--short-break", type=float, default=5, help="短休憩（分）")
+    serve_parser.add_argument("--long-break", type=float, default=15, help="長休憩（分）")
+    serve_parser.add_argument("--data-dir", default="pomodoro_data", help="タスクと履歴の保存先")
+    serve_parser.add_argument("--quiet", action="store_true", help="フェーズ遷移を表示しない")
+    serve_parser.add_argument("--detach", action="store_true", help="バックグラウンドで起動する")
+
+    for name in ("status", "start", "pause", "resume", "stop", "skip", "info", "shutdown"):
+        subparsers.add_parser(name)
+    subparsers.add_parser("tasks").add_argument("query", nargs="?", default="")
+    subparsers.add_parser("add").add_argument("title", nargs="+")
+    subparsers.add_parser("done").add_argument("task_id")
+    subparsers.add_parser("select").add_argument("task_id", nargs="?")
+
+    simulate_parser = subparsers.add_parser("simulate", help="仮想時間でサイクルを早送りする")
+    simulate_parser.add_argument("--cycles", type=int, default=1000, help="完了させるポモドーロの数")
+    simulate_parser.add_argument("--work", type=float, default=25, help="作業時間（分）")
+    simulate_parser.add_argument("--short-break", type=float, default=5, help="短休憩（分）")
+    simulate_parser.add_argument("--long-break", type=float, default=15, help="長休憩（分）")
+    simulate_parser.add_argument("--json", action="store_true", help="フェーズ遷移を1行1件の JSON で出力する")
+    args = parser.parse_args(argv)
+    args.socket = os.path.abspath(args.socket)
+
+    if args.cmd == "simulate":
+        return simulate(args)
+
+    if args.cmd == "serve":
+        from log_pipeline import setup_logging
+        setup_logging(filename='pomodoro.log')
+        if args.detach:
+            return detach(args, argv)
+        return serve(args)
+
+    command_args = {
+        "tasks": lambda: [args.query],
+        "add": lambda: args.title,
+        "done": lambda: [args.task_id],
+        "select": lambda: [args.task_id] if args.task_id else [],
+    }.get(args.cmd, list)()
+    try:
+        result = send(args.socket, args.cmd, command_args)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"起動していません（python pomodoro_cli.py serve で起動してください）: {args.socket}",
+              file=sys.stderr)
+        return 1
+    except (OSError, CommandError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    print_result(args.cmd, result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
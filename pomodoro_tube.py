@@ -5,51 +5,63 @@ from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineSettings, QWebEng
 from PyQt5.QtCore import QUrl, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QPainter, QPainterPath, QColor, QFont
 import datetime
-import pytz
-import winsound
-import json
-import requests
 import os
 import webbrowser
 from urllib.parse import urlencode
-from notion_client import AsyncClient
-import asyncio
 import ctypes
-from fastapi import FastAPI, HTTPException
-import uvicorn
-import aiofiles
 import logging
-import re
-import threading
-
-# ロギングの設定
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import math
+from timer_core import DeadlineTimer, PhaseCycle
+from clock import QtClock
+from youtube_id import extract_video_id
+from youtube_player import PlayerController, PLAYING
+from video_metadata import VideoMetadataStore
+from history_store import HistoryStore
+from settings_store import SettingsStore
+from task_store import TaskStore
+from task_model import TaskListModel
+from playlist import PhasePlaylist, WORK, BREAK
+from video_prefetch import VideoPrefetcher, DEFAULT_LEAD_SECONDS
+from web_profile import WebProfile
+from page_lifecycle import PageLifecycleManager
+from frame_scheduler import FrameScheduler
+from sound import SoundPlayer
+from state_snapshot import StateSnapshot, capture
+from log_pipeline import setup_logging
+import metrics
+
+# fastapi / uvicorn / notion_client / pytz などの重いライブラリは、
+# 使う時点で読み込む（起動時間短縮のため）
 
 myappid = 'Pomodoro_tube v1.1.0'
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
+if sys.platform == 'win32':
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
+
+NOTION_AUTH_TIMEOUT_MS = 5 * 60 * 1000
 
-app = FastAPI()
+CURRENT_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-@app.get("/notion/callback")
-async def handle_callback(code: str = None):
-    if code:
-        # コードを使って認証処理を行う
-        return "認証が完了しました。このページを閉じてアプリに戻ってください。"
-    return "エラーが発生しまた。"
+# POMODORO_METRICS=1 で計測を有効にし、POMODORO_METRICS_PORT を指定すると /metrics を公開する
+METRICS_PORT = int(os.environ.get("POMODORO_METRICS_PORT", "0") or 0)
 
-async def start_local_server():
-    config = uvicorn.Config(app, host="127.0.0.1", port=8000)
-    server = uvicorn.Server(config)
-    await server.serve()
+LOAD_VIDEO = metrics.histogram("pomodoro_load_video_seconds", "「読み込み」ボタンの処理にかかった時間")
 
-def run_async_server():
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(start_local_server())
+_jst = None
 
-# 別スレッドでサーバーを起動
-server_thread = threading.Thread(target=run_async_server, daemon=True)
-server_thread.start()
+def jst():
+    """日本標準時のタイムゾーン（初回のみ pytz を読み込む）"""
+    global _jst
+    if _jst is None:
+        import pytz
+        _jst = pytz.timezone('Asia/Tokyo')
+    return _jst
+
+def __getattr__(name):
+    # pomodoro_tube.app は初めて参照されたときに FastAPI アプリを作る
+    if name == "app":
+        from web_app import get_app
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class YouTubeLoader(QThread):
     finished = pyqtSignal(str)
@@ -61,18 +73,7 @@ class YouTubeLoader(QThread):
 
     @staticmethod
     def extract_video_id(url):
-        patterns = [
-            r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-            r'(?:youtu\.be\/)([0-9A-Za-z_-]{11})',
-            r'(?:embed\/)([0-9A-Za-z_-]{11})',
-            r'^([0-9A-Za-z_-]{11})$'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        return extract_video_id(url)
 
     def run(self):
         try:
@@ -85,32 +86,87 @@ class YouTubeLoader(QThread):
         except Exception as e:
             self.error.emit(str(e))
 
-class PomodoroWorker(QThread):
+class PomodoroWorker(QtCore.QObject):
+    """締め切りベースのタイマー。表示が変わる秒境界でのみ起床する（専用スレッドは持たない）
+
+    ticks=False のときは tick を出さず、締め切りの時刻にだけ起床する
+    （表示は FrameScheduler が更新する）。clock に SimulatedClock を渡すと仮想時間で動く。
+    """
     tick = pyqtSignal(int)
     finished = pyqtSignal()
 
-    def __init__(self, time_left):
+    def __init__(self, time_left, ticks=True, clock=None):
         super().__init__()
-        self.time_left = time_left
-        self.running = True
-
-    def run(self):
-        while self.time_left > 0 and self.running:
-            self.tick.emit(self.time_left)
-            self.time_left -= 1
-            self.msleep(1000)
-        if self.running:
-            self.finished.emit()
+        self.clock = clock or QtClock(self)
+        self.timer = DeadlineTimer(time_left, self.clock.monotonic)
+        self.ticks = ticks
+        self._scheduled_wakeup = None
+        self._wakeup_handle = None
+
+    @property
+    def time_left(self):
+        return self.timer.display_seconds()
+
+    def start(self):
+        self.timer.start()
+        if self.ticks:
+            self.tick.emit(self.timer.display_seconds())
+        self._schedule_next()
+
+    def _schedule_next(self):
+        now = self.timer.clock()
+        if self.ticks:
+            self._scheduled_wakeup = self.timer.next_wakeup(now=now)
+        else:
+            self._scheduled_wakeup = self.timer.deadline
+        if self._scheduled_wakeup is not None:
+            self._wakeup_handle = self.clock.call_later(self._scheduled_wakeup - now, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup_handle = None
+        now = self.timer.clock()
+        self.timer.drift.record(self._scheduled_wakeup, now)
+        seconds = self.timer.display_seconds(now)
+        if seconds > 0:
+            if self.ticks:
+                self.tick.emit(seconds)
+            self._schedule_next()
+            return
+        self.timer.stop()
+        logging.info(f"タイマードリフト: {self.timer.drift}")
+        if self.ticks:
+            self.tick.emit(0)
+        self.finished.emit()
+
+    def isRunning(self):
+        return self.timer.is_active
 
     def stop(self):
-        self.running = False
+        if self._wakeup_handle is not None:
+            self.clock.cancel(self._wakeup_handle)
+            self._wakeup_handle = None
+        if self.timer.is_active:
+            self.timer.stop()
 
 class PomodoroTimer(QtWidgets.QMainWindow):
+    settingChanged = pyqtSignal(str, object)
+    notionAuthCodeReceived = pyqtSignal(str)
+    notionTasksFetched = pyqtSignal(object)
+    notionTaskCreated = pyqtSignal(int, str)
+
     def __init__(self):
         super().__init__()
+        self.oauth_server = None
+        self.metrics_server = None
+        self.notionAuthCodeReceived.connect(self.on_notion_auth_code)
+        self.notionTasksFetched.connect(self.on_notion_tasks_fetched)
+        # 同期スレッドで作ったページのIDは、GUI スレッドでタスクに保存する
+        self.notionTaskCreated.connect(lambda task_id, page_id: self.task_store.set_notion_id(task_id, page_id))
         self.setup_ui()
         self.setup_timers()
         self.load_settings()
+        self.restore_state()
+        self.start_metrics_server()
 
     def setup_ui(self):
         self.setWindowTitle('Pomodoro Timer')
@@ -145,13 +201,31 @@ class PomodoroTimer(QtWidgets.QMainWindow):
         self.task_input.setPlaceholderText("タスクを入力してください")
         self.layout.addWidget(self.task_input)
 
+        self.task_input.returnPressed.connect(self.add_task)
+
         self.add_task_button = QtWidgets.QPushButton('タスクを追加')
         self.add_task_button.clicked.connect(self.add_task)
         self.layout.addWidget(self.add_task_button)
 
-        self.task_list = QtWidgets.QListWidget()
+        # タスクは TaskStore に保存し、一覧は表示される分だけ読み込む
+        self.task_store = TaskStore()
+        self.task_model = TaskListModel(self.task_store, self)
+
+        self.task_search = QtWidgets.QLineEdit()
+        self.task_search.setPlaceholderText("タスクを検索")
+        self.task_search.textChanged.connect(self.task_model.set_filter)
+        self.layout.addWidget(self.task_search)
+
+        self.task_list = QtWidgets.QListView()
+        self.task_list.setModel(self.task_model)
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setLayoutMode(QtWidgets.QListView.Batched)
         self.layout.addWidget(self.task_list)
 
+        self.import_tasks_button = QtWidgets.QPushButton('Notionから取り込み')
+        self.import_tasks_button.clicked.connect(self.import_notion_tasks)
+        self.layout.addWidget(self.import_tasks_button)
+
     def setup_buttons(self):
         self.button_layout = QtWidgets.QHBoxLayout()
 
@@ -175,26 +249,47 @@ class PomodoroTimer(QtWidgets.QMainWindow):
 
     def setup_youtube_player(self):
         try:
-            # WebViewの設定
-            self.web_view = QWebEngineView(self)
-            
-            # 基本的な設定を有効化
-            settings = self.web_view.settings()
-            settings.setAttribute(QWebEngineSettings.PluginsEnabled, True)
-            settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
-            settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
-            settings.setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
-            settings.setAttribute(QWebEngineSettings.AutoLoadImages, True)
-            settings.setAttribute(QWebEngineSettings.WebGLEnabled, True)
-
-            # サイズ設定
-            self.web_view.setMinimumSize(400, 300)
-            self.layout.addWidget(self.web_view)
+            # 表示中のプレイヤーと先読み用のプレイヤーを重ねて置き、切り替え時に入れ替える
+            self.player_stack = QtWidgets.QStackedWidget()
+            self.player_stack.setMinimumSize(400, 300)
+            self.layout.addWidget(self.player_stack)
+
+            # iframe_api やプレイヤーの JS を次回の起動でも使えるよう、永続プロファイルに保存する
+            self.web_profile = WebProfile(parent=self)
+            self.profile = self.web_profile.profile
+
+            self.paused_for_break = False
+            self.metadata_store = VideoMetadataStore()
+            self.playlist = PhasePlaylist()
+            self.player = self.create_player()
+            self.player_stack.addWidget(self.player.web_view)
+            self.prefetcher = VideoPrefetcher(self.player_stack, self.player, self.create_player, parent=self)
+            self.prefetcher.transitionMeasured.connect(self.show_transition_latency)
+            self.prefetch_timer = QTimer(self)
+            self.prefetch_timer.setSingleShot(True)
+            self.prefetch_timer.timeout.connect(self.prefetch_next_video)
+            # 作業中に止まったままのプレイヤーは凍結・破棄し、レンダラーの優先度を下げる
+            self.lifecycle = PageLifecycleManager(self.player_stack, self.prefetcher, parent=self)
 
         except Exception as e:
             logging.error(f"YouTube プレイヤーの設定中にエラー: {e}")
             raise
 
+    def create_player(self):
+        """WebView とプレイヤーを作る（プレイヤーページは最初の読み込み時に1度だけ作り、以降は使い回す）"""
+        web_view = QWebEngineView(self)
+        # ページの設定（JavaScript・プラグイン・WebGL など）は PlayerController が作ったページに行う
+
+        # サイズ設定
+        web_view.setMinimumSize(400, 300)
+
+        player = PlayerController(web_view, self, profile=self.profile)
+        player.loadLatencyMeasured.connect(self.show_load_latency)
+        player.stateChanged.connect(self.on_player_state_changed)
+        player.videoInfo.connect(
+            lambda video_id, duration, title: self.metadata_store.put(video_id, duration, title or None))
+        return player
+
     def setup_youtube_controls(self):
         # YouTube URL入力フィールド
         self.youtube_url_input = QtWidgets.QLineEdit()
@@ -214,164 +309,362 @@ class PomodoroTimer(QtWidgets.QMainWindow):
         self.load_button.clicked.connect(self.load_youtube_video)
         control_layout.addWidget(self.load_button)
 
+        # 再生リストに追加するボタン
+        self.add_work_video_button = QtWidgets.QPushButton("作業用リストに追加")
+        self.add_work_video_button.clicked.connect(lambda: self.add_to_playlist(WORK))
+        control_layout.addWidget(self.add_work_video_button)
+
+        self.add_break_video_button = QtWidgets.QPushButton("休憩用リストに追加")
+        self.add_break_video_button.clicked.connect(lambda: self.add_to_playlist(BREAK))
+        control_layout.addWidget(self.add_break_video_button)
+
+        self.clear_cache_button = QtWidgets.QPushButton("キャッシュ消去")
+        self.clear_cache_button.clicked.connect(self.clear_web_cache)
+        control_layout.addWidget(self.clear_cache_button)
+
         self.layout.addLayout(control_layout)
 
+        # フェーズごとの音声のみモード
+        audio_layout = QtWidgets.QHBoxLayout()
+        self.audio_only_checks = {
+            WORK: QtWidgets.QCheckBox("作業中は音声のみ"),
+            BREAK: QtWidgets.QCheckBox("休憩中は音声のみ"),
+        }
+        for kind, check in self.audio_only_checks.items():
+            check.toggled.connect(lambda checked, kind=kind: self.set_audio_only(kind, checked))
+            audio_layout.addWidget(check)
+        self.audio_only_label = QtWidgets.QLabel("音声のみで再生中（映像は表示していません）")
+        self.audio_only_label.setVisible(False)
+        audio_layout.addWidget(self.audio_only_label)
+        self.layout.addLayout(audio_layout)
+
     def load_youtube_video(self):
+        with LOAD_VIDEO.time():
+            self._load_youtube_video()
+
+    def _load_youtube_video(self):
         try:
             url = self.youtube_url_input.text()
             if url:
                 video_id = YouTubeLoader.extract_video_id(url)
                 if video_id:
-                    html = f'''
-                    <html><body style="margin:0">
-                        <div id="player"></div>
-                        <script src="https://www.youtube.com/iframe_api"></script>
-                        <script>
-                            var player;
-                            function onYouTubeIframeAPIReady() {{
-                                player = new YT.Player('player', {{
-                                    height: '100%',
-                                    width: '100%',
-                                    videoId: '{video_id}',
-                                    playerVars: {{
-                                        'autoplay': 1,
-                                        'controls': 1
-                                    }},
-                                    events: {{
-                                        'onReady': onPlayerReady
-                                    }}
-                                }});
-                            }}
-                            function onPlayerReady(event) {{
-                                event.target.playVideo();
-                            }}
-                        </script>
-                    </body></html>
-                    '''
-                    self.web_view.setHtml(html)
+                    self.player.load(video_id)
                 else:
                     QtWidgets.QMessageBox.warning(self, "エラー", "無効なYouTube URLです")
         except Exception as e:
             logging.error(f"動画の読み込み中にエラー: {e}")
             QtWidgets.QMessageBox.warning(self, "エラー", f"動画の読み込みに失敗: {e}")
 
+    def add_to_playlist(self, kind):
+        video_id = YouTubeLoader.extract_video_id(self.youtube_url_input.text())
+        if not video_id:
+            QtWidgets.QMessageBox.warning(self, "エラー", "無効なYouTube URLです")
+            return
+        self.playlist.add(kind, video_id)
+        self.settings.set("playlists", self.playlist.as_dict())
+        label = "作業用" if kind == WORK else "休憩用"
+        self.statusBar().showMessage(f"{label}リストに追加しました（{len(self.playlist.queues[kind])}件）", 5000)
+
+    def show_transition_latency(self, prefetched, latency_ms):
+        label = "先読みあり" if prefetched else "先読みなし"
+        self.statusBar().showMessage(f"切り替えから再生開始まで {latency_ms:.0f}ms（{label}）", 5000)
+
+    def show_load_latency(self, mode, latency_ms):
+        # 表示中のプレイヤーの読み込みだけを表示する（裏の先読み用プレイヤーは除く）
+        if self.sender() is not self.player:
+            return
+        label = "初回" if mode == "initial" else "切り替え"
+        self.statusBar().showMessage(f"再生開始まで {latency_ms:.0f}ms（{label}）", 5000)
+        if mode == "initial":
+            # 起動後最初の再生で、前回起動時のキャッシュがどれだけ効いたかを記録する
+            self.web_profile.collect(self.player.page,
+                                     lambda stats: logging.info(f"WebEngine キャッシュ: {stats}"))
+
+    def clear_web_cache(self):
+        self.web_profile.clear_cache()
+        self.statusBar().showMessage("動画プレイヤーのキャッシュを消去しました", 5000)
+
     def paste_url(self):
         clipboard = QtWidgets.QApplication.clipboard()
         self.youtube_url_input.setText(clipboard.text())
 
-    def check_video_status(self):
-        # 動画の状態を確認するJavaScriptを修正
-        self.web_view.page().runJavaScript("""
-            (function() {
-                var video = document.querySelector('video');
-                if (video) {
-                    return {
-                        'ended': video.ended,
-                        'currentTime': video.currentTime,
-                        'duration': video.duration
-                    };
-                }
-                return null;
-            })();
-        """, self.handle_video_status)
-
-    def handle_video_status(self, result):
-        if result:
-            logging.info(f"Video status: {result}")
+    def on_player_state_changed(self, state, video_id):
+        # 再生状態はプレイヤーから送られてくる（問い合わせはしない）
+        if self.sender() is not self.player:
+            return
+        if state == PLAYING:
+            self.paused_for_break = False
 
     def setup_timers(self):
-        self.time_update_timer = QTimer()
-        self.time_update_timer.timeout.connect(self.update_current_time)
-        self.time_update_timer.start(1000)
-        self.update_current_time()
-
-        self.work_sound = 'SystemHand'
-        self.break_sound = 'SystemAsterisk'
+        # 通知音は起動時に読み込み、再生はワーカースレッドで行う
+        self.sound = SoundPlayer()
 
         self.pomodoro_worker = None
+        # タイマーとフェーズ遷移が使う時計（テストでは SimulatedClock に差し替える）
+        self.clock = QtClock(self)
+        self.cycle = PhaseCycle()
         self.time_left = 1500
         self.pomodoro_count = 0
         self.is_break = False
-        self.tasks = []
+        self.current_phase = "work"
+        self.phase_started_at = None
+        self.history = HistoryStore()
+        # 状態遷移のたびに書き、異常終了後の起動時に復元する
+        self.state_snapshot = StateSnapshot()
+        self.setup_frame_scheduler()
+
+    def setup_frame_scheduler(self):
+        """画面上の時計表示を、秒境界に揃えた1本のタイマーでまとめて更新する"""
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.frames = FrameScheduler(lambda delay_ms: self.frame_timer.start(delay_ms),
+                                     lambda _: self.frame_timer.stop())
+        self.frame_timer.timeout.connect(self.frames.run_frame)
+        self.frames.add(lambda now: self.format_time(self.current_time_left()), self.label.setText)
+        self.frames.add(lambda now: int((1 - (self.current_time_left() / 1500)) * 100),
+                        self.progress_bar.setValue)
+        self.frames.add(self.render_current_time, self.current_time_label.setText)
+        self.frames_report_timer = QTimer(self)
+        self.frames_report_timer.timeout.connect(self.report_frame_stats)
+        self.frames_report_timer.start(60 * 1000)
+        self.frames.start()
+
+    def current_time_left(self):
+        if self.pomodoro_worker is not None and self.pomodoro_worker.isRunning():
+            return self.pomodoro_worker.time_left
+        return self.time_left
+
+    def report_frame_stats(self):
+        stats = self.frames.stats()
+        logging.info(f"画面更新: 起床 {stats['wakeups_per_minute']}回/分, "
+                     f"再描画 {stats['repaints_per_minute']}回/分")
 
     def start_timer(self):
         if self.pomodoro_worker is None or not self.pomodoro_worker.isRunning():
-            self.pomodoro_worker = PomodoroWorker(self.time_left)
-            self.pomodoro_worker.tick.connect(self.update_timer_display)
+            if self.phase_started_at is None:
+                self.phase_started_at = self.clock.time()
+            self.pomodoro_worker = PomodoroWorker(self.time_left, ticks=False, clock=self.clock)
             self.pomodoro_worker.finished.connect(self.on_timer_finished)
             self.pomodoro_worker.start()
+            self.lifecycle.set_phase(self.current_phase)
+            self.frames.refresh()
+            self.schedule_prefetch()
             self.start_button.setText("停止")
+            self.save_state()
         else:
             self.stop_timer()
 
     def stop_timer(self):
+        self.prefetch_timer.stop()
+        self.prefetcher.cancel()
         if self.pomodoro_worker:
+            self.time_left = self.pomodoro_worker.time_left
             self.pomodoro_worker.stop()
             self.pomodoro_worker = None
         self.start_button.setText("開始")
-        self.web_view.page().runJavaScript("document.getElementsByTagName('video')[0].pause();")
+        self.player.pause()
+        self.lifecycle.set_phase("idle")
+        self.save_state()
 
     def reset_timer(self):
         self.stop_timer()
         self.time_left = 1500
         self.update_timer_display(self.time_left)
-        self.web_view.page().runJavaScript("document.getElementsByTagName('video')[0].currentTime = 0;")
+        self.player.seek(0)
+        self.cycle.reset()
         self.pomodoro_count = 0
         self.is_break = False
+        self.current_phase = "work"
+        self.phase_started_at = None
+        self.save_state()
 
     def update_timer_display(self, time_left):
         self.time_left = time_left
-        self.label.setText(self.format_time(self.time_left))
-        self.progress_bar.setValue(int((1 - (self.time_left / 1500)) * 100))
+        self.frames.refresh()
 
     def on_timer_finished(self):
+        self.time_left = 0
         self.start_button.setText("開始")
-        self.pomodoro_count += 1
+        self.record_phase()
+        if not self.is_break:
+            self.settings.set("completed_pomodoros", self.settings.get("completed_pomodoros", 0) + 1)
         self.play_sound()
         self.switch_mode()
 
     def switch_mode(self):
-        if not self.is_break:
-            if self.pomodoro_count % 4 == 0:
-                self.time_left = 900  # 15分の長休憩
-                self.label.setText("長休憩開始！")
-            else:
-                self.time_left = 300  # 5分の短休憩
-                self.label.setText("短休憩開始！")
-            self.is_break = True
+        """次のフェーズに進んで開始する（作業 → 短休憩、4回ごとに長休憩）"""
+        self.current_phase = self.cycle.advance()
+        self.pomodoro_count = self.cycle.pomodoro_count
+        self.is_break = self.cycle.is_break
+        self.time_left = self.cycle.duration
+        if self.is_break:
+            self.switch_phase_video(BREAK)
+            self.label.setText("長休憩開始！" if self.cycle.is_long_break else "短休憩開始！")
         else:
-            self.time_left = 1500  # 25分の作業時間
             self.label.setText("作業開始！")
-            self.is_break = False
+            self.switch_phase_video(WORK)
+        self.phase_started_at = None
+        self.apply_audio_mode()
+        self.lifecycle.set_phase(self.current_phase)
         self.start_timer()
 
+    def switch_phase_video(self, kind):
+        """次のフェーズの再生リストに動画があれば切り替える（先読み済みなら差し替えるだけ）"""
+        video_id = self.playlist.advance(kind)
+        if video_id is not None:
+            self.player = self.prefetcher.activate(video_id)
+            self.paused_for_break = False
+            return
+        # 再生リストがなければ、休憩中は動画を止め、作業再開時に続きから再生する
+        if kind == BREAK and self.player.is_playing:
+            self.player.pause()
+            self.paused_for_break = True
+        elif kind == WORK and self.paused_for_break:
+            self.player.play()
+            self.paused_for_break = False
+        elif kind == WORK and self.player.current_video_id in self.playlist.queues[BREAK]:
+            self.player.pause()
+
+    def set_audio_only(self, kind, enabled):
+        modes = dict(self.settings.get("audio_only") or {})
+        if modes.get(kind, False) == enabled:
+            return
+        modes[kind] = enabled
+        self.settings.set("audio_only", modes)
+        self.apply_audio_mode()
+
+    def apply_audio_mode(self):
+        """現在のフェーズの設定に合わせて、映像の表示と画質を切り替える"""
+        modes = self.settings.get("audio_only") or {}
+        enabled = bool(modes.get(BREAK if self.is_break else WORK, False))
+        for kind, check in self.audio_only_checks.items():
+            check.blockSignals(True)
+            check.setChecked(bool(modes.get(kind, False)))
+            check.blockSignals(False)
+        for player in self.prefetcher.players():
+            player.set_audio_only(enabled)
+        # 映像の面を畳んで、合成・描画をさせない
+        self.player_stack.setVisible(not enabled)
+        self.audio_only_label.setVisible(enabled)
+
+    def schedule_prefetch(self):
+        """フェーズ終了の lead 秒前に、次のフェーズの動画を先読みする"""
+        self.prefetch_timer.stop()
+        lead = self.settings.get("prefetch_lead_seconds", DEFAULT_LEAD_SECONDS)
+        self.prefetch_timer.start(int(max(0, self.current_time_left() - lead) * 1000))
+
+    def prefetch_next_video(self):
+        video_id = self.playlist.peek(WORK if self.is_break else BREAK)
+        if video_id is not None:
+            self.prefetcher.prefetch(video_id)
+
+    def save_state(self):
+        """現在のタイマー状態をスナップショットに書く（状態遷移のときだけ呼ぶ）"""
+        if self.pomodoro_worker is not None and self.pomodoro_worker.isRunning():
+            timer = self.pomodoro_worker.timer
+        else:
+            timer = DeadlineTimer(self.time_left)
+        self.state_snapshot.write(capture(timer, self.current_phase, self.pomodoro_count, self.is_break,
+                                          phase_started_at=self.phase_started_at))
+
+    def restore_state(self):
+        """前回終了時（または異常終了の直前）のタイマー状態に戻す"""
+        snapshot = self.state_snapshot.read()
+        if snapshot is None:
+            return
+        self.pomodoro_count = self.cycle.pomodoro_count = snapshot.pomodoro_count
+        self.is_break = self.cycle.is_break = snapshot.is_break
+        self.cycle.is_long_break = snapshot.phase == PhaseCycle.LONG_BREAK
+        self.current_phase = snapshot.phase
+        self.phase_started_at = snapshot.phase_started_at or None
+        remaining = snapshot.remaining()
+        logging.info(f"前回のタイマー状態を復元しました: {snapshot.phase} 残り {remaining:.1f}秒 "
+                     f"({'動作中' if snapshot.is_running else '停止中'})")
+        if snapshot.is_running:
+            # 締め切りを過ぎていれば、すぐに終了してフェーズが切り替わる
+            self.time_left = remaining
+            self.start_timer()
+        else:
+            self.update_timer_display(math.ceil(remaining))
+
+    def record_phase(self):
+        """完了したフェーズを履歴に記録する（書き込みはバックグラウンドで行われる）"""
+        if self.phase_started_at is None:
+            return
+        task = self.current_task()
+        ended_at = self.clock.time()
+        video_id = self.player.current_video_id or ""
+        self.history.record(self.current_phase, self.phase_started_at, ended_at,
+                            task=task, video_id=video_id)
+        if self.notion_sync is not None:
+            self.notion_sync.enqueue_phase(self.current_phase, self.phase_started_at, ended_at,
+                                           task=task, video_id=video_id)
+
     def play_sound(self):
-        sound = self.break_sound if self.is_break else self.work_sound
-        try:
-            winsound.PlaySound(sound, winsound.SND_ALIAS)
-        except Exception as e:
-            logging.error(f"サウンド再生エラー: {e}")
+        self.sound.play("break" if self.is_break else "work")
 
     def format_time(self, seconds):
         minutes, seconds = divmod(seconds, 60)
         return f"{minutes:02}:{seconds:02}"
 
-    def update_current_time(self):
+    def render_current_time(self, now):
         try:
-            jst = pytz.timezone('Asia/Tokyo')
-            current_time = datetime.datetime.now(jst).strftime('%Y-%m-%d %H:%M:%S')
-            self.current_time_label.setText(f"日本標準時: {current_time}")
+            current_time = datetime.datetime.fromtimestamp(now, jst()).strftime(CURRENT_TIME_FORMAT)
+            return f"日本標準時: {current_time}"
         except Exception as e:
             logging.error(f"時刻更新エラー: {e}")
+            return ""
+
+    def changeEvent(self, event):
+        if event.type() == QtCore.QEvent.WindowStateChange and hasattr(self, 'frames'):
+            self.frames.set_visible(self.isVisible() and not self.isMinimized())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.frames.set_visible(not self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.frames.set_visible(False)
+        super().hideEvent(event)
 
     def add_task(self):
-        task = self.task_input.text()
-        if task and len(self.tasks) < 5:
-            self.tasks.append(task)
-            self.task_list.addItem(task)
-            self.task_input.clear()
-        elif len(self.tasks) >= 5:
-            QtWidgets.QMessageBox.warning(self, "警告", "タスクは最大5つまでです。")
+        task = self.task_input.text().strip()
+        if not task:
+            return
+        added = self.task_store.add(task)
+        if self.notion_sync is not None and added is not None:
+            self.notion_sync.enqueue_task(added.title, added.id)
+        self.task_input.clear()
+
+    def current_task(self):
+        """選択中のタスク名（未選択なら最初のタスク）"""
+        index = self.task_list.currentIndex()
+        task = self.task_model.task_at(index.row()) if index.isValid() else None
+        if task is None and len(self.task_store):
+            task = self.task_store.get(self.task_store.ids()[0])
+        return task.title if task else ""
+
+    def import_notion_tasks(self):
+        if self.notion_sync is None:
+            QtWidgets.QMessageBox.warning(self, "警告", "Notion連携が設定されていません。")
+            return
+        self.import_tasks_button.setEnabled(False)
+        # 取得は同期スレッドで行い、結果はシグナルで GUI スレッドに戻す
+        future = self.notion_sync.fetch_tasks()
+        future.add_done_callback(self.notionTasksFetched.emit)
+
+    def on_notion_tasks_fetched(self, future):
+        self.import_tasks_button.setEnabled(True)
+        try:
+            tasks = future.result()
+        except Exception as e:
+            logging.error(f"Notionからのタスク取得に失敗しました: {e}")
+            QtWidgets.QMessageBox.warning(self, "エラー", f"Notionからのタスク取得に失敗: {e}")
+            return
+        added = self.task_store.add_many(tasks)
+        self.statusBar().showMessage(f"Notionから {len(added)} 件のタスクを取り込みました", 5000)
 
     def connect_to_notion(self):
         try:
@@ -384,8 +677,17 @@ class PomodoroTimer(QtWidgets.QMainWindow):
             )
             
             if ok and client_id:
-                redirect_uri = "http://localhost:8000/notion/callback"
-                auth_url = f"https://api.notion.com/v1/oauth/authorize?client_id={client_id}&redirect_uri={redirect_uri}&response_type=code"
+                # コールバック受付サーバーは認証フローの間だけ、空いているポートで起動する
+                from web_app import OAuthCallbackServer
+                self.stop_oauth_server()
+                self.oauth_server = OAuthCallbackServer(self.notionAuthCodeReceived.emit).start()
+                QTimer.singleShot(NOTION_AUTH_TIMEOUT_MS, self.stop_oauth_server)
+                query = urlencode({
+                    "client_id": client_id,
+                    "redirect_uri": self.oauth_server.redirect_uri,
+                    "response_type": "code",
+                })
+                auth_url = f"https://api.notion.com/v1/oauth/authorize?{query}"
                 webbrowser.open(auth_url)
             else:
                 QtWidgets.QMessageBox.warning(self, "警告", "Client IDが入力されていません。")
@@ -394,49 +696,115 @@ class PomodoroTimer(QtWidgets.QMainWindow):
             logging.error(f"Notionへの接続に失敗しました: {e}")
             QtWidgets.QMessageBox.warning(self, "エラー", f"Notionへの接続に失敗しました: {e}")
 
+    def on_notion_auth_code(self, code):
+        logging.info("Notionの認証コードを受け取りました")
+        self.stop_oauth_server()
+
+    def start_metrics_server(self):
+        if not METRICS_PORT:
+            return
+        metrics.enable()
+        try:
+            from web_app import LocalServer
+            self.metrics_server = LocalServer(port=METRICS_PORT).start()
+        except Exception as e:
+            logging.error(f"メトリクスサーバーを起動できません: {e}")
+
+    def stop_oauth_server(self):
+        if getattr(self, 'oauth_server', None) is not None:
+            self.oauth_server.stop()
+            self.oauth_server = None
+
     def load_settings(self):
-        if not os.path.exists('settings.json'):
-            # デフォルト設定を作成
-            default_settings = {
-                "setting1": "default_value1",
-                "setting2": "default_value2"
-            }
-            with open('settings.json', 'w') as f:
-                json.dump(default_settings, f)
-            print("デフォルト設定ファイルを作成しました。")
-        
-        with open('settings.json', 'r') as f:
-            settings = json.load(f)
-        self.notion_token = settings.get("notion_token", "")
-        self.notion_database_id = settings.get("notion_database_id", "")
-        logging.info("設定を読み込みました")
-
-    async def save_settings(self):
-        settings = {
+        self.settings = SettingsStore()
+        # 変更通知はシグナル経由で GUI スレッドに届ける
+        self.settings.subscribe(self.settingChanged.emit)
+        self.settingChanged.connect(self.on_setting_changed)
+        self.notion_token = self.settings.get("notion_token", "")
+        self.notion_database_id = self.settings.get("notion_database_id", "")
+        self.notion_sync = None
+        # トークンとデータベースIDが続けて変わっても、作り直しは1回にまとめる
+        self.notion_restart_timer = QTimer(self)
+        self.notion_restart_timer.setSingleShot(True)
+        self.notion_restart_timer.timeout.connect(self.restart_notion_sync)
+        self.restart_notion_sync()
+        self.playlist = PhasePlaylist(self.settings.get("playlists"))
+        self.prefetcher.memory_limit_mb = self.settings.get("prefetch_memory_limit_mb")
+        self.web_profile.set_cache_limit_mb(self.settings.get("web_cache_mb"))
+        self.apply_audio_mode()
+
+    def on_setting_changed(self, key, value):
+        if key in ("notion_token", "notion_database_id"):
+            setattr(self, key, value)
+            self.notion_restart_timer.start(0)
+        elif key == "playlists" and value != self.playlist.as_dict():
+            self.playlist = PhasePlaylist(value)
+        elif key == "prefetch_memory_limit_mb":
+            self.prefetcher.memory_limit_mb = value
+        elif key == "web_cache_mb":
+            self.web_profile.set_cache_limit_mb(value)
+        elif key == "audio_only":
+            self.apply_audio_mode()
+
+    def restart_notion_sync(self):
+        """Notion の設定が揃っていれば同期ワーカーを（作り直して）起動する"""
+        if self.notion_sync is not None:
+            if (self.notion_sync.token, self.notion_sync.database_id) == (self.notion_token, self.notion_database_id):
+                return
+            # 古いワーカーは送信中のバッチを取り消して裏で止まる（GUI スレッドでは待たない）。
+            # 取り出し済みの行は貸し出し中なので、新しいワーカーと二重に送ることはない
+            self.notion_sync.close(timeout=0)
+            self.notion_sync = None
+        if self.notion_token and self.notion_database_id:
+            from notion_sync import NotionSync
+            self.notion_sync = NotionSync(self.notion_token, self.notion_database_id,
+                                          on_task_created=self.notionTaskCreated.emit)
+
+    def save_settings(self):
+        """設定を保存する。書き込みはまとめてバックグラウンドで行われる"""
+        self.settings.update({
             "notion_token": self.notion_token,
             "notion_database_id": self.notion_database_id,
-        }
-        try:
-            async with aiofiles.open("settings.json", mode="w") as f:
-                await f.write(json.dumps(settings, indent=4))
-            logging.info("設定を保存しました")
-        except IOError as e:
-            logging.error(f"設定の保存に失敗しました: {e}")
-            raise HTTPException(status_code=500, detail=f"設定の保存に失敗しました: {e}")
+        })
 
     def closeEvent(self, event):
         # プロファイルとリソースの適切なクリーンアップ
         try:
             self.stop_timer()
-            if hasattr(self, 'video_check_timer'):
-                self.video_check_timer.stop()
+            self.frames.stop()
+            self.frames_report_timer.stop()
+            self.stop_oauth_server()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
             
+            if hasattr(self, 'player'):
+                logging.info(f"プレイヤーとの通信遅延: {self.player.latency_summary()}")
+            if hasattr(self, 'lifecycle'):
+                self.lifecycle.set_phase("idle")
+                self.lifecycle.stop()
+                logging.info(f"フェーズごとのレンダラー使用量: {self.lifecycle.report()}")
+
             # WebEngineViewのクリーンアップ
-            if hasattr(self, 'web_view'):
-                self.web_view.page().deleteLater()
-                self.web_view.deleteLater()
-                self.web_view = None
+            if hasattr(self, 'prefetcher'):
+                for player in self.prefetcher.players():
+                    player.page.deleteLater()
+                    player.web_view.deleteLater()
             
+            if hasattr(self, 'sound'):
+                self.sound.close()
+            if hasattr(self, 'state_snapshot'):
+                self.state_snapshot.close()
+            if hasattr(self, 'metadata_store'):
+                self.metadata_store.close()
+            if hasattr(self, 'task_store'):
+                self.task_store.close()
+            if hasattr(self, 'history'):
+                self.history.close()
+            if getattr(self, 'notion_sync', None) is not None:
+                self.notion_sync.close()
+            if hasattr(self, 'settings'):
+                self.settings.close()
+
             # プロファイルのクリーンアップ
             if hasattr(self, 'profile'):
                 self.profile.deleteLater()
@@ -448,6 +816,8 @@ class PomodoroTimer(QtWidgets.QMainWindow):
             super().closeEvent(event)
 
 if __name__ == '__main__':
+    # ロギングの設定（書き出しはバックグラウンドのスレッドで行い、プレイヤー関連のログは件数を制限する）
+    setup_logging(trim_records=True)
     try:
         app = QtWidgets.QApplication(sys.argv)
         timer = PomodoroTimer()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""プロセスの常駐メモリと CPU 時間の取得
+
+QtWebEngine のレンダラーは子プロセスなので、アプリ全体の使用量を見るときは
+子プロセスも合算する（psutil が必要）。psutil がなければ Linux の /proc から
+1プロセス分だけ読み、子プロセスを含める指定のときは取得できないものとして None を返す。
+"""
+import os
+from typing import Optional, Tuple
+
+
+def process_usage(pid: Optional[int] = None, include_children: bool = False) -> Optional[Tuple[float, float]]:
+    """(常駐メモリ MB, 累積 CPU 時間 秒)。取得できなければ None（pid を省略すると自プロセス）"""
+    pid = os.getpid() if pid is None else pid
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + (process.children(recursive=True) if include_children else [])
+        except psutil.Error:
+            return None
+        rss = 0
+        cpu_seconds = 0.0
+        for p in processes:
+            try:
+                with p.oneshot():
+                    rss += p.memory_info().rss
+                    times = p.cpu_times()
+            except psutil.Error:
+                # 終了した子プロセスは数えない
+                if p is process:
+                    return None
+                continue
+            cpu_seconds += times.user + times.system
+        return rss / (1024 * 1024), cpu_seconds
+    if include_children:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # comm に空白が含まれることがあるので、最後の ")" より後ろを使う
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / ticks
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), cpu_seconds
+
+
+def process_rss_mb(include_children: bool = True) -> Optional[float]:
+    """このプロセス（と子プロセス）の常駐メモリ（MB）。取得できなければ None"""
+    usage = process_usage(include_children=include_children)
+    return None if usage is None else usage[0]
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""共有ポモドーロルーム用のヘッドレス・マルチセッションスケジューラ
+
+全セッションの次の締め切りを1つのヒープで管理し、イベントループには
+最も早い締め切り1件分のコールバックだけを登録する。
+停止したセッションは最終状態を参照できるよう、削除（delete）されるまで残す。
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from timer_core import DeadlineTimer, PhaseCycle, TimerError
+
+
+class SessionNotFound(KeyError):
+    """存在しないセッションIDが指定された"""
+    pass
+
+
+class InvalidDuration(TimerError):
+    """フェーズの長さが正の有限値でない（0 秒のフェーズは締め切りの処理が終わらなくなる）"""
+    pass
+
+
+class Session:
+    __slots__ = ("id", "cycle", "timer", "generation", "task", "stopped")
+
+    def __init__(self, session_id: str, cycle: PhaseCycle, clock: Callable[[], float],
+                 task: str = ""):
+        self.id = session_id
+        self.cycle = cycle
+        self.timer = DeadlineTimer(cycle.duration, clock)
+        self.generation = 0
+        self.task = task
+        self.stopped = False
+
+    @property
+    def state(self) -> str:
+        """状態（idle / running / paused / stopped）"""
+        if self.stopped:
+            return "stopped"
+        if not self.timer.is_active:
+            return "idle"
+        return "paused" if self.timer.is_paused else "running"
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "phase": self.cycle.phase,
+            "is_break": self.cycle.is_break,
+            "pomodoro_count": self.cycle.pomodoro_count,
+            "is_active": self.timer.is_active,
+            "is_paused": self.timer.is_paused,
+            "remaining": self.timer.remaining(),
+            "task": self.task,
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class SessionScheduler:
+    """asyncio 上で多数のセッションのフェーズ遷移を駆動する"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 latency_window: int = 100_000):
+        self.loop = loop or asyncio.get_event_loop()
+        self.sessions: Dict[str, Session] = {}
+        self.transitions: int = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._handle_when: Optional[float] = None
+        self._listeners: List[Callable[[dict], None]] = []
+        self._latencies = deque(maxlen=latency_window)
+
+    # --- 公開API ---
+
+    def create(self, session_id: Optional[str] = None, task: str = "", **durations) -> Session:
+        for name, value in durations.items():
+            if not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+                raise InvalidDuration(f"{name} は正の有限値で指定してください: {value!r}")
+        session_id = session_id or uuid.uuid4().hex
+        if session_id in self.sessions:
+            raise TimerError(f"セッション {session_id} は既に存在します")
+        session = Session(session_id, PhaseCycle(**durations), self.loop.time, task)
+        self.sessions[session_id] = session
+        return session
+
+    def start(self, session_id: str) -> Session:
+        session = self.get_open(session_id)
+        session.timer.start()
+        self._push(session)
+        self._emit(session, "start")
+        return session
+
+    def pause(self, session_id: str) -> Session:
+        session = self.get_open(session_id)
+        session.timer.pause()
+        session.generation += 1
+        self._emit(session, "pause")
+        return session
+
+    def resume(self, session_id: str) -> Session:
+        session = self.get_open(session_id)
+        session.timer.resume()
+        self._push(session)
+        self._emit(session, "resume")
+        return session
+
+    def skip(self, session_id: str) -> Session:
+        """現在のフェーズを終えて次のフェーズを始める（一時停止中・未開始でも始める）"""
+        session = self.get_open(session_id)
+        self._advance(session, self.loop.time())
+        self._emit(session, "skip")
+        return session
+
+    def stop(self, session_id: str) -> Session:
+        """セッションを終える。最終状態は delete() するまで get() で参照できる"""
+        session = self.get_open(session_id)
+        if session.timer.is_active:
+            session.timer.stop()
+        session.generation += 1
+        session.stopped = True
+        self._emit(session, "stop")
+        return session
+
+    def delete(self, session_id: str) -> Session:
+        session = self.get(session_id)
+        if session.timer.is_active:
+            session.timer.stop()
+        session.generation += 1
+        del self.sessions[session_id]
+        self._emit(session, "delete")
+        return session
+
+    def get(self, session_id: str) -> Session:
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise SessionNotFound(session_id) from None
+
+    def get_open(self, session_id: str) -> Session:
+        """操作できる（停止していない）セッションを返す"""
+        session = self.get(session_id)
+        if session.stopped:
+            raise TimerError(f"セッション {session_id} は停止しています")
+        return session
+
+    def subscribe(self, listener: Callable[[dict], None]):
+        """フェーズ遷移などのイベントを受け取るリスナーを登録する"""
+        self._listeners.append(listener)
+
+    def latency_percentiles(self, quantiles=(50, 90, 99, 99.9)) -> Dict[str, float]:
+        """締め切りからフェーズ遷移処理までの遅延（ミリ秒）"""
+        values = sorted(self._latencies)
+        result = {f"p{q:g}": percentile(values, q) * 1000 for q in quantiles}
+        result["max"] = values[-1] * 1000 if values else 0.0
+        result["samples"] = len(values)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "stopped_sessions": sum(1 for session in self.sessions.values() if session.stopped),
+            "pending_deadlines": len(self._heap),
+            "transitions": self.transitions,
+            "latency_ms": self.latency_percentiles(),
+        }
+
+    # --- 内部処理 ---
+
+    def _push(self, session: Session):
+        session.generation += 1
+        deadline = session.timer.deadline
+        if deadline is None:
+            return
+        heapq.heappush(self._heap, (deadline, next(self._seq), session, session.generation))
+        self._arm()
+
+    def _arm(self):
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        if self._handle is not None:
+            if self._handle_when <= when:
+                return
+            self._handle.cancel()
+        self._handle_when = when
+        self._handle = self.loop.call_at(when, self._fire)
+
+    def _fire(self):
+        self._handle = None
+        self._handle_when = None
+        now = self.loop.time()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, session, generation = heapq.heappop(heap)
+            if session.generation != generation:
+                continue
+            self._transition(session, deadline, now)
+        self._arm()
+
+    def _transition(self, session: Session, deadline: float, now: float):
+        self._latencies.append(now - deadline)
+        # 遅延分を持ち越さないよう、前フェーズの締め切りを起点に次の締め切りを決める
+        self._advance(session, deadline)
+        self._emit(session, "transition")
+
+    def _advance(self, session: Session, started_at: float):
+        """次のフェーズに進め、started_at から始まったものとして締め切りを登録する"""
+        self.transitions += 1
+        session.cycle.advance()
+        timer = session.timer
+        if timer.is_active:
+            timer.stop()
+        timer.duration = session.cycle.duration
+        timer.start()
+        timer.deadline = started_at + timer.duration
+        self._push(session)
+
+    def _emit(self, session: Session, event: str):
+        if not self._listeners:
+            return
+        payload = session.snapshot()
+        payload["event"] = event
+        for listener in self._listeners:
+            try:
+                listener(payload)
+            except Exception as e:
+                logging.error(f"スケジューラのリスナーでエラー: {e}")
+
+
+def register_routes(app, get_scheduler: Optional[Callable[[], SessionScheduler]] = None):
+    """FastAPI アプリにセッション操作のエンドポイントを追加する"""
+    from fastapi import HTTPException
+
+    state = {}
+
+    def default_scheduler() -> SessionScheduler:
+        if "scheduler" not in state:
+            state["scheduler"] = SessionScheduler(asyncio.get_running_loop())
+        return state["scheduler"]
+
+    get_scheduler = get_scheduler or default_scheduler
+
+    def call(action: str, session_id: str) -> dict:
+        try:
+            return getattr(get_scheduler(), action)(session_id).snapshot()
+        except SessionNotFound:
+            raise HTTPException(status_code=404, detail=f"セッションが見つかりません: {session_id}")
+        except TimerError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @app.post("/sessions")
+    async def create_session(task: str = "", work: float = 25 * 60, short_break: float = 5 * 60,
+                             long_break: float = 15 * 60, start: bool = True):
+        scheduler = get_scheduler()
+        try:
+            session = scheduler.create(task=task, work=work, short_break=short_break,
+                                       long_break=long_break)
+        except InvalidDuration as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except TimerError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if start:
+            scheduler.start(session.id)
+        return session.snapshot()
+
+    @app.get("/sessions/stats")
+    async def session_stats():
+        return get_scheduler().stats()
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return call("get", session_id)
+
+    @app.post("/sessions/{session_id}/start")
+    async def start_session(session_id: str):
+        return call("start", session_id)
+
+    @app.post("/sessions/{session_id}/pause")
+    async def pause_session(session_id: str):
+        return call("pause", session_id)
+
+    @app.post("/sessions/{session_id}/resume")
+    async def resume_session(session_id: str):
+        return call("resume", session_id)
+
+    @app.post("/sessions/{session_id}/skip")
+    async def skip_session(session_id: str):
+        return call("skip", session_id)
+
+    @app.post("/sessions/{session_id}/stop")
+    async def stop_session(session_id: str):
+        return call("stop", session_id)
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        return call("delete", session_id)
+
+    return get_scheduler
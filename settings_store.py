@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""settings.json の読み書き
+
+読み込みはメモリ上の値を返し、ファイルの mtime が変わったときだけ読み直す。
+書き込みは一定時間まとめてからバックグラウンドのスレッドで行い、
+一時ファイルへ書いてから置き換えるため、途中で落ちても壊れたファイルは残らない。
+"""
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import metrics
+
+DEFAULT_PATH = "settings.json"
+
+SETTINGS_IO = metrics.histogram("pomodoro_settings_io_seconds", "settings.json の読み書きにかかった時間",
+                                ("op",))
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "notion_token": "",
+    "notion_database_id": "",
+    "completed_pomodoros": 0,
+    # フェーズごとの再生リスト（動画ID）と先読みの設定
+    "playlists": {"work": [], "break": []},
+    "prefetch_lead_seconds": 30,
+    "prefetch_memory_limit_mb": 1500,
+    # フェーズごとの音声のみモード（映像を表示・デコードしない）
+    "audio_only": {"work": False, "break": False},
+    # WebEngine のディスクキャッシュの上限（MB）
+    "web_cache_mb": 200,
+}
+
+
+class SettingsStore:
+    def __init__(self, path: str = DEFAULT_PATH, defaults: Optional[Dict[str, Any]] = None,
+                 debounce: float = 0.5, check_interval: float = 1.0):
+        self.path = path
+        self.defaults = copy.deepcopy(DEFAULT_SETTINGS if defaults is None else defaults)
+        self.debounce = debounce
+        self.check_interval = check_interval
+        self._values: Dict[str, Any] = copy.deepcopy(self.defaults)
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._signature = None
+        self._last_check = 0.0
+        self._dirty_since: Optional[float] = None
+        self._closed = False
+        # 書き込みは _write_lock で直列化し、古いスナップショットで上書きしないよう版番号を持つ
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._written_version = 0
+        self.writes = 0
+
+        if not os.path.exists(path):
+            self._write(dict(self._values))
+            logging.info("デフォルト設定ファイルを作成しました")
+        self._reload(notify=False)
+        self._worker = threading.Thread(target=self._write_loop, name="SettingsWriter", daemon=True)
+        self._worker.start()
+
+    # --- 読み出し ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._refresh()
+        with self._lock:
+            return self._values.get(key, default)
+
+    def all(self) -> Dict[str, Any]:
+        self._refresh()
+        with self._lock:
+            return copy.deepcopy(self._values)
+
+    def __getitem__(self, key: str) -> Any:
+        self._refresh()
+        with self._lock:
+            return self._values[key]
+
+    # --- 書き込み ---
+
+    def set(self, key: str, value: Any):
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any]):
+        """値を更新する。ファイルへの書き込みは debounce 秒後にまとめて行う"""
+        changed = []
+        with self._cond:
+            for key, value in values.items():
+                if self._values.get(key) != value or key not in self._values:
+                    self._values[key] = value
+                    changed.append((key, value))
+            if changed:
+                self._version += 1
+                if self._dirty_since is None:
+                    self._dirty_since = time.monotonic()
+                self._cond.notify()
+        self._notify(changed)
+
+    def flush(self):
+        """保留中の変更をすぐに書き込む"""
+        with self._cond:
+            if self._dirty_since is None:
+                return
+            snapshot = self._take_snapshot()
+        self._write(*snapshot)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    # --- 変更通知 ---
+
+    def subscribe(self, listener: Callable[[str, Any], None]):
+        """キーの値が変わったときに listener(key, value) を呼ぶ"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, Any], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, changed):
+        for key, value in changed:
+            for listener in list(self._listeners):
+                try:
+                    listener(key, value)
+                except Exception as e:
+                    logging.error(f"設定変更の通知中にエラー: {e}")
+
+    # --- 内部処理 ---
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if self._stat_signature() != self._signature:
+            self._reload(notify=True)
+
+    def _reload(self, notify: bool):
+        try:
+            with SETTINGS_IO.labels("read").time():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"設定の読み込みに失敗しました: {e}")
+            return
+        changed = []
+        with self._lock:
+            self._signature = self._stat_signature()
+            if self._dirty_since is not None:
+                # 未保存の変更があるときは、外部からの変更よりメモリ上の値を優先する
+                return
+            merged = copy.deepcopy(self.defaults)
+            merged.update(loaded)
+            for key, value in merged.items():
+                if self._values.get(key) != value:
+                    changed.append((key, value))
+            self._values = merged
+        logging.info("設定を読み込みました")
+        if notify:
+            self._notify(changed)
+
+    def _take_snapshot(self):
+        # 呼び出し側で self._cond を保持していること
+        self._dirty_since = None
+        return copy.deepcopy(self._values), self._version
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if self._dirty_since is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    continue
+                delay = self._dirty_since + self.debounce - time.monotonic()
+                if delay > 0 and not self._closed:
+                    self._cond.wait(delay)
+                    continue
+                snapshot = self._take_snapshot()
+            self._write(*snapshot)
+
+    def _write(self, values: Dict[str, Any], version: Optional[int] = None):
+        with self._write_lock:
+            if version is not None:
+                if version <= self._written_version:
+                    return
+                self._written_version = version
+            self._write_file(values)
+
+    def _write_file(self, values: Dict[str, Any]):
+        with SETTINGS_IO.labels("write").time():
+            self._write_file_atomic(values)
+
+    def _write_file_atomic(self, values: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(values, f, indent=4, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            with self._lock:
+                self._signature = self._stat_signature()
+            self.writes += 1
+        except OSError as e:
+            logging.error(f"設定の保存に失敗しました: {e}")
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""仮想時間でポモドーロのサイクルを早送りする（GUI なし）
+
+ヘッドレス版の PomodoroDaemon を SimulatedClock で動かす。フェーズの順序と長さは
+Qt 版の switch_mode・Tk 版の update_timer と同じ PhaseCycle と DeadlineTimer で
+決まるため、実際のアプリと同じフェーズ遷移・履歴・通知が、待ち時間なしで得られる。
+一時停止などの操作は仮想時刻を指定して予約できるので、回帰テストや負荷試験の土台に使う。
+
+    simulation = Simulation()
+    simulation.at(10 * 60, "pause")
+    simulation.at(12 * 60, "resume")
+    simulation.run_cycles(1000)
+    simulation.transitions[:3]
+"""
+from typing import Dict, List, Optional
+
+from clock import SimulatedClock
+from history_store import PhaseRecord
+from pomodoro_cli import PomodoroDaemon
+from timer_core import PhaseCycle, Transition
+
+
+class MemoryHistory:
+    """HistoryStore の代わりに記録をメモリに残す"""
+
+    def __init__(self):
+        self.records: List[PhaseRecord] = []
+
+    def record(self, phase: str, started_at: float, ended_at: float,
+               task: str = "", video_id: str = ""):
+        self.records.append(PhaseRecord(started_at, ended_at, phase, task or "", video_id or ""))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Simulation:
+    def __init__(self, durations: Optional[Dict[str, float]] = None,
+                 clock: Optional[SimulatedClock] = None):
+        self.clock = clock or SimulatedClock()
+        self.history = MemoryHistory()
+        self.transitions: List[Transition] = []
+        self.notifications: List[str] = []
+        self.daemon = PomodoroDaemon(durations or {}, None, self.history, self.notifications.append,
+                                     clock=self.clock.monotonic, wall_clock=self.clock.time,
+                                     on_transition=self.transitions.append)
+        self._wakeup = None
+
+    @property
+    def cycle(self) -> PhaseCycle:
+        return self.daemon.cycle
+
+    # --- 操作 ---
+
+    def command(self, cmd: str, *args):
+        """現在の仮想時刻でコマンドを実行する（serve がソケットから受けたときと同じ）"""
+        result = self.daemon.dispatch(cmd, list(args))
+        self._schedule()
+        return result
+
+    def at(self, when: float, cmd: str, *args):
+        """仮想時刻 when（秒）にコマンドを実行するよう予約する"""
+        self.clock.call_later(when - self.clock.monotonic(), self.command, cmd, *args)
+
+    # --- 実行 ---
+
+    def run_cycles(self, cycles: int) -> int:
+        """さらに cycles 回のポモドーロ（とその後の休憩）が終わるまで進め、実行したイベント数を返す"""
+        target = self.cycle.pomodoro_count + cycles
+        if not self.daemon.timer.is_active:
+            self.command("start")
+        return self.clock.run(stop=lambda: self.cycle.pomodoro_count >= target and not self.cycle.is_break)
+
+    def run_for(self, seconds: float) -> int:
+        """仮想時間を seconds 秒進める"""
+        return self.clock.advance(seconds)
+
+    def _schedule(self):
+        # serve の select と同じく、次の締め切りにだけ起床する
+        if self._wakeup is not None:
+            self.clock.cancel(self._wakeup)
+            self._wakeup = None
+        timeout = self.daemon.next_timeout()
+        if timeout is not None:
+            self._wakeup = self.clock.call_later(timeout, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self.daemon.poll()
+        self._schedule()
+
+    def summary(self) -> dict:
+        return {
+            "pomodoros": self.cycle.pomodoro_count,
+            "transitions": len(self.transitions),
+            "long_breaks": sum(1 for t in self.transitions if t.phase == PhaseCycle.LONG_BREAK),
+            "virtual_hours": self.clock.monotonic() / 3600,
+            "events": self.clock.events_run,
+            "drift": self.daemon.timer.drift.as_dict(),
+        }
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""通知音の再生（GUI スレッドを止めない）
+
+音声データは起動時に読み込んで（またはトーンを合成して）メモリに置き、
+再生は専用のワーカースレッドが行う。play() はキューに積むだけで戻るため、
+フェーズの切り替えが音の再生を待つことはない。
+
+バックエンド:
+- WinsoundBackend: Windows の winsound（システム音のエイリアス、または WAV データ）
+- CommandBackend: Linux の paplay / aplay / pw-play に WAV を標準入力で渡す
+- NullBackend: 何も鳴らさず記録だけする（テスト・ベンチマーク用）
+"""
+import io
+import logging
+import math
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import wave
+from typing import Dict, List, NamedTuple, Optional
+
+SAMPLE_RATE = 22050
+
+
+class Sample(NamedTuple):
+    name: str
+    wav: bytes
+    alias: Optional[str] = None
+
+
+def synth_tone(frequency: float, duration: float = 0.35, volume: float = 0.4,
+               sample_rate: int = SAMPLE_RATE) -> bytes:
+    """減衰するサイン波の WAV データを作る"""
+    frames = int(duration * sample_rate)
+    data = bytearray()
+    for i in range(frames):
+        envelope = 1.0 - i / frames
+        value = volume * envelope * math.sin(2 * math.pi * frequency * i / sample_rate)
+        data += struct.pack("<h", int(value * 32767))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(data))
+    return buffer.getvalue()
+
+
+def load_wav(path: str) -> bytes:
+    """WAV ファイルを読み込む（壊れていれば起動時に wave.Error になる）"""
+    with open(path, "rb") as f:
+        data = f.read()
+    with wave.open(io.BytesIO(data)) as f:
+        f.getparams()
+    return data
+
+
+def default_samples() -> Dict[str, Sample]:
+    # "work" は作業終了、"break" は休憩終了の通知音
+    return {
+        "work": Sample("work", synth_tone(880), alias="SystemHand"),
+        "break": Sample("break", synth_tone(660), alias="SystemAsterisk"),
+    }
+
+
+class NullBackend:
+    name = "null"
+
+    def __init__(self):
+        self.played: List[str] = []
+
+    def play(self, sample: Sample):
+        self.played.append(sample.name)
+
+
+class WinsoundBackend:
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self._winsound = winsound
+
+    def play(self, sample: Sample):
+        winsound = self._winsound
+        if sample.alias:
+            winsound.PlaySound(sample.alias, winsound.SND_ALIAS | winsound.SND_NODEFAULT)
+        else:
+            winsound.PlaySound(sample.wav, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+
+
+class CommandBackend:
+    """WAV を標準入力から読めるコマンドで再生する"""
+    name = "command"
+    COMMANDS = (["paplay"], ["pw-play", "-"], ["aplay", "-q", "-"])
+
+    def __init__(self, command: Optional[List[str]] = None):
+        if command is None:
+            command = next((c for c in self.COMMANDS if shutil.which(c[0])), None)
+        if command is None:
+            raise RuntimeError("音声を再生するコマンド（paplay / pw-play / aplay）が見つかりません")
+        self.command = command
+        self.name = command[0]
+
+    def play(self, sample: Sample):
+        subprocess.run(self.command, input=sample.wav, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=10, check=False)
+
+
+def default_backend():
+    """この環境で使えるバックエンド（なければ NullBackend）"""
+    candidates = [WinsoundBackend] if sys.platform == "win32" else [CommandBackend]
+    for backend in candidates:
+        try:
+            return backend()
+        except (ImportError, RuntimeError) as e:
+            logging.info(f"通知音のバックエンド {backend.__name__} は使えません: {e}")
+    return NullBackend()
+
+
+_STOP = object()
+
+
+class SoundPlayer:
+    def __init__(self, backend=None, samples: Optional[Dict[str, Sample]] = None,
+                 max_pending: int = 2):
+        self.backend = backend if backend is not None else default_backend()
+        self.samples = samples if samples is not None else default_samples()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._worker = threading.Thread(target=self._run, name="SoundPlayer", daemon=True)
+        self._worker.start()
+
+    def play(self, name: str) -> bool:
+        """通知音を鳴らす。再生を待たずに戻る（再生待ちが溜まっていれば捨てる）"""
+        sample = self.samples.get(name)
+        if sample is None:
+            logging.error(f"通知音 {name} は登録されていません")
+            return False
+        try:
+            self._queue.put_nowait(sample)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def wait(self):
+        """キューに積まれた音を鳴らし終えるまで待つ（テスト用）"""
+        self._queue.join()
+
+    def close(self):
+        try:
+            self._queue.put(_STOP, timeout=1.0)
+        except queue.Full:
+            return
+        self._worker.join(timeout=5.0)
+
+    def _run(self):
+        while True:
+            sample = self._queue.get()
+            try:
+                if sample is _STOP:
+                    return
+                self.backend.play(sample)
+            except Exception as e:
+                logging.error(f"サウンド再生エラー: {e}")
+            finally:
+                self._queue.task_done()
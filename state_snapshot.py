@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""タイマーの状態をメモリマップしたファイルに残し、異常終了後に復元する
+
+固定長のレコードを2スロット持ち、書き込みは交互に行う（直前の正しい
+レコードは常にもう一方のスロットに残る）。各スロットは seqlock 方式で、
+書き込み中は seq が奇数になり、終わると偶数に戻る。さらに seq と本体の
+CRC32 を持つため、書き込みの途中でプロセスが落ちても壊れたレコードは読まない。
+
+書き込むのは開始・一時停止・フェーズ遷移などの状態遷移のときだけで、
+毎秒の表示更新では書かない。締め切りは再起動をまたいで使えるよう
+壁時計（time.time()）で保存する。
+"""
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join("pomodoro_data", "timer_state.bin")
+
+MAGIC = b"PTSS"
+VERSION = 1
+PHASES = ("work", "short_break", "long_break")
+
+_HEADER = struct.Struct("<4sHxx")
+_SEQ = struct.Struct("<I")
+# phase, flags, pomodoro_count, duration, deadline, frozen_remaining,
+# phase_started_at, written_at, video_id
+_PAYLOAD = struct.Struct("<BBxxIddddd16s")
+_CRC = struct.Struct("<I")
+_SLOT_SIZE = _SEQ.size + _PAYLOAD.size + _CRC.size
+FILE_SIZE = _HEADER.size + 2 * _SLOT_SIZE
+
+_ACTIVE = 0x01
+_PAUSED = 0x02
+_BREAK = 0x04
+
+
+class TimerSnapshot(NamedTuple):
+    phase: str = "work"
+    is_active: bool = False
+    is_paused: bool = False
+    is_break: bool = False
+    pomodoro_count: int = 0
+    duration: float = 25 * 60
+    # 動作中のときの締め切り（壁時計）
+    deadline: float = 0.0
+    # 止まっている・一時停止中のときの残り時間
+    frozen_remaining: float = 25 * 60
+    phase_started_at: float = 0.0
+    written_at: float = 0.0
+    video_id: str = ""
+
+    @property
+    def is_running(self) -> bool:
+        return self.is_active and not self.is_paused
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """残り時間（秒）。動作中なら保存した締め切りから計算する"""
+        if not self.is_running:
+            return self.frozen_remaining
+        if now is None:
+            now = time.time()
+        return max(self.deadline - now, 0.0)
+
+
+def capture(timer, phase: str, pomodoro_count: int, is_break: bool,
+            phase_started_at: Optional[float] = None, video_id: str = "",
+            frozen_remaining: Optional[float] = None) -> TimerSnapshot:
+    """DeadlineTimer の状態を TimerSnapshot にする（締め切りは壁時計に直す）"""
+    now = time.time()
+    remaining = timer.remaining()
+    return TimerSnapshot(
+        phase=phase,
+        is_active=timer.is_active,
+        is_paused=timer.is_paused,
+        is_break=is_break,
+        pomodoro_count=pomodoro_count,
+        duration=timer.duration,
+        deadline=now + remaining if timer.is_active and not timer.is_paused else 0.0,
+        frozen_remaining=remaining if frozen_remaining is None else frozen_remaining,
+        phase_started_at=phase_started_at or 0.0,
+        written_at=now,
+        video_id=video_id or "",
+    )
+
+
+class StateSnapshot:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != FILE_SIZE:
+                # 新規作成か、レイアウトの異なる古いファイル
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, FILE_SIZE)
+            self._mm = mmap.mmap(fd, FILE_SIZE)
+        finally:
+            os.close(fd)
+        magic, version = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm[:] = bytes(FILE_SIZE)
+            _HEADER.pack_into(self._mm, 0, MAGIC, VERSION)
+        self._seq = max((seq for seq, _ in self._read_slots()), default=0)
+
+    # --- 読み込み ---
+
+    def read(self) -> Optional[TimerSnapshot]:
+        """最後に書き終えたレコード。なければ（壊れていれば）None"""
+        slots = self._read_slots()
+        if not slots:
+            return None
+        return max(slots, key=lambda slot: slot[0])[1]
+
+    def _read_slots(self):
+        slots = []
+        for index in (0, 1):
+            offset = _HEADER.size + index * _SLOT_SIZE
+            for _ in range(3):
+                seq = _SEQ.unpack_from(self._mm, offset)[0]
+                if seq == 0 or seq % 2:
+                    # 未使用、または書き込み中
+                    break
+                body = self._mm[offset:offset + _SEQ.size + _PAYLOAD.size]
+                crc = _CRC.unpack_from(self._mm, offset + _SEQ.size + _PAYLOAD.size)[0]
+                if _SEQ.unpack_from(self._mm, offset)[0] != seq:
+                    # 読んでいる間に書き換わった
+                    continue
+                if zlib.crc32(body) != crc:
+                    break
+                slots.append((seq, self._decode(body[_SEQ.size:])))
+                break
+        return slots
+
+    @staticmethod
+    def _decode(payload: bytes) -> TimerSnapshot:
+        (phase, flags, pomodoro_count, duration, deadline, frozen_remaining,
+         phase_started_at, written_at, video_id) = _PAYLOAD.unpack(payload)
+        return TimerSnapshot(
+            phase=PHASES[phase] if phase < len(PHASES) else PHASES[0],
+            is_active=bool(flags & _ACTIVE),
+            is_paused=bool(flags & _PAUSED),
+            is_break=bool(flags & _BREAK),
+            pomodoro_count=pomodoro_count,
+            duration=duration,
+            deadline=deadline,
+            frozen_remaining=frozen_remaining,
+            phase_started_at=phase_started_at,
+            written_at=written_at,
+            video_id=video_id.rstrip(b"\0").decode("ascii", "replace"),
+        )
+
+    # --- 書き込み ---
+
+    def write(self, snapshot: TimerSnapshot):
+        """古い方のスロットにレコードを書く（fsync はしない）"""
+        flags = ((_ACTIVE if snapshot.is_active else 0) | (_PAUSED if snapshot.is_paused else 0)
+                 | (_BREAK if snapshot.is_break else 0))
+        payload = _PAYLOAD.pack(
+            PHASES.index(snapshot.phase) if snapshot.phase in PHASES else 0, flags,
+            snapshot.pomodoro_count, snapshot.duration, snapshot.deadline,
+            snapshot.frozen_remaining, snapshot.phase_started_at,
+            snapshot.written_at or time.time(), snapshot.video_id.encode("ascii", "replace")[:16])
+        seq = self._seq + 2
+        offset = _HEADER.size + (seq // 2 % 2) * _SLOT_SIZE
+        mm = self._mm
+        _SEQ.pack_into(mm, offset, seq - 1)
+        mm[offset + _SEQ.size:offset + _SEQ.size + _PAYLOAD.size] = payload
+        _CRC.pack_into(mm, offset + _SEQ.size + _PAYLOAD.size, zlib.crc32(_SEQ.pack(seq) + payload))
+        _SEQ.pack_into(mm, offset, seq)
+        self._seq = seq
+
+    def flush(self):
+        """ディスクまで書き出す（電源断にも備える場合だけ呼ぶ）"""
+        self._mm.flush()
+
+    def close(self):
+        try:
+            self._mm.flush()
+            self._mm.close()
+        except (ValueError, OSError) as e:
+            logging.error(f"タイマー状態ファイルを閉じられません: {e}")
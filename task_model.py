@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""TaskStore を QListView に表示するためのモデル
+
+行は fetchMore で少しずつ読み込むため、数万件でも最初の描画は一瞬で終わる。
+検索語を変えるとモデルをリセットし、該当するタスクだけを表示する。
+"""
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+from task_store import TaskStore
+
+FETCH_BATCH = 200
+
+TaskIdRole = Qt.UserRole + 1
+
+
+class TaskListModel(QtCore.QAbstractListModel):
+    def __init__(self, store: TaskStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.query = ""
+        self._ids = store.ids()
+        self._loaded = min(FETCH_BATCH, len(self._ids))
+        store.subscribe(self.refresh)
+
+    # --- QAbstractListModel ---
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._ids)
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(FETCH_BATCH, len(self._ids) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        task = self.store.get(self._ids[index.row()])
+        if task is None:
+            return None
+        if role == Qt.DisplayRole:
+            return task.title
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if task.done else Qt.Unchecked
+        if role == TaskIdRole:
+            return task.id
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        self.store.set_done(self._ids[index.row()], value == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    # --- 検索 ---
+
+    def set_filter(self, query: str):
+        self.query = query
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self._ids = self.store.search(self.query)
+        self._loaded = min(FETCH_BATCH, len(self._ids))
+        self.endResetModel()
+
+    def task_at(self, row: int):
+        if 0 <= row < self._loaded:
+            return self.store.get(self._ids[row])
+        return None
+
+    def total_count(self) -> int:
+        """読み込み前の行も含めた該当件数"""
+        return len(self._ids)
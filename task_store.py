@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""タスクの保存と検索
+
+全タスクをメモリに持ち、文字の2-gram による索引で部分一致検索を行う
+（日本語のように空白で区切られないタイトルにも効く）。入力中の検索は
+前回の結果を絞り込むだけで済ませる。変更は SQLite に書き込むが、
+書き込みはバックグラウンドのスレッドがまとめて行うため GUI スレッドは待たない。
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PATH = os.path.join("pomodoro_data", "tasks.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    notion_id TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_notion ON tasks(notion_id) WHERE notion_id IS NOT NULL;
+"""
+
+_STOP = object()
+
+
+class Task(NamedTuple):
+    id: int
+    title: str
+    done: bool = False
+    created_at: float = 0.0
+    notion_id: Optional[str] = None
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class TaskIndex:
+    """タイトルの部分一致検索用の索引（2-gram → タスクIDの一覧）
+
+    大量のタスクを読み込んだ直後は build() を別スレッドで動かし、
+    索引ができるまでの検索は全件の走査で答える。
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, List[int]] = {}
+        self._lowered: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.ready.set()
+
+    def load(self, titles: Iterable[Tuple[int, str]]):
+        """索引を作らずにタイトルだけ登録する（続けて build() を呼ぶ）"""
+        self.ready.clear()
+        for task_id, title in titles:
+            self._lowered[task_id] = title.casefold()
+
+    def build(self):
+        with self._lock:
+            snapshot = list(self._lowered.items())
+        for start in range(0, len(snapshot), 1000):
+            with self._lock:
+                for task_id, lowered in snapshot[start:start + 1000]:
+                    self._add_postings(task_id, lowered)
+        self.ready.set()
+
+    def add(self, task_id: int, title: str):
+        lowered = title.casefold()
+        with self._lock:
+            self._lowered[task_id] = lowered
+            self._add_postings(task_id, lowered)
+
+    def _add_postings(self, task_id: int, lowered: str):
+        postings = self._postings
+        for key in _grams(lowered):
+            posting = postings.get(key)
+            if posting is None:
+                postings[key] = [task_id]
+            else:
+                posting.append(task_id)
+
+    def remove(self, task_id: int):
+        # 索引の一覧からは消さず、検索時に存在確認で除外する
+        self._lowered.pop(task_id, None)
+
+    def matches(self, task_id: int, query: str) -> bool:
+        lowered = self._lowered.get(task_id)
+        return lowered is not None and query in lowered
+
+    def candidates(self, query: str) -> List[int]:
+        """query を含む可能性のあるIDを、最も短い一覧から返す"""
+        if len(query) < 2 or not self.ready.is_set():
+            # 1文字の検索と索引の作成中は全件を調べる
+            return sorted(self._lowered)
+        shortest = None
+        with self._lock:
+            for key in _grams(query):
+                posting = self._postings.get(key)
+                if posting is None:
+                    return []
+                if shortest is None or len(posting) < len(shortest):
+                    shortest = posting
+            return list(shortest or [])
+
+    def search(self, query: str, within: Optional[Iterable[int]] = None) -> List[int]:
+        query = query.casefold()
+        if within is None:
+            within = self.candidates(query)
+        lowered = self._lowered
+        return [task_id for task_id in within if query in lowered.get(task_id, "")]
+
+
+class TaskStore:
+    def __init__(self, path: str = DEFAULT_PATH, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._tasks: Dict[int, Task] = {}
+        self._order: List[int] = []
+        self._notion_ids: Dict[str, int] = {}
+        self.index = TaskIndex()
+        self._listeners: List[Callable[[], None]] = []
+        self._last_query: Tuple[str, List[int]] = ("", [])
+        self._queue: "queue.Queue" = queue.Queue()
+
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        rows = conn.execute(
+            "SELECT id, title, done, created_at, notion_id FROM tasks ORDER BY id").fetchall()
+        conn.close()
+        for row in rows:
+            self._insert(Task(row[0], row[1], bool(row[2]), row[3], row[4]), index=False)
+        self._next_id = (rows[-1][0] + 1) if rows else 1
+        self.index.load((task.id, task.title) for task in self._tasks.values())
+        threading.Thread(target=self.index.build, name="TaskIndexBuilder", daemon=True).start()
+
+        self._writer = threading.Thread(target=self._write_loop, name="TaskWriter", daemon=True)
+        self._writer.start()
+
+    # --- 参照 ---
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def get(self, task_id: int) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def ids(self) -> List[int]:
+        """作成順のタスクID（削除済みを除く）"""
+        if len(self._order) != len(self._tasks):
+            self._order = [task_id for task_id in self._order if task_id in self._tasks]
+        return list(self._order)
+
+    def search(self, query: str) -> List[int]:
+        """タイトルに query を含むタスクIDを作成順で返す
+
+        前回の検索語を伸ばしただけのとき（1文字ずつ入力しているとき）は、
+        前回の結果だけを調べ直す。
+        """
+        query = query.strip()
+        if not query:
+            return self.ids()
+        last_query, last_result = self._last_query
+        if last_query and query.casefold().startswith(last_query.casefold()):
+            result = self.index.search(query, within=last_result)
+        else:
+            result = sorted(self.index.search(query))
+        self._last_query = (query, result)
+        return list(result)
+
+    # --- 変更（メモリ上はすぐ反映し、保存はバックグラウンドで行う） ---
+
+    def subscribe(self, listener: Callable[[], None]):
+        """タスクの追加・削除のあとに listener() を呼ぶ"""
+        self._listeners.append(listener)
+
+    def add(self, title: str, notion_id: Optional[str] = None) -> Optional[Task]:
+        added = self.add_many([(title, notion_id)])
+        return added[0] if added else None
+
+    def add_many(self, items: Iterable) -> List[Task]:
+        """タスクをまとめて追加する。items は title か (title, notion_id) の並び
+
+        同じ notion_id のタスクが既にあれば追加しない。
+        """
+        now = time.time()
+        added = []
+        for item in items:
+            title, notion_id = (item, None) if isinstance(item, str) else item
+            title = title.strip()
+            if not title or (notion_id and notion_id in self._notion_ids):
+                continue
+            task = Task(self._next_id, title, False, now, notion_id)
+            self._next_id += 1
+            self._insert(task)
+            added.append(task)
+        if added:
+            self._changed()
+            self._queue.put(("insert", [tuple(task) for task in added]))
+        return added
+
+    def set_done(self, task_id: int, done: bool = True):
+        task = self._tasks.get(task_id)
+        if task is None or task.done == done:
+            return
+        self._tasks[task_id] = task._replace(done=done)
+        self._queue.put(("done", [(int(done), task_id)]))
+
+    def set_notion_id(self, task_id: int, notion_id: str):
+        """ローカルで作ったタスクに、Notion に作ったページのIDを結びつける
+
+        取り込みが先に走って同じページのタスクができていたら、そちらを削除する。
+        """
+        task = self._tasks.get(task_id)
+        if task is None or task.notion_id == notion_id:
+            return
+        duplicate = self._notion_ids.get(notion_id)
+        if duplicate is not None and duplicate != task_id:
+            self.remove(duplicate)
+        if task.notion_id:
+            self._notion_ids.pop(task.notion_id, None)
+        self._tasks[task_id] = task._replace(notion_id=notion_id)
+        self._notion_ids[notion_id] = task_id
+        self._queue.put(("notion", [(notion_id, task_id)]))
+
+    def remove(self, task_id: int):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        self.index.remove(task_id)
+        if task.notion_id:
+            self._notion_ids.pop(task.notion_id, None)
+        self._changed()
+        self._queue.put(("delete", [(task_id,)]))
+
+    def flush(self):
+        """保存待ちの変更が書き込まれるまで待つ"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _insert(self, task: Task, index: bool = True):
+        self._tasks[task.id] = task
+        self._order.append(task.id)
+        if index:
+            self.index.add(task.id, task.title)
+        if task.notion_id:
+            self._notion_ids[task.notion_id] = task.id
+
+    def _changed(self):
+        self._last_query = ("", [])
+        for listener in list(self._listeners):
+            listener()
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.path)
+        statements = {
+            "insert": "INSERT INTO tasks (id, title, done, created_at, notion_id) VALUES (?, ?, ?, ?, ?)",
+            "done": "UPDATE tasks SET done = ? WHERE id = ?",
+            "notion": "UPDATE tasks SET notion_id = ? WHERE id = ?",
+            "delete": "DELETE FROM tasks WHERE id = ?",
+        }
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # 続けて届いている変更は1トランザクションにまとめる
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for item in batch:
+                        if item is _STOP:
+                            stopping = True
+                            continue
+                        kind, rows = item
+                        conn.executemany(statements[kind], rows)
+            except sqlite3.Error as e:
+                logging.error(f"タスクの保存に失敗しました: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
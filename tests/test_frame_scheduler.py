@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""frame_scheduler（時計表示のフレームスケジューラ）のテスト"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from frame_scheduler import BOUNDARY_SLACK_MS, FrameScheduler  # noqa: E402
+
+
+class FakeLoop:
+    """schedule / cancel を記録し、予約されたフレームを手動で進める"""
+
+    def __init__(self, now=1000.25, tokens=True):
+        self.now = now
+        self.tokens = tokens
+        self.pending = []
+        self.cancelled = []
+        self._next = 0
+
+    def clock(self):
+        return self.now
+
+    def schedule(self, delay_ms):
+        self._next += 1
+        self.pending.append((self._next, delay_ms))
+        # Qt の QTimer.start のように取り消し用の値を返さない予約もある
+        return self._next if self.tokens else None
+
+    def cancel(self, token):
+        self.cancelled.append(token)
+        if self.pending:
+            self.pending.pop()
+
+    def advance(self, scheduler):
+        _, delay_ms = self.pending.pop()
+        self.now += delay_ms / 1000
+        scheduler.run_frame()
+        return delay_ms
+
+
+def make(loop, **kwargs):
+    return FrameScheduler(loop.schedule, loop.cancel, clock=loop.clock, **kwargs)
+
+
+def test_wakes_on_second_boundaries_and_repaints_only_changes():
+    loop = FakeLoop()
+    scheduler = make(loop)
+    seconds, minutes = [], []
+    scheduler.add(lambda now: int(now), seconds.append)
+    scheduler.add(lambda now: int(now) // 60, minutes.append)
+    scheduler.start()
+    assert loop.pending == [(1, 750 + BOUNDARY_SLACK_MS)]
+    for _ in range(3):
+        loop.advance(scheduler)
+    assert seconds == [1000, 1001, 1002, 1003]
+    assert minutes == [16]
+    assert scheduler.wakeups == 4
+    assert scheduler.repaints == 5
+    # 起床直後はいつも次の秒境界までの予約が1件だけある
+    assert len(loop.pending) == 1
+
+
+def test_refresh_repaints_without_waiting_for_boundary():
+    loop = FakeLoop()
+    scheduler = make(loop)
+    label = []
+    state = {"text": "作業中"}
+    scheduler.add(lambda now: state["text"], label.append)
+    scheduler.start()
+    state["text"] = "休憩中"
+    scheduler.refresh()
+    assert label == ["作業中", "休憩中"]
+    assert len(loop.pending) == 1
+
+
+def test_hidden_window_stops_updates():
+    loop = FakeLoop()
+    scheduler = make(loop)
+    values = []
+    scheduler.add(lambda now: int(now), values.append)
+    scheduler.start()
+    scheduler.set_visible(False)
+    assert loop.pending == []
+    scheduler.set_visible(True)
+    assert values == [1000]
+    assert len(loop.pending) == 1
+    scheduler.stop()
+    assert loop.pending == []
+
+
+def test_hidden_interval_keeps_slow_updates():
+    loop = FakeLoop()
+    scheduler = make(loop, hidden_interval=30)
+    scheduler.add(lambda now: int(now), lambda value: None)
+    scheduler.start()
+    scheduler.set_visible(False)
+    assert [delay for _, delay in loop.pending] == [int((30 - 0.25) * 1000) + BOUNDARY_SLACK_MS]
+
+
+def test_cancels_pending_frame_without_token():
+    loop = FakeLoop(tokens=False)
+    scheduler = make(loop)
+    scheduler.add(lambda now: int(now), lambda value: None)
+    scheduler.start()
+    scheduler.stop()
+    assert loop.cancelled == [None]
+    assert loop.pending == []
+    # 予約がなければ取り消さない
+    scheduler.stop()
+    assert loop.cancelled == [None]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""history_store（SQLite のフェーズ履歴）のテスト"""
+import datetime
+import io
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history_store import HistoryStore, PhaseRecord, day_of  # noqa: E402
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def test_records_are_queried_by_day_and_task(store):
+    today = datetime.date(2024, 5, 1)
+    tomorrow = today + datetime.timedelta(days=1)
+    store.record("work", at(today, 9), at(today, 9, 25), task="資料を読む", video_id="abc")
+    store.record("short_break", at(today, 9, 25), at(today, 9, 30))
+    store.record("work", at(tomorrow, 9), at(tomorrow, 9, 25), task="資料を読む")
+    store.record("work", at(tomorrow, 10), at(tomorrow, 10, 25), task=None)
+    store.flush()
+
+    assert store.query_day(today) == [
+        PhaseRecord(at(today, 9), at(today, 9, 25), "work", "資料を読む", "abc"),
+        PhaseRecord(at(today, 9, 25), at(today, 9, 30), "short_break"),
+    ]
+    assert len(store.query_range(today, tomorrow)) == 4
+    assert [r.started_at for r in store.query_task("資料を読む")] == [at(today, 9), at(tomorrow, 9)]
+    assert [r.started_at for r in store.query_task("資料を読む", tomorrow)] == [at(tomorrow, 9)]
+    assert store.daily_totals(today, tomorrow) == {
+        today.isoformat(): 25 * 60,
+        tomorrow.isoformat(): 50 * 60,
+    }
+    assert store.daily_totals(today, today, phase="short_break") == {today.isoformat(): 5 * 60}
+
+
+def test_records_survive_reopen(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path, batch_size=2, flush_interval=0.01)
+    for i in range(5):
+        store.record("work", 1000.0 + i * 100, 1025.0 + i * 100)
+    # close() は積まれている記録を書き終えてから戻る
+    store.close()
+
+    reopened = HistoryStore(path)
+    records = reopened.query_range(day_of(1000.0), day_of(1425.0))
+    reopened.close()
+    assert [r.started_at for r in records] == [1000.0 + i * 100 for i in range(5)]
+
+
+def test_export_streams_rows_in_order(store):
+    for i in range(5):
+        store.record("work", 2000.0 - i * 100, 2025.0 - i * 100, task=f"タスク{i}")
+    store.flush()
+
+    rows = list(store.export(since=1800.0, chunk_size=2))
+    assert [row["started_at"] for row in rows] == [1800.0, 1900.0, 2000.0]
+    assert rows[0]["day"] == day_of(1800.0)
+
+    out = io.StringIO()
+    assert store.export_jsonl(out) == 5
+    assert json.loads(out.getvalue().splitlines()[0])["task"] == "タスク4"
+    out = io.StringIO()
+    assert store.export_csv(out, since=2000.0) == 1
+    assert out.getvalue().splitlines()[0] == "day,started_at,ended_at,phase,task,video_id"
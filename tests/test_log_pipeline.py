@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""log_pipeline（キュー経由のロギング）のテスト
+
+setup_logging はルートロガーを書き換えるので、別プロセスで実行して確かめる。
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import json, logging, sys
+sys.path.insert(0, %(root)r)
+from log_pipeline import setup_logging
+pipeline = setup_logging(filename=%(path)r, log_format="text", trim_records=%(trim)r)
+logging.getLogger("youtube_player").info("1件目")
+pipeline.stop()
+print(json.dumps({
+    "srcfile": logging._srcfile is not None,
+    "threads": logging.logThreads,
+    "processes": logging.logProcesses,
+    "factory": logging.getLogRecordFactory().__name__,
+}))
+"""
+
+
+def run(tmp_path, trim):
+    path = str(tmp_path / "pomodoro.log")
+    output = subprocess.run([sys.executable, "-c", SCRIPT % {"root": ROOT, "path": path, "trim": trim}],
+                            capture_output=True, check=True, text=True).stdout
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return json.loads(output), lines
+
+
+def test_setup_logging_keeps_global_logging_state_by_default(tmp_path):
+    state, lines = run(tmp_path, trim=False)
+    assert state == {"srcfile": True, "threads": True, "processes": True, "factory": "LogRecord"}
+    assert lines[0].endswith(" - INFO - 1件目")
+
+
+def test_trim_records_is_opt_in(tmp_path):
+    state, lines = run(tmp_path, trim=True)
+    assert state == {"srcfile": False, "threads": False, "processes": False, "factory": "LightLogRecord"}
+    assert lines[0].endswith(" - INFO - 1件目")
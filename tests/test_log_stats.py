@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""log_stats（pomodoro.log の差分集計）のテスト"""
+import datetime
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_stats import LogStats  # noqa: E402
+
+
+def log_line(day, clock, message):
+    return f"{day} {clock},000 - INFO - {message}\n"
+
+
+def test_log_stats_follows_rotation(tmp_path):
+    day = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    log_path = str(tmp_path / "pomodoro.log")
+    summary_path = str(tmp_path / "log_stats.json")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(log_line(day, "10:00:00", "タイマーが開始されました"))
+    stats = LogStats(log_path, summary_path)
+    stats.update()
+    # 前回読んだ後に旧ファイルへ追記され、その後ローテートされた
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(log_line(day, "10:25:00", "フェーズが終了しました: work"))
+    os.replace(log_path, log_path + ".1")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(log_line(day, "11:00:00", "タイマーが開始されました"))
+        f.write(log_line(day, "11:05:00", "フェーズが終了しました: short_break"))
+        f.write(log_line(day, "11:05:00", "タイマーが開始されました"))
+        f.write(log_line(day, "11:10:00", "タイマーが一時停止されました"))
+        # 書きかけの行は次回に回す
+        f.write(f"{day} 11:12:00,000 - INFO - タイマーが再")
+
+    # 要約ファイルから再開しても同じ結果になる
+    stats = LogStats(log_path, summary_path)
+    stats.update()
+    totals = dict(stats.recent_days(2))[day]
+    assert totals["pomodoros"] == 1
+    assert totals["interruptions"] == 1
+    assert totals["focus_seconds"] == pytest.approx(25 * 60 + 5 * 60)
+
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write("開されました\n")
+        f.write(log_line(day, "11:32:00", "フェーズが終了しました: work"))
+    stats.update()
+    totals = dict(stats.recent_days(2))[day]
+    assert totals["pomodoros"] == 2
+    assert totals["focus_seconds"] == pytest.approx(25 * 60 + 5 * 60 + 20 * 60)
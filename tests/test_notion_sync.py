@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""notion_sync（Notion へのアウトボックス同期）のテスト（notion_client は使わない）"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from notion_sync import LEASE_SECONDS, NotionOutbox, NotionSync  # noqa: E402
+
+
+class FakeClient:
+    """pages.create と databases.query だけを持つ AsyncClient の代わり"""
+
+    def __init__(self, block=False):
+        self.created = []
+        self.queries = []
+        self.started = threading.Event()
+        self.block = block
+        self.pages = self
+        self.databases = self
+
+    async def create(self, parent, properties):
+        self.started.set()
+        if self.block:
+            await asyncio.Event().wait()
+        self.created.append(properties)
+        return {"id": f"page-{len(self.created)}"}
+
+    async def query(self, **options):
+        self.queries.append(options)
+        return {"results": [], "has_more": False}
+
+
+def test_due_leases_rows_to_one_worker(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    first = NotionOutbox(path)
+    second = NotionOutbox(path)
+    first.enqueue_many([("phase", {"n": i}) for i in range(3)])
+    now = time.time()
+    assert [row[2]["n"] for row in first.due(10, now)] == [0, 1, 2]
+    # 貸し出し中の行は、同じファイルを開いた別のワーカーには渡さない
+    assert second.due(10, now) == []
+    assert len(second.due(10, now + LEASE_SECONDS + 1)) == 3
+    first.close()
+    second.close()
+
+
+def test_release_makes_rows_due_again(tmp_path):
+    outbox = NotionOutbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue_many([("phase", {"n": 1})])
+    now = time.time()
+    row_id = outbox.due(10, now)[0][0]
+    outbox.release([row_id])
+    assert [row[0] for row in outbox.due(10, now)] == [row_id]
+    outbox.close()
+
+
+def test_created_task_page_id_is_reported(tmp_path):
+    client = FakeClient()
+    created = []
+    sync = NotionSync("secret", "database", path=str(tmp_path / "outbox.db"), rate=100,
+                      client_factory=lambda: client,
+                      on_task_created=lambda task_id, page_id: created.append((task_id, page_id)))
+    sync.enqueue_phase("work", 0, 1500)
+    sync.enqueue_task("資料を読む", 7)
+    assert sync.drain(5)
+    assert sync.fetch_tasks().result(5) == []
+    sync.close()
+    assert created == [(7, "page-2")]
+    # タスクの取り込みはフェーズの記録（Phase あり）を除いて問い合わせる
+    assert client.queries[0]["filter"] == {"property": "Phase", "select": {"is_empty": True}}
+
+
+def test_close_cancels_in_flight_batch(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    client = FakeClient(block=True)
+    sync = NotionSync("secret", "database", path=path, rate=100, concurrency=1,
+                      client_factory=lambda: client)
+    sync.enqueue_many([("phase", {"phase": "work", "started_at": 0, "ended_at": i}) for i in range(2)])
+    assert client.started.wait(5)
+    sync.close(timeout=5)
+    assert not sync.is_running
+
+    outbox = NotionOutbox(path)
+    now = time.time()
+    # 送信前だった行はすぐに、送信中だった行は貸し出しの期限後に送られる
+    assert [row[2]["ended_at"] for row in outbox.due(10, now)] == [1]
+    leased = outbox.conn.execute("SELECT COUNT(*) FROM outbox WHERE next_attempt_at > ?", (now,)).fetchone()[0]
+    assert leased == 2
+    outbox.close()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""scheduler_service（共有ルーム用のマルチセッションスケジューラ）のテスト"""
+import asyncio
+import math
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scheduler_service import InvalidDuration, SessionScheduler  # noqa: E402
+from timer_core import TimerError  # noqa: E402
+
+
+def run(coroutine_function):
+    async def main():
+        return await coroutine_function(SessionScheduler(asyncio.get_running_loop()))
+    return asyncio.run(asyncio.wait_for(main(), 5))
+
+
+@pytest.mark.parametrize("value", [0, -1, math.nan, math.inf])
+def test_create_rejects_non_positive_durations(value):
+    async def scenario(scheduler):
+        with pytest.raises(InvalidDuration):
+            scheduler.create(work=value, short_break=5, long_break=15)
+        with pytest.raises(InvalidDuration):
+            scheduler.create(work=25, short_break=value, long_break=15)
+        return len(scheduler.sessions)
+
+    assert run(scenario) == 0
+
+
+def test_deadlines_drive_phase_transitions():
+    async def scenario(scheduler):
+        events = []
+        scheduler.subscribe(lambda payload: events.append((payload["event"], payload["phase"])))
+        session = scheduler.create(work=0.02, short_break=0.02, long_break=0.02)
+        scheduler.start(session.id)
+        await asyncio.sleep(0.1)
+        scheduler.stop(session.id)
+        return events, session
+
+    events, session = run(scenario)
+    phases = [phase for event, phase in events if event == "transition"]
+    assert phases[:2] == ["short_break", "work"]
+    assert session.cycle.pomodoro_count >= 1
+
+
+def test_skip_stop_and_delete():
+    async def scenario(scheduler):
+        session = scheduler.create(work=60, short_break=5, long_break=15)
+        scheduler.start(session.id)
+        scheduler.pause(session.id)
+        scheduler.skip(session.id)
+        assert session.snapshot()["state"] == "running"
+        assert session.cycle.phase == "short_break"
+        scheduler.stop(session.id)
+        # 停止したセッションは最終状態を参照でき、統計にも数える
+        final = scheduler.get(session.id).snapshot()
+        stats = scheduler.stats()
+        with pytest.raises(TimerError):
+            scheduler.skip(session.id)
+        scheduler.delete(session.id)
+        return final, stats, len(scheduler.sessions)
+
+    final, stats, remaining = run(scenario)
+    assert final["state"] == "stopped"
+    assert final["pomodoro_count"] == 1
+    assert stats["stopped_sessions"] == 1
+    assert remaining == 0
+
+
+def test_route_rejects_zero_durations_with_422():
+    fastapi = pytest.importorskip("fastapi")
+    testclient = pytest.importorskip("fastapi.testclient")
+    from scheduler_service import register_routes
+
+    app = fastapi.FastAPI()
+    register_routes(app)
+    with testclient.TestClient(app) as client:
+        response = client.post("/sessions", params={"work": 0, "short_break": 0, "long_break": 0})
+        assert response.status_code == 422
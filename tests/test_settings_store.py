@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""settings_store（settings.json の読み書き）のテスト"""
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from settings_store import SettingsStore  # noqa: E402
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path, values):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(values, f)
+    # mtime の分解能が粗いファイルシステムでも変更に気づけるよう mtime を進める
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+
+
+def test_creates_file_with_defaults(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = SettingsStore(path, defaults={"volume": 50, "theme": "light"})
+    assert read_json(path) == {"volume": 50, "theme": "light"}
+    store.close()
+    # 後から増えたデフォルト値は既存のファイルに無くても読める
+    store = SettingsStore(path, defaults={"volume": 50, "theme": "light", "speed": 1.0})
+    assert store["speed"] == 1.0
+    assert store.get("missing", "x") == "x"
+    store.close()
+
+
+def test_updates_are_written_together(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = SettingsStore(path, defaults={"volume": 50}, debounce=60)
+    writes = store.writes
+    changes = []
+    store.subscribe(lambda key, value: changes.append((key, value)))
+    for volume in range(10):
+        store.set("volume", volume)
+    store.set("volume", 9)
+    assert changes == [("volume", v) for v in range(10)]
+    # debounce 中はまだ書かれない
+    assert read_json(path) == {"volume": 50}
+    store.close()
+    assert read_json(path) == {"volume": 9}
+    assert store.writes == writes + 1
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")]
+
+
+def test_reloads_external_edits(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = SettingsStore(path, defaults={"volume": 50, "theme": "light"}, check_interval=0)
+    changes = []
+    store.subscribe(lambda key, value: changes.append((key, value)))
+    write_json(path, {"volume": 70})
+    assert store["volume"] == 70
+    assert store["theme"] == "light"
+    assert changes == [("volume", 70)]
+    store.close()
+
+
+def test_unsaved_changes_win_over_external_edits(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = SettingsStore(path, defaults={"volume": 50}, debounce=60, check_interval=0)
+    store.set("volume", 10)
+    write_json(path, {"volume": 70})
+    assert store["volume"] == 10
+    store.close()
+    assert read_json(path) == {"volume": 10}
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""clock.SimulatedClock と simulation（時計を差し替えた早送りシミュレーション）のテスト"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from clock import SimulatedClock  # noqa: E402
+from simulation import Simulation  # noqa: E402
+
+
+def test_simulated_clock_runs_callbacks_in_order():
+    clock = SimulatedClock(start=10.0, wall_start=1000.0)
+    fired = []
+    clock.call_later(5, fired.append, "b")
+    clock.call_later(1, fired.append, "a")
+    late = clock.call_later(30, fired.append, "late")
+    cancelled = clock.call_later(2, fired.append, "cancelled")
+    clock.cancel(cancelled)
+    # 実行済みのものを取り消しても何も起きない
+    assert clock.advance(5) == 2
+    clock.cancel(cancelled)
+    assert fired == ["a", "b"]
+    assert clock.monotonic() == 15.0
+    assert clock.time() == 1005.0
+    assert clock.pending == 1
+    assert clock.next_time() == 40.0
+    clock.cancel(late)
+    assert clock.run() == 0
+    assert clock.pending == 0 and clock.next_time() is None
+
+
+def test_simulated_clock_run_stops_at_until():
+    clock = SimulatedClock()
+    ticks = []
+
+    def tick():
+        ticks.append(clock.monotonic())
+        clock.call_later(1, tick)
+
+    clock.call_later(0, tick)
+    assert clock.run(until=3.5) == 4
+    assert ticks == [0.0, 1.0, 2.0, 3.0]
+    assert clock.monotonic() == 3.5
+    assert clock.run(max_events=2) == 2
+    assert clock.run(stop=lambda: len(ticks) >= 8) == 2
+
+
+def test_simulation_follows_phase_cycle():
+    simulation = Simulation({"work": 25 * 60, "short_break": 5 * 60, "long_break": 15 * 60})
+    simulation.run_cycles(8)
+    summary = simulation.summary()
+    assert summary["pomodoros"] == 8
+    assert summary["long_breaks"] == 2
+    assert [record.phase for record in simulation.history.records[:2]] == ["work", "short_break"]
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""state_snapshot（mmap の seqlock レコード）のテスト
+
+書き込み途中で落ちた場合や、書き込み中のプロセスを kill した場合にも
+直前に書き終えたレコードを読めることを確かめる。
+"""
+import os
+import subprocess
+import sys
+import time
+import zlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import state_snapshot as ss  # noqa: E402
+from state_snapshot import StateSnapshot, TimerSnapshot  # noqa: E402
+
+
+def record(i):
+    # 各フィールドは i から決まる（壊れたレコードなら一致しない）
+    return TimerSnapshot(phase="work", is_active=True, pomodoro_count=i, duration=i * 1.5,
+                         deadline=i * 2.0, frozen_remaining=i * 3.0, phase_started_at=i * 4.0,
+                         written_at=i * 5.0, video_id=str(i))
+
+
+def consistent(snapshot):
+    i = snapshot.pomodoro_count
+    return snapshot == record(i)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "timer_state.bin")
+    snapshot = StateSnapshot(path)
+    assert snapshot.read() is None
+    for i in range(1, 4):
+        snapshot.write(record(i))
+    snapshot.close()
+    reopened = StateSnapshot(path)
+    assert reopened.read() == record(3)
+    reopened.close()
+
+
+@pytest.mark.parametrize("stage", ["seq_odd", "before_commit", "no_marker"])
+@pytest.mark.parametrize("cut", [1, ss._PAYLOAD.size // 2, ss._PAYLOAD.size])
+@pytest.mark.parametrize("good", [1, 2, 5])
+def test_snapshot_ignores_torn_write(tmp_path, stage, cut, good):
+    path = str(tmp_path / "timer_state.bin")
+    snapshot = StateSnapshot(path)
+    for i in range(1, good + 1):
+        snapshot.write(record(i))
+    # 次の書き込みを途中まで行ったところで落ちたことにする
+    seq = snapshot._seq + 2
+    offset = ss._HEADER.size + (seq // 2 % 2) * ss._SLOT_SIZE
+    mm = snapshot._mm
+    garbage = os.urandom(ss._PAYLOAD.size)
+    if stage != "no_marker":
+        ss._SEQ.pack_into(mm, offset, seq - 1)
+    mm[offset + ss._SEQ.size:offset + ss._SEQ.size + cut] = garbage[:cut]
+    if stage == "before_commit":
+        ss._CRC.pack_into(mm, offset + ss._SEQ.size + ss._PAYLOAD.size, zlib.crc32(garbage))
+    mm.flush()
+
+    reopened = StateSnapshot(path)
+    assert reopened.read() == record(good)
+    reopened.close()
+    snapshot.close()
+
+
+def test_snapshot_falls_back_when_latest_record_is_corrupt(tmp_path):
+    path = str(tmp_path / "timer_state.bin")
+    snapshot = StateSnapshot(path)
+    for i in range(1, 4):
+        snapshot.write(record(i))
+    # 書き終えたレコード（seq は偶数）の本体だけが壊れた場合は CRC で見分ける
+    offset = ss._HEADER.size + (snapshot._seq // 2 % 2) * ss._SLOT_SIZE + ss._SEQ.size
+    snapshot._mm[offset + 8] ^= 0xFF
+    snapshot.close()
+    reopened = StateSnapshot(path)
+    assert reopened.read() == record(2)
+    reopened.close()
+
+
+WRITER = """
+import sys
+sys.path.insert(0, %(root)r)
+from state_snapshot import StateSnapshot, TimerSnapshot
+snapshot = StateSnapshot(%(path)r)
+i = first = (snapshot.read() or TimerSnapshot()).pomodoro_count + 1
+while True:
+    snapshot.write(TimerSnapshot(phase="work", is_active=True, pomodoro_count=i, duration=i * 1.5,
+                                 deadline=i * 2.0, frozen_remaining=i * 3.0, phase_started_at=i * 4.0,
+                                 written_at=i * 5.0, video_id=str(i)))
+    if i == first:
+        # 最初の1件を書き終えてから kill してもらう
+        print("ready", flush=True)
+    i += 1
+"""
+
+
+def test_snapshot_survives_killed_writer(tmp_path):
+    path = str(tmp_path / "timer_state.bin")
+    last = 0
+    for delay in (0.0, 0.005, 0.02):
+        process = subprocess.Popen([sys.executable, "-c", WRITER % {"root": ROOT, "path": path}],
+                                   stdout=subprocess.PIPE)
+        process.stdout.readline()
+        time.sleep(delay)
+        process.kill()
+        process.wait()
+        process.stdout.close()
+        snapshot = StateSnapshot(path)
+        recovered = snapshot.read()
+        snapshot.close()
+        assert recovered is not None and consistent(recovered)
+        assert recovered.pomodoro_count >= last
+        last = recovered.pomodoro_count
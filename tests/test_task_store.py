@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""task_store（SQLite のタスク一覧）のテスト"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from task_store import TaskStore  # noqa: E402
+
+
+def test_task_store_dedups_notion_pages(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(path)
+    first = store.add_many([("資料を読む", "page-1"), ("メールを書く", "page-2")])
+    again = store.add_many([("資料を読む", "page-1"), ("レビュー", "page-3")])
+    assert [task.title for task in first] == ["資料を読む", "メールを書く"]
+    assert [task.notion_id for task in again] == ["page-3"]
+    assert len(store) == 3
+    store.flush()
+    store.close()
+
+    reopened = TaskStore(path)
+    assert reopened.add_many([("メールを書く", "page-2")]) == []
+    assert len(reopened) == 3
+    reopened.close()
+
+
+def test_task_store_links_local_task_to_created_page(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = TaskStore(path)
+    local = store.add("設計メモ")
+    # 作成したページが先に取り込まれていた場合も、残るのはローカルのタスク1件だけ
+    store.add_many([("設計メモ", "page-9")])
+    store.set_notion_id(local.id, "page-9")
+    assert store.ids() == [local.id]
+    assert store.add_many([("設計メモ", "page-9")]) == []
+    store.flush()
+    store.close()
+
+    reopened = TaskStore(path)
+    assert reopened.get(local.id).notion_id == "page-9"
+    assert len(reopened) == 1
+    reopened.close()
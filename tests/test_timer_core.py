@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""timer_core（DeadlineTimer・PhaseCycle）のテスト"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from timer_core import DeadlineTimer, PhaseCycle, TimerError  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_timer_pause_and_resume():
+    clock = FakeClock()
+    timer = DeadlineTimer(60, clock)
+    timer.start()
+    clock.now += 20
+    assert timer.remaining() == pytest.approx(40)
+    timer.pause()
+    clock.now += 100
+    assert timer.remaining() == pytest.approx(40)
+    timer.resume()
+    clock.now += 30
+    assert timer.remaining() == pytest.approx(10)
+    clock.now += 30
+    assert timer.remaining() == 0
+
+
+def test_deadline_timer_rejects_invalid_transitions():
+    timer = DeadlineTimer(60, FakeClock())
+    with pytest.raises(TimerError):
+        timer.pause()
+    timer.start()
+    with pytest.raises(TimerError):
+        timer.start()
+    with pytest.raises(TimerError):
+        timer.resume()
+    timer.stop()
+    with pytest.raises(TimerError):
+        timer.stop()
+
+
+def test_phase_cycle_long_break_every_fourth_pomodoro():
+    cycle = PhaseCycle(work=25, short_break=5, long_break=15, long_break_interval=4)
+    phases = [cycle.advance() for _ in range(16)]
+    assert phases == ["short_break", "work"] * 3 + ["long_break", "work"] + ["short_break", "work"] * 3 + ["long_break", "work"]
+    # 休憩は数えない
+    assert cycle.pomodoro_count == 8
+    assert cycle.duration == 25
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""締め切り（モノトニック時計）ベースのタイマーコア
+
+Qt版の PomodoroWorker と Tk版の Timer が共有する。
+毎秒 sleep して残り時間を減らすのではなく、終了時刻から残り時間を
+計算するため、負荷がかかっても誤差が蓄積しない。
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+import metrics
+
+# ceil 計算時の浮動小数点誤差の吸収用
+_EPSILON = 1e-6
+
+WORK_DURATION = 25 * 60
+SHORT_BREAK_DURATION = 5 * 60
+LONG_BREAK_DURATION = 15 * 60
+LONG_BREAK_INTERVAL = 4
+
+TIMER_WAKEUPS = metrics.counter("pomodoro_timer_wakeups_total", "タイマーの起床回数")
+TIMER_DRIFT = metrics.histogram("pomodoro_timer_drift_seconds", "予定時刻からの起床の遅れ",
+                                buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.5))
+
+
+class TimerError(Exception):
+    """タイマー関連のカスタムエラー"""
+    pass
+
+
+class DriftStats:
+    """予定したウェイクアップ時刻と実際のウェイクアップ時刻のずれを集計する"""
+
+    def __init__(self):
+        self.samples: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.last: float = 0.0
+
+    def record(self, scheduled: float, actual: float) -> float:
+        drift = actual - scheduled
+        TIMER_WAKEUPS.inc()
+        TIMER_DRIFT.observe(abs(drift))
+        self.samples += 1
+        self.total += drift
+        self.last = drift
+        if abs(drift) > abs(self.max):
+            self.max = drift
+        return drift
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "samples": self.samples,
+            "mean_ms": self.mean * 1000,
+            "max_ms": self.max * 1000,
+            "last_ms": self.last * 1000,
+        }
+
+    def __str__(self):
+        return (f"samples={self.samples} mean={self.mean * 1000:.2f}ms "
+                f"max={self.max * 1000:.2f}ms")
+
+
+class DeadlineTimer:
+    """終了時刻を保持し、残り時間をその都度計算するタイマー"""
+
+    def __init__(self, duration: float = 25 * 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.duration = duration
+        self.clock = clock
+        self.is_active: bool = False
+        self.deadline: Optional[float] = None
+        self.paused_remaining: Optional[float] = None
+        self.drift = DriftStats()
+
+    @property
+    def is_paused(self) -> bool:
+        return self.paused_remaining is not None
+
+    def start(self):
+        if self.is_active:
+            raise TimerError("タイマーは既に動作中です")
+        self.deadline = self.clock() + self.duration
+        self.paused_remaining = None
+        self.is_active = True
+
+    def stop(self):
+        if not self.is_active:
+            raise TimerError("タイマーは動作していません")
+        self.is_active = False
+        self.deadline = None
+        self.paused_remaining = None
+
+    def pause(self):
+        if not self.is_active:
+            raise TimerError("タイマーは動作していません")
+        if self.is_paused:
+            raise TimerError("タイマーは既に一時停止中です")
+        self.paused_remaining = self.remaining()
+        self.deadline = None
+
+    def resume(self):
+        if not self.is_active:
+            raise TimerError("タイマーは動作していません")
+        if not self.is_paused:
+            raise TimerError("タイマーは一時停止されていません")
+        self.deadline = self.clock() + self.paused_remaining
+        self.paused_remaining = None
+
+    def restore(self, remaining: float, paused: bool = False):
+        """保存しておいた残り時間から、動作中（または一時停止中）の状態に戻す"""
+        self.is_active = True
+        if paused:
+            self.paused_remaining = remaining
+            self.deadline = None
+        else:
+            self.deadline = self.clock() + remaining
+            self.paused_remaining = None
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """残り時間（秒）"""
+        if not self.is_active:
+            return self.duration
+        if self.is_paused:
+            return self.paused_remaining
+        if now is None:
+            now = self.clock()
+        return max(self.deadline - now, 0.0)
+
+    def display_seconds(self, now: Optional[float] = None) -> int:
+        """表示用の残り秒数（切り上げ。開始直後は duration そのものを表示する）"""
+        return max(math.ceil(self.remaining(now) - _EPSILON), 0)
+
+    def next_wakeup(self, resolution: float = 1.0,
+                    now: Optional[float] = None) -> Optional[float]:
+        """表示上の残り時間が次に変わる時刻を返す。一時停止中・停止中は None"""
+        if not self.is_active or self.is_paused:
+            return None
+        if now is None:
+            now = self.clock()
+        remaining = self.deadline - now
+        if remaining <= 0:
+            return now
+        steps = math.ceil(remaining / resolution - _EPSILON) - 1
+        return self.deadline - steps * resolution
+
+
+class Transition(NamedTuple):
+    """フェーズ遷移1回分（at はタイマーの時計、wall は壁時計）"""
+    at: float
+    wall: float
+    finished: str
+    phase: str
+    pomodoro_count: int
+    duration: float
+
+
+class PhaseCycle:
+    """作業 → 短休憩 →（4回ごとに長休憩）のフェーズ遷移
+
+    pomodoro_count は完了した作業フェーズの数だけを数える。
+    """
+
+    WORK = "work"
+    SHORT_BREAK = "short_break"
+    LONG_BREAK = "long_break"
+
+    def __init__(self, work: float = WORK_DURATION,
+                 short_break: float = SHORT_BREAK_DURATION,
+                 long_break: float = LONG_BREAK_DURATION,
+                 long_break_interval: int = LONG_BREAK_INTERVAL):
+        self.durations = {
+            self.WORK: work,
+            self.SHORT_BREAK: short_break,
+            self.LONG_BREAK: long_break,
+        }
+        self.long_break_interval = long_break_interval
+        self.pomodoro_count: int = 0
+        self.is_break: bool = False
+        self.is_long_break: bool = False
+
+    @property
+    def phase(self) -> str:
+        if not self.is_break:
+            return self.WORK
+        return self.LONG_BREAK if self.is_long_break else self.SHORT_BREAK
+
+    @property
+    def duration(self) -> float:
+        return self.durations[self.phase]
+
+    def advance(self) -> str:
+        """現在のフェーズを完了させ、次のフェーズ名を返す"""
+        if not self.is_break:
+            self.pomodoro_count += 1
+            self.is_break = True
+            self.is_long_break = self.pomodoro_count % self.long_break_interval == 0
+        else:
+            self.is_break = False
+            self.is_long_break = False
+        return self.phase
+
+    def reset(self):
+        self.pomodoro_count = 0
+        self.is_break = False
+        self.is_long_break = False
+
+
+class _HubEntry:
+    __slots__ = ("timer", "on_tick", "on_finished", "generation")
+
+    def __init__(self, timer, on_tick, on_finished):
+        self.timer = timer
+        self.on_tick = on_tick
+        self.on_finished = on_finished
+        self.generation = 0
+
+
+class TimerHub:
+    """複数の DeadlineTimer を1本のウェイクアップスレッドで駆動する
+
+    タイマーごとにスレッドを持たず、次の表示境界をキーにしたヒープで
+    最も早いものだけを待つ。コールバックはハブのスレッドから呼ばれる。
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        self._heap = []
+        self._entries: Dict[int, _HubEntry] = {}
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="TimerHub", daemon=True)
+        self._thread.start()
+
+    def add(self, timer: DeadlineTimer,
+            on_tick: Optional[Callable[[int], None]] = None,
+            on_finished: Optional[Callable[[], None]] = None) -> int:
+        """動作中のタイマーを登録してハンドルを返す"""
+        handle = next(self._ids)
+        with self._cond:
+            self._entries[handle] = _HubEntry(timer, on_tick, on_finished)
+            self._push(handle)
+        return handle
+
+    def reschedule(self, handle: int):
+        """一時停止・再開などでタイマーの締め切りが変わったときに呼ぶ"""
+        with self._cond:
+            if handle in self._entries:
+                self._push(handle)
+
+    def remove(self, handle: int):
+        with self._cond:
+            self._entries.pop(handle, None)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _push(self, handle: int):
+        # 呼び出し側で self._cond を保持していること
+        entry = self._entries[handle]
+        entry.generation += 1
+        when = entry.timer.next_wakeup(self.resolution)
+        if when is not None:
+            heapq.heappush(self._heap, (when, handle, entry.generation))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    when, handle, generation = self._heap[0]
+                    entry = self._entries.get(handle)
+                    if entry is None or entry.generation != generation:
+                        # 削除済み・再スケジュール済みのエントリは捨てる
+                        heapq.heappop(self._heap)
+                        continue
+                    delay = when - entry.timer.clock()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    heapq.heappop(self._heap)
+                    break
+                else:
+                    return
+                timer = entry.timer
+                now = timer.clock()
+                timer.drift.record(when, now)
+                seconds = timer.display_seconds(now)
+                if seconds <= 0:
+                    del self._entries[handle]
+                    timer.is_active = False
+                    timer.deadline = None
+                    callback, args = entry.on_finished, ()
+                else:
+                    self._push(handle)
+                    callback, args = entry.on_tick, (seconds,)
+            if callback is not None:
+                callback(*args)
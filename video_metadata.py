@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""動画メタデータ（長さ・タイトル・最終視聴時刻）のローカルキャッシュ
+
+動画IDをキーに SQLite へ保存し、その前段にメモリ上の LRU を置く。
+一度見た動画は、ブラウザで再生ページを開かずに長さを取得できる。
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join("pomodoro_data", "video_metadata.db")
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30日
+
+
+class VideoMetadata(NamedTuple):
+    video_id: str
+    duration: Optional[int]
+    title: Optional[str]
+    last_seen: float
+
+
+class VideoMetadataStore:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = DEFAULT_TTL,
+                 memory_size: int = 256):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, VideoMetadata]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                video_id TEXT PRIMARY KEY,
+                duration INTEGER,
+                title TEXT,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_video_metadata_last_seen ON video_metadata(last_seen)")
+        self._conn.commit()
+        self.evict_expired()
+
+    def get(self, video_id: str) -> Optional[VideoMetadata]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is not None:
+                self._memory.move_to_end(video_id)
+            else:
+                row = self._conn.execute(
+                    "SELECT video_id, duration, title, last_seen FROM video_metadata WHERE video_id = ?",
+                    (video_id,)).fetchone()
+                if row is None:
+                    return None
+                entry = VideoMetadata(*row)
+                self._remember(entry)
+            if now - entry.last_seen > self.ttl:
+                self._forget(video_id)
+                return None
+            return entry
+
+    def get_duration(self, video_id: str) -> Optional[int]:
+        entry = self.get(video_id)
+        return entry.duration if entry else None
+
+    def put(self, video_id: str, duration: Optional[int] = None, title: Optional[str] = None):
+        """メタデータを保存する。None の項目は既存の値を保持する"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO video_metadata (video_id, duration, title, last_seen)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    duration = COALESCE(excluded.duration, duration),
+                    title = COALESCE(excluded.title, title),
+                    last_seen = excluded.last_seen
+            """, (video_id, duration, title, now))
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT video_id, duration, title, last_seen FROM video_metadata WHERE video_id = ?",
+                (video_id,)).fetchone()
+            self._remember(VideoMetadata(*row))
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM video_metadata WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+            for video_id in [k for k, v in self._memory.items() if v.last_seen < cutoff]:
+                del self._memory[video_id]
+        if cursor.rowcount:
+            logging.info(f"期限切れの動画メタデータを {cursor.rowcount} 件削除しました")
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, entry: VideoMetadata):
+        self._memory[entry.video_id] = entry
+        self._memory.move_to_end(entry.video_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _forget(self, video_id: str):
+        self._memory.pop(video_id, None)
+        self._conn.execute("DELETE FROM video_metadata WHERE video_id = ?", (video_id,))
+        self._conn.commit()
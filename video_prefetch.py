@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""次のフェーズの動画を裏のプレイヤーで先読みし、切り替え時に差し替える
+
+先読み用のプレイヤーは非表示のまま、ミュートで読み込み→再生開始直後に一時停止して
+バッファを温めておく。フェーズが切り替わったら QStackedWidget の表示を入れ替えて
+再生するだけなので、休憩の始まりに読み込み待ちが起きない。
+先読み用プレイヤーの数とメモリ使用量には上限を設ける。
+"""
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+from PyQt5.QtCore import pyqtSignal
+
+import metrics
+from process_stats import process_rss_mb
+from youtube_player import PLAYING, PlayerController
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEAD_SECONDS = 30
+DEFAULT_MEMORY_LIMIT_MB = 1500
+
+TRANSITION_TO_PLAY = metrics.histogram("pomodoro_phase_transition_to_play_seconds",
+                                       "フェーズ切り替えから次の動画の再生開始までの時間", ("prefetched",))
+
+
+class VideoPrefetcher(QtCore.QObject):
+    # 先読みを使ったか, 切り替えから再生開始までの時間（ミリ秒）
+    transitionMeasured = pyqtSignal(bool, float)
+
+    def __init__(self, stack: QtWidgets.QStackedWidget, active: PlayerController,
+                 make_player: Callable[[], PlayerController], max_players: int = 1,
+                 memory_limit_mb: Optional[float] = DEFAULT_MEMORY_LIMIT_MB, parent=None):
+        super().__init__(parent)
+        self.stack = stack
+        self.active = active
+        self.make_player = make_player
+        self.max_players = max_players
+        self.memory_limit_mb = memory_limit_mb
+        self._spares: List[PlayerController] = []
+        # video_id -> (先読み中のプレイヤー, バッファ済みか)
+        self._warming: Dict[str, list] = {}
+        self._transition: Optional[tuple] = None
+        self._rss_unknown_logged = False
+        self.latencies: Dict[str, Deque[float]] = {"prefetched": deque(maxlen=100), "cold": deque(maxlen=100)}
+        self._watch(active)
+
+    def _watch(self, player: PlayerController):
+        player.stateChanged.connect(lambda state, video_id, p=player: self._on_state(p, state, video_id))
+
+    # --- 先読み ---
+
+    def prefetch(self, video_id: str) -> bool:
+        """video_id を裏で読み込む。上限に達していれば何もせず False を返す"""
+        if video_id in self._warming or video_id == self.active.current_video_id:
+            return True
+        if len(self._warming) >= self.max_players:
+            logger.info(f"先読みの上限（{self.max_players}件）に達しているため {video_id} は先読みしません")
+            return False
+        if self.memory_limit_mb:
+            rss = process_rss_mb()
+            if rss is None:
+                # レンダラーを含めた使用量が分からなければ、上限を守れないので先読みしない
+                if not self._rss_unknown_logged:
+                    self._rss_unknown_logged = True
+                    logger.warning("メモリ使用量を取得できないため先読みを行いません（psutil が必要です）")
+                return False
+            if rss > self.memory_limit_mb:
+                logger.info(f"メモリ使用量が {rss:.0f}MB のため先読みを見送ります（上限 {self.memory_limit_mb}MB）")
+                return False
+        player = self._take_spare()
+        player.mute()
+        # 温めるための再生は、読み込み時間の計測・ステータス表示の対象にしない
+        player.load(video_id, measure=False)
+        self._warming[video_id] = [player, False]
+        logger.info(f"次の動画を先読みしています: {video_id}")
+        return True
+
+    def cancel(self):
+        """先読み中の動画を止める（プレイヤーは次の先読みに使い回す）"""
+        for player, _ in self._warming.values():
+            player.pause()
+            self._spares.append(player)
+        self._warming.clear()
+
+    def _take_spare(self) -> PlayerController:
+        if self._spares:
+            return self._spares.pop()
+        player = self.make_player()
+        self.stack.addWidget(player.web_view)
+        self._watch(player)
+        return player
+
+    # --- 切り替え ---
+
+    def activate(self, video_id: str) -> PlayerController:
+        """video_id を表示中のプレイヤーで再生し、そのプレイヤーを返す"""
+        started = time.perf_counter()
+        entry = self._warming.pop(video_id, None)
+        if entry is not None:
+            player, _ = entry
+            previous = self.active
+            self.stack.setCurrentWidget(player.web_view)
+            player.unmute()
+            player.play()
+            previous.pause()
+            self.active = player
+            self._spares.append(previous)
+        else:
+            self.active.load(video_id)
+        self._transition = (video_id, entry is not None, started)
+        return self.active
+
+    def _on_state(self, player: PlayerController, state: int, video_id: str):
+        if state != PLAYING:
+            return
+        entry = self._warming.get(video_id)
+        if entry is not None and entry[0] is player and not entry[1]:
+            # 再生が始まった＝バッファが温まったので、頭に戻して待機する
+            entry[1] = True
+            player.pause()
+            player.seek(0)
+            return
+        if player is self.active and self._transition is not None and self._transition[0] == video_id:
+            _, prefetched, started = self._transition
+            self._transition = None
+            elapsed = time.perf_counter() - started
+            self.latencies["prefetched" if prefetched else "cold"].append(elapsed * 1000)
+            TRANSITION_TO_PLAY.labels("yes" if prefetched else "no").observe(elapsed)
+            logger.info(f"フェーズ切り替えから再生開始まで {elapsed * 1000:.0f}ms "
+                         f"({'先読みあり' if prefetched else '先読みなし'})")
+            self.transitionMeasured.emit(prefetched, elapsed * 1000)
+
+    def is_warming(self, player: PlayerController) -> bool:
+        """player が先読み中（切り替えを待っている）か"""
+        return any(entry[0] is player for entry in self._warming.values())
+
+    def players(self) -> List[PlayerController]:
+        return [self.active] + self._spares + [player for player, _ in self._warming.values()]
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""FastAPI アプリと Notion OAuth コールバック受付サーバー
+
+fastapi / uvicorn は読み込みが重いため、実際に必要になるまで import しない。
+コールバック受付サーバーは認証フローの間だけ、空いているポートで起動する。
+
+ヘッドレスのセッションスケジューラ API だけを動かす場合:
+
+    python web_app.py --port 8000
+
+--metrics を付けると計測を有効にし、/metrics で Prometheus 形式の値を返す。
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import threading
+from typing import Callable, Optional
+
+import metrics
+from scheduler_service import register_routes
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+    """FastAPI アプリを返す。初回呼び出し時に作成する"""
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = _create_app()
+        return _app
+
+
+def _create_app():
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+
+    app = FastAPI()
+    app.state.oauth_listener = None
+
+    @app.get("/notion/callback")
+    async def handle_callback(code: str = None):
+        listener = app.state.oauth_listener
+        if code:
+            # コードを使って認証処理を行う
+            if listener is not None:
+                listener(code)
+            return "認証が完了しました。このページを閉じてアプリに戻ってください。"
+        return "エラーが発生しまた。"
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics():
+        return PlainTextResponse(metrics.render_prometheus(),
+                                 media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.post("/debug/profiler/start")
+    async def start_profiler(interval: float = 0.005):
+        metrics.start_profiler(interval)
+        return {"running": True, "interval": interval}
+
+    @app.post("/debug/profiler/stop", response_class=PlainTextResponse)
+    async def stop_profiler():
+        # 折りたたみスタック形式（flamegraph.pl にそのまま渡せる）
+        profiler = metrics.stop_profiler()
+        return profiler.folded() if profiler is not None else ""
+
+    # 共有ポモドーロルーム用のセッション操作API
+    register_routes(app)
+    return app
+
+
+def _bind_free_port(host: str = "127.0.0.1", port: int = 0) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    return sock
+
+
+class LocalServer:
+    """uvicorn を別スレッドで動かし、stop() で確実に止める"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self._sock = _bind_free_port(host, port)
+        self.port = self._sock.getsockname()[1]
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        import uvicorn
+
+        config = uvicorn.Config(get_app(), host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._run, name="LocalServer", daemon=True)
+        self._thread.start()
+        logging.info(f"ローカルサーバーを起動しました: http://{self.host}:{self.port}")
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._server.serve(sockets=[self._sock]))
+        finally:
+            loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._sock.close()
+        logging.info("ローカルサーバーを停止しました")
+
+
+class OAuthCallbackServer(LocalServer):
+    """Notion の OAuth コールバックを受け付ける一時サーバー"""
+
+    def __init__(self, on_code: Callable[[str], None], host: str = "127.0.0.1"):
+        super().__init__(host)
+        self.on_code = on_code
+
+    @property
+    def redirect_uri(self) -> str:
+        return f"http://localhost:{self.port}/notion/callback"
+
+    def start(self):
+        get_app().state.oauth_listener = self.on_code
+        return super().start()
+
+    def stop(self, timeout: float = 5.0):
+        app = get_app()
+        if app.state.oauth_listener is self.on_code:
+            app.state.oauth_listener = None
+        super().stop(timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ポモドーロのセッションスケジューラ API を起動する")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--metrics", action="store_true", help="計測を有効にして /metrics で公開する")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+
+    import uvicorn
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    uvicorn.run(get_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""永続化する QWebEngineProfile（ディスクの HTTP キャッシュつき）
+
+既定のプロファイルはオフ・ザ・レコードのため、起動のたびに iframe_api や
+プレイヤーの JS、サムネイルを取り直していた。名前付きのプロファイルを
+pomodoro_data/webengine に置き、キャッシュの上限を設けて使い回す。
+
+ヒット率はプレイヤーページの Performance API（transferSize）から数える。
+Timing-Allow-Origin のない別オリジンのリソースは判別できないため unknown に数える。
+"""
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+from PyQt5 import QtCore
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+
+import metrics
+
+PROFILE_NAME = "pomodoro"
+DEFAULT_STORAGE_PATH = os.path.join("pomodoro_data", "webengine")
+DEFAULT_CACHE_MB = 200
+
+CACHE_LOOKUPS = metrics.counter("pomodoro_web_cache_lookups_total",
+                                "プレイヤーページのリソース読み込み（キャッシュの結果別）", ("result",))
+
+RESOURCE_TIMING_SCRIPT = """
+(function () {
+    return performance.getEntriesByType('resource').map(function (e) {
+        return [e.name, e.transferSize, e.encodedBodySize];
+    });
+})();
+"""
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class _RequestCounter(QWebEngineUrlRequestInterceptor):
+    """プロファイルを通るリクエストの数を数えるだけのインターセプタ"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.requests = 0
+
+    def interceptRequest(self, info):
+        self.requests += 1
+
+
+class WebProfile(QtCore.QObject):
+    def __init__(self, storage_path: str = DEFAULT_STORAGE_PATH, cache_mb: int = DEFAULT_CACHE_MB,
+                 name: str = PROFILE_NAME, parent=None):
+        super().__init__(parent)
+        self.storage_path = os.path.abspath(storage_path)
+        self.cache_path = os.path.join(self.storage_path, "cache")
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.profile = QWebEngineProfile(name, parent)
+        self.profile.setPersistentStoragePath(self.storage_path)
+        self.profile.setCachePath(self.cache_path)
+        self.profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        self.profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
+        self.set_cache_limit_mb(cache_mb)
+        self._counter = _RequestCounter(self)
+        self.profile.setUrlRequestInterceptor(self._counter)
+        self.lookups: Dict[str, int] = {"hit": 0, "miss": 0, "unknown": 0}
+        self._seen = set()
+
+    def set_cache_limit_mb(self, cache_mb: Optional[int]):
+        self.cache_limit_mb = int(cache_mb or DEFAULT_CACHE_MB)
+        self.profile.setHttpCacheMaximumSize(self.cache_limit_mb * 1024 * 1024)
+
+    def clear_cache(self):
+        """HTTP キャッシュを消去する（Cookie や localStorage は残す）"""
+        self.profile.clearHttpCache()
+        self.lookups = {"hit": 0, "miss": 0, "unknown": 0}
+        self._seen.clear()
+        logging.info("WebEngine の HTTP キャッシュを消去しました")
+
+    def collect(self, page, callback: Optional[Callable[[dict], None]] = None):
+        """page で読み込まれたリソースをキャッシュのヒット・ミスに振り分けて集計する"""
+        def on_result(entries):
+            for name, transfer_size, encoded_size in entries or []:
+                if name in self._seen:
+                    continue
+                self._seen.add(name)
+                if encoded_size == 0:
+                    result = "unknown"
+                elif transfer_size == 0:
+                    result = "hit"
+                else:
+                    result = "miss"
+                self.lookups[result] += 1
+                CACHE_LOOKUPS.labels(result).inc()
+            if callback is not None:
+                callback(self.stats())
+        page.runJavaScript(RESOURCE_TIMING_SCRIPT, on_result)
+
+    def stats(self) -> dict:
+        known = self.lookups["hit"] + self.lookups["miss"]
+        return {
+            "cache_bytes": directory_size(self.cache_path),
+            "cache_limit_bytes": self.cache_limit_mb * 1024 * 1024,
+            "requests": self._counter.requests,
+            "hits": self.lookups["hit"],
+            "misses": self.lookups["miss"],
+            "unknown": self.lookups["unknown"],
+            "hit_rate": self.lookups["hit"] / known if known else None,
+        }
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""YouTube の動画IDを URL から取り出す共通処理
+
+Qt版・Tk版の両方から使う。正規表現は1つにまとめてモジュール読み込み時に
+コンパイルし、結果は上限付きの LRU キャッシュに保持する。
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+_ID = r'[0-9A-Za-z_-]{11}'
+
+_VIDEO_ID_RE = re.compile(rf'''
+    ^\s*(?:
+        (?P<bare>{_ID})\s*$
+      | (?:https?://)?(?:[\w-]+\.)?
+        (?:
+            youtu\.be/(?P<short>{_ID})
+          | (?:youtube|youtube-nocookie)\.com/
+            (?:
+                (?:watch|attribution_link)?\?(?:[^#\s]*?&)?v=
+              | (?:embed|v|e|shorts|live)/
+            )
+            (?P<long>{_ID})
+        )
+        (?![0-9A-Za-z_-])
+    )
+''', re.VERBOSE)
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_video_id(url: str) -> Optional[str]:
+    """URL（または11文字の動画ID）から動画IDを返す。見つからなければ None"""
+    if not url:
+        return None
+    match = _VIDEO_ID_RE.match(url)
+    if not match:
+        return None
+    return match.group('bare') or match.group('short') or match.group('long')
+
+
+def extract_many(urls: Iterable[str], skip_invalid: bool = False) -> Iterator[Optional[str]]:
+    """URL の列から動画IDを順に返すジェネレータ（大量の URL リスト向け）"""
+    extract = extract_video_id
+    for url in urls:
+        video_id = extract(url.strip() if url else url)
+        if video_id is None and skip_invalid:
+            continue
+        yield video_id
+
+
+def cache_info():
+    return extract_video_id.cache_info()
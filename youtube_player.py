@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""一度だけ読み込んで使い回す YouTube プレイヤーページ
+
+プレイヤーの HTML と iframe_api は最初の1回だけ読み込み、以降の動画は
+loadVideoById / cueVideoById で差し替える。プレイヤーの準備が整う前に
+呼ばれた操作はキューに溜め、onReady で順に実行する。
+
+ページとの通信は QWebChannel で行う。プレイヤーは状態の変化と再生位置
+（再生中のみ一定間隔）を Python へ送り、Python は名前付きのコマンドを
+送って応答（ack）を受け取る。ポーリングはしない。
+
+音声のみモードでは画像を読み込まず、プレイヤーを最小サイズにして
+最低画質を要求する（YouTube は表示サイズに合わせて画質を選ぶ）。
+
+ページは凍結（Frozen）・破棄（Discarded）できる。凍結・破棄中のページに
+操作を送ると自動で再開し、破棄から戻したときは元の動画を元の位置で頭出しする。
+"""
+import json
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineSettings
+
+import metrics
+
+# 再生状態のイベントに合わせて出るログが多いので、log_pipeline で件数を制限する
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL_MS = 1000
+
+# ページのライフサイクル（QtWebEngine 5.14 以降。それより前では凍結・破棄しない）
+LifecycleState = getattr(QWebEnginePage, "LifecycleState", None)
+
+JS_ROUND_TRIP = metrics.histogram("pomodoro_player_command_rtt_seconds",
+                                  "プレイヤーへのコマンド送信から応答までの時間", ("command",))
+EVENT_DELIVERY = metrics.histogram("pomodoro_player_event_delivery_seconds",
+                                   "プレイヤーがイベントを送ってから受け取るまでの時間", ("event",))
+LOAD_TO_PLAY = metrics.histogram("pomodoro_player_load_to_play_seconds",
+                                 "動画の読み込み要求から再生開始までの時間", ("mode",))
+
+PLAYER_HTML = '''
+<html><body style="margin:0">
+    <div id="player"></div>
+    <script>%(webchannel_js)s</script>
+    <script src="https://www.youtube.com/iframe_api"></script>
+    <script>
+        var player, bridge, progressTimer = null, pending = [], audioOnly = false;
+        function notify(payload) {
+            payload.sentAt = Date.now();
+            if (bridge) {
+                bridge.onEvent(JSON.stringify(payload));
+            } else {
+                pending.push(payload);
+            }
+        }
+        new QWebChannel(qt.webChannelTransport, function (channel) {
+            bridge = channel.objects.bridge;
+            bridge.command.connect(runCommand);
+            pending.splice(0).forEach(function (payload) {
+                bridge.onEvent(JSON.stringify(payload));
+            });
+        });
+        var COMMANDS = {
+            play: function () { player.playVideo(); },
+            pause: function () { player.pauseVideo(); },
+            seek: function (args) { player.seekTo(args[0], true); },
+            load: function (args) { player.loadVideoById(args[0]); },
+            cue: function (args) { player.cueVideoById(args[0], args[1] || 0); },
+            mute: function () { player.mute(); },
+            unmute: function () { player.unMute(); },
+            audioOnly: function (args) { audioOnly = args[0]; applyAudioOnly(); }
+        };
+        function applyAudioOnly() {
+            var iframe = player.getIframe();
+            iframe.style.width = audioOnly ? '160px' : '100%%';
+            iframe.style.height = audioOnly ? '90px' : '100%%';
+            player.setPlaybackQuality(audioOnly ? 'tiny' : 'default');
+        }
+        function runCommand(seq, name, argsJson) {
+            var ok = false, error = '';
+            try {
+                if (!player || !player.getPlayerState) {
+                    error = 'player not ready';
+                } else if (!COMMANDS[name]) {
+                    error = 'unknown command: ' + name;
+                } else {
+                    COMMANDS[name](JSON.parse(argsJson));
+                    ok = true;
+                }
+            } catch (e) {
+                error = String(e);
+            }
+            bridge.ack(seq, ok, error);
+        }
+        function notifyProgress() {
+            notify({event: 'progress', time: player.getCurrentTime(), duration: player.getDuration()});
+        }
+        function setProgress(playing) {
+            if (playing && progressTimer === null) {
+                progressTimer = setInterval(notifyProgress, %(progress_interval)d);
+            } else if (!playing && progressTimer !== null) {
+                clearInterval(progressTimer);
+                progressTimer = null;
+                notifyProgress();
+            }
+        }
+        function onYouTubeIframeAPIReady() {
+            player = new YT.Player('player', {
+                height: '100%%',
+                width: '100%%',
+                playerVars: {
+                    'autoplay': 1,
+                    'controls': 1
+                },
+                events: {
+                    'onReady': function () { notify({event: 'ready'}); },
+                    'onStateChange': function (e) {
+                        var data = player.getVideoData ? player.getVideoData() : {};
+                        notify({event: 'state', state: e.data, videoId: data.video_id || '',
+                                title: data.title || '', duration: player.getDuration()});
+                        setProgress(e.data === YT.PlayerState.PLAYING);
+                    },
+                    'onError': function (e) { notify({event: 'error', code: e.data}); }
+                }
+            });
+        }
+    </script>
+</body></html>
+'''
+
+# YT.PlayerState
+ENDED = 0
+PLAYING = 1
+PAUSED = 2
+
+
+def _webchannel_js() -> str:
+    """Qt に同梱されている qwebchannel.js（ページに直接埋め込む）"""
+    source = QtCore.QFile(":/qtwebchannel/qwebchannel.js")
+    if not source.open(QtCore.QIODevice.ReadOnly):
+        raise RuntimeError("qwebchannel.js を読み込めません")
+    try:
+        return bytes(source.readAll()).decode("utf-8")
+    finally:
+        source.close()
+
+
+class PlayerBridge(QtCore.QObject):
+    """ページ側の JavaScript から見える bridge オブジェクト"""
+    command = pyqtSignal(int, str, str)
+    playerEvent = pyqtSignal(dict)
+    commandAcked = pyqtSignal(int, bool, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # ページで送信してから Python で受け取るまでの時間（ミリ秒）
+        self.delivery_latencies: deque = deque(maxlen=500)
+
+    @pyqtSlot(str)
+    def onEvent(self, message):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            logger.warning(f"プレイヤーイベントを解析できません: {message}")
+            return
+        sent_at = payload.get("sentAt")
+        if sent_at:
+            latency_ms = max(0.0, time.time() * 1000 - sent_at)
+            self.delivery_latencies.append(latency_ms)
+            EVENT_DELIVERY.labels(payload.get("event", "")).observe(latency_ms / 1000)
+        self.playerEvent.emit(payload)
+
+    @pyqtSlot(int, bool, str)
+    def ack(self, seq, ok, error):
+        self.commandAcked.emit(seq, ok, error)
+
+
+class PlayerController(QtCore.QObject):
+    """QWebEngineView 上の常駐プレイヤーを操作する"""
+    ready = pyqtSignal()
+    stateChanged = pyqtSignal(int, str)
+    progress = pyqtSignal(float, float)
+    playerError = pyqtSignal(int)
+    loadLatencyMeasured = pyqtSignal(str, float)
+    videoInfo = pyqtSignal(str, int, str)
+
+    def __init__(self, web_view, parent=None, profile=None):
+        super().__init__(parent)
+        self.web_view = web_view
+        # profile を渡せばそのキャッシュ・Cookie を使う（省略時は既定のオフ・ザ・レコード）
+        self.page = QWebEnginePage(profile, web_view) if profile is not None else QWebEnginePage(web_view)
+        # 設定はページごとに持つので、作ったページに対して行う（先読み用のプレイヤーも同じ設定になる）
+        settings = self.page.settings()
+        # YouTube の再生には Pepper プラグインも WebGL も使わない
+        settings.setAttribute(QWebEngineSettings.PluginsEnabled, False)
+        settings.setAttribute(QWebEngineSettings.WebGLEnabled, False)
+        settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
+        settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
+        settings.setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
+        settings.setAttribute(QWebEngineSettings.AutoLoadImages, True)
+        self.bridge = PlayerBridge(self)
+        self.bridge.playerEvent.connect(self._on_player_event)
+        self.bridge.commandAcked.connect(self._on_command_acked)
+        self.channel = QWebChannel(self.page)
+        self.channel.registerObject("bridge", self.bridge)
+        self.page.setWebChannel(self.channel)
+        web_view.setPage(self.page)
+        self.is_loaded = False
+        self.is_ready = False
+        self._queue: List[tuple] = []
+        self._pending_load: Optional[tuple] = None
+        self._seq = 0
+        self._inflight: Dict[int, tuple] = {}
+        self.current_video_id: Optional[str] = None
+        # プレイヤーから送られてきた最新の状態（問い合わせずに参照できる）
+        self.state: int = -1
+        self.position: float = 0.0
+        self.duration: float = 0.0
+        # "initial" はシェル＋iframe_api の読み込みを含む（従来の毎回 setHtml と同じ経路）
+        self.latencies: Dict[str, deque] = {"initial": deque(maxlen=100), "in_place": deque(maxlen=100),
+                                            "rtt": deque(maxlen=500)}
+        self.audio_only = False
+        # 破棄したときの (動画ID, 再生位置)。再開時に頭出しする
+        self._discarded_at: Optional[tuple] = None
+        if LifecycleState is not None:
+            self.page.lifecycleStateChanged.connect(self._on_lifecycle_changed)
+
+    @property
+    def is_playing(self) -> bool:
+        return self.state == PLAYING
+
+    def ensure_loaded(self):
+        if not self.is_loaded:
+            self.is_loaded = True
+            self.page.setHtml(PLAYER_HTML % {"webchannel_js": _webchannel_js(),
+                                             "progress_interval": PROGRESS_INTERVAL_MS})
+
+    def load(self, video_id: str, autoplay: bool = True, measure: bool = True):
+        """動画を差し替える。autoplay=False なら再生せずに頭出しだけ行う
+
+        measure=False なら読み込みから再生開始までの時間を記録しない（先読みなど、
+        ユーザーが再生したのではない読み込み）。
+        """
+        mode = "in_place" if self.is_ready else "initial"
+        self.current_video_id = video_id
+        self._pending_load = (video_id, mode, time.perf_counter()) if autoplay and measure else None
+        self._call("load" if autoplay else "cue", [video_id], load_shell=True)
+
+    def play(self):
+        self._call("play")
+
+    def pause(self):
+        self._call("pause")
+
+    def seek(self, seconds: float):
+        self._call("seek", [float(seconds)])
+
+    def mute(self):
+        self._call("mute", load_shell=True)
+
+    def unmute(self):
+        self._call("unmute")
+
+    @property
+    def lifecycle_state(self):
+        return self.page.lifecycleState() if LifecycleState is not None else None
+
+    def set_lifecycle_state(self, state) -> bool:
+        """ページを凍結・破棄・再開する。できなければ False（表示中のページは凍結できない）"""
+        if LifecycleState is None or not self.is_loaded:
+            return False
+        if state == self.page.lifecycleState():
+            return True
+        if state != LifecycleState.Active and self.page.isVisible():
+            return False
+        if state == LifecycleState.Discarded:
+            self._discarded_at = (self.current_video_id, self.position)
+            self.is_ready = False
+            self.state = -1
+        self.page.setLifecycleState(state)
+        return True
+
+    def wake(self):
+        """凍結・破棄したページを再開する（破棄していた場合はプレイヤーを読み直す）"""
+        if self.lifecycle_state not in (None, LifecycleState.Active):
+            self.set_lifecycle_state(LifecycleState.Active)
+
+    def set_audio_only(self, enabled: bool):
+        """音声のみモードを切り替える（画像の読み込みを止め、最小サイズ・最低画質で再生する）"""
+        if enabled == self.audio_only:
+            return
+        self.audio_only = enabled
+        self.page.settings().setAttribute(QWebEngineSettings.AutoLoadImages, not enabled)
+        self._call("audioOnly", [enabled])
+
+    def latency_summary(self) -> Dict[str, dict]:
+        """読み込みから再生開始まで・コマンドの往復・イベント到着までの時間（ミリ秒）"""
+        summary = {}
+        series = dict(self.latencies, event=self.bridge.delivery_latencies)
+        for mode, values in series.items():
+            if values:
+                ordered = sorted(values)
+                summary[mode] = {
+                    "count": len(values),
+                    "last_ms": values[-1],
+                    "median_ms": ordered[len(ordered) // 2],
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+        return summary
+
+    def _call(self, name: str, args: Optional[list] = None, load_shell: bool = False):
+        self.wake()
+        if self.is_ready:
+            self._send(name, args or [])
+        elif self.is_loaded or load_shell:
+            self._queue.append((name, args or []))
+            self.ensure_loaded()
+        # 動画を一度も読み込んでいなければ、再生操作は何もしない
+
+    def _send(self, name: str, args: list):
+        self._seq += 1
+        self._inflight[self._seq] = (name, time.perf_counter())
+        self.bridge.command.emit(self._seq, name, json.dumps(args))
+
+    def _flush(self):
+        queue, self._queue = self._queue, []
+        for name, args in queue:
+            self._send(name, args)
+
+    def _on_lifecycle_changed(self, state):
+        # 破棄されたページは Active に戻ると読み直され、ready から先は通常どおり
+        if state == LifecycleState.Active and self._discarded_at is not None:
+            video_id, position = self._discarded_at
+            self._discarded_at = None
+            if video_id:
+                self._queue.insert(0, ("cue", [video_id, position]))
+
+    def _on_command_acked(self, seq: int, ok: bool, error: str):
+        sent = self._inflight.pop(seq, None)
+        if sent is None:
+            return
+        name, started = sent
+        elapsed = time.perf_counter() - started
+        self.latencies["rtt"].append(elapsed * 1000)
+        JS_ROUND_TRIP.labels(name).observe(elapsed)
+        if not ok:
+            logger.warning(f"プレイヤーへのコマンド {name} が失敗しました: {error}")
+
+    def _on_player_event(self, payload: dict):
+        event = payload.get("event")
+        if event == "ready":
+            self.is_ready = True
+            self.ready.emit()
+            self._flush()
+            if self.audio_only:
+                # シェルを読み込む前（または破棄から戻した後）に切り替えていた場合
+                self._send("audioOnly", [True])
+        elif event == "state":
+            state = int(payload.get("state", -1))
+            video_id = payload.get("videoId", "")
+            self.state = state
+            self.duration = float(payload.get("duration") or 0)
+            self.stateChanged.emit(state, video_id)
+            if state == PLAYING:
+                self._record_latency(video_id)
+                duration = int(self.duration)
+                if video_id and duration > 0:
+                    self.videoInfo.emit(video_id, duration, payload.get("title", ""))
+        elif event == "progress":
+            self.position = float(payload.get("time") or 0)
+            self.duration = float(payload.get("duration") or 0)
+            self.progress.emit(self.position, self.duration)
+        elif event == "error":
+            code = int(payload.get("code", -1))
+            logger.error(f"YouTube プレイヤーエラー: {code}")
+            self.playerError.emit(code)
+
+    def _record_latency(self, video_id: str):
+        if self._pending_load is None or self._pending_load[0] != video_id:
+            return
+        _, mode, started = self._pending_load
+        self._pending_load = None
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.latencies[mode].append(latency_ms)
+        LOAD_TO_PLAY.labels(mode).observe(latency_ms / 1000)
+        logger.info(f"動画の読み込みから再生開始まで {latency_ms:.0f}ms ({mode})")
+        self.loadLatencyMeasured.emit(mode, latency_ms)